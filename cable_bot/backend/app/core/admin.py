@@ -0,0 +1,23 @@
+# backend/app/core/admin.py
+"""
+管理接口鉴权 (/api/v1/admin/*)
+
+API 对公网开放，管理接口 (目录重载、导入记录) 必须带 X-Admin-Token 请求头，与 ADMIN_TOKEN 一致才放行。
+没有配置 ADMIN_TOKEN 时管理接口整体关闭 (404)，默认部署不会暴露。
+"""
+import hmac
+
+from fastapi import HTTPException, Request
+
+from app.core import config
+
+ADMIN_TOKEN_HEADER = "X-Admin-Token"
+
+
+def require_admin(request: Request) -> None:
+    """FastAPI 依赖: 校验管理令牌"""
+    if not config.ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    token = request.headers.get(ADMIN_TOKEN_HEADER, "")
+    if not hmac.compare_digest(token.encode(), config.ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=401, detail="管理令牌无效", headers={"WWW-Authenticate": ADMIN_TOKEN_HEADER})
@@ -0,0 +1,251 @@
+# backend/app/core/admission.py
+"""
+准入控制: 按客户端限速 + 按接口类别限并发 (纯 ASGI 中间件，状态都在当前 worker 进程内)
+
+API 公开且无鉴权，一个循环调用选型接口的爬虫就能占满 worker，把正常用户的延迟拖到秒级。
+1. 令牌桶 (每个客户端 IP 一个): 每秒补 ADMISSION_RATE 个令牌，最多攒 ADMISSION_BURST 个，
+   请求按类别扣令牌 (单次选型 1，批量 / 查库 5，铜价 0.5)，不够时立即 429 + Retry-After (补够所需秒数)。
+   客户端状态按最近访问排序，空闲超过 ADMISSION_IDLE_SECONDS 的从队头淘汰 (那时桶早已补满，丢掉等于没变)。
+2. 并发上限 (每个接口类别一个): 超出上限的请求排队，按 排队数 × 平均处理时长 / 并发数 估算等待时间，
+   超过该类别的延迟预算直接 503 + Retry-After，不让队列越积越长；排队超过预算仍未轮到的同样 503。
+   流式导入单独一类且不计入平均处理时长: 一次几分钟的导入不会把批量接口的估算拉高到全部拒绝。
+未归类的路径 (首页、/metrics、统计接口) 和长连接推送不受控制。计数见 /api/v1/admission/stats 与 /metrics。
+"""
+import asyncio
+import json
+import math
+import time
+from collections import OrderedDict, deque
+from typing import Dict, Optional, Tuple
+
+from app.core import config
+
+# (方法, 路径前缀, 类别)，按顺序匹配第一条；方法为 None 表示任意方法，类别为 None 表示不受控制
+ROUTE_RULES: Tuple[Tuple[Optional[str], str, Optional[str]], ...] = (
+    (None, "/api/v1/market/copper/stream", None),
+    (None, "/api/v1/market/copper/history", "heavy"),
+    (None, "/api/v1/market/copper", "price"),
+    (None, "/api/v1/sizing-table", "price"),
+    (None, "/api/v1/calculate/sizing/batch", "heavy"),
+    (None, "/api/v1/calculate/sizing/import", "import"),
+    (None, "/api/v1/calculate/panel", "heavy"),
+    (None, "/api/v1/check/fake/batch", "heavy"),
+    ("POST", "/api/v1/feeder-trees", "heavy"),
+    (None, "/api/v1/admin/", "heavy"),
+    (None, "/api/v1/calculate/", "sizing"),
+    (None, "/api/v1/check/", "sizing"),
+    (None, "/api/v1/feeder-trees", "sizing"),
+)
+
+# 类别 -> (每次消耗令牌数, 并发上限, 延迟预算 ms, 初始平均处理时长 ms)
+ROUTE_CLASSES: Dict[str, Tuple[float, int, float, float]] = {
+    "sizing": (1.0, config.ADMISSION_SIZING_CONCURRENCY, config.ADMISSION_SIZING_BUDGET_MS, 5.0),
+    "heavy": (5.0, config.ADMISSION_HEAVY_CONCURRENCY, config.ADMISSION_HEAVY_BUDGET_MS, 200.0),
+    "price": (0.5, config.ADMISSION_PRICE_CONCURRENCY, config.ADMISSION_PRICE_BUDGET_MS, 1.0),
+    "import": (5.0, config.ADMISSION_IMPORT_CONCURRENCY, 0.0, 60000.0),
+}
+
+# 响应体是长时间流式输出的类别: 处理时长不更新平均值 (平均值固定为初始值，只用来给 Retry-After)
+STREAMING_CLASSES = frozenset({"import"})
+
+# 平均处理时长的指数平滑系数；排队长度硬上限 = 并发上限 × QUEUE_FACTOR
+EWMA_ALPHA = 0.1
+QUEUE_FACTOR = 8
+
+
+def classify(method: str, path: str) -> Optional[str]:
+    for rule_method, prefix, name in ROUTE_RULES:
+        if path.startswith(prefix) and (rule_method is None or rule_method == method):
+            return name
+    return None
+
+
+class TokenBuckets:
+    """客户端 -> [令牌数, 上次更新时间]，按最近访问排序 (队头最久未访问)"""
+
+    def __init__(self, rate: float, burst: float, idle_seconds: float, max_clients: int):
+        self.rate = rate
+        self.burst = burst
+        self.idle_seconds = idle_seconds
+        self.max_clients = max_clients
+        self._buckets: "OrderedDict[str, list]" = OrderedDict()
+        self.evicted = 0
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def _evict(self, now: float) -> None:
+        buckets = self._buckets
+        while buckets:
+            bucket = next(iter(buckets.values()))
+            if now - bucket[1] < self.idle_seconds and len(buckets) < self.max_clients:
+                break
+            buckets.popitem(last=False)
+            self.evicted += 1
+
+    def take(self, client: str, cost: float, now: float) -> float:
+        """扣令牌: 成功返回 0，不够时返回需要等待的秒数 (不扣)"""
+        bucket = self._buckets.get(client)
+        if bucket is None:
+            self._evict(now)
+            bucket = self._buckets[client] = [self.burst, now]
+        else:
+            self._buckets.move_to_end(client)
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+        if bucket[0] >= cost:
+            bucket[0] -= cost
+            return 0.0
+        return (cost - bucket[0]) / self.rate
+
+
+class RouteClass:
+    """一个接口类别的并发闸门 (等待者按先来先到排队，释放时直接把名额交给队头)"""
+
+    __slots__ = ("name", "cost", "limit", "budget", "avg", "streaming", "active", "_waiters",
+                 "admitted", "throttled", "shed", "timed_out")
+
+    def __init__(self, name: str, cost: float, limit: int, budget_ms: float, initial_ms: float):
+        self.name = name
+        self.cost = cost
+        self.limit = max(1, limit)
+        self.budget = budget_ms / 1000.0
+        self.avg = initial_ms / 1000.0
+        self.streaming = name in STREAMING_CLASSES
+        self.active = 0
+        self._waiters: deque = deque()
+        self.admitted = 0
+        self.throttled = 0     # 令牌不足 (429)
+        self.shed = 0          # 预计等待超出预算，直接拒绝 (503)
+        self.timed_out = 0     # 排队超出预算仍未轮到 (503)
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    def expected_wait(self) -> float:
+        return (len(self._waiters) + 1) * self.avg / self.limit
+
+    async def acquire(self) -> Optional[float]:
+        """拿到名额返回 None；需要拒绝时返回建议的 Retry-After 秒数"""
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            return None
+        wait = self.expected_wait()
+        if wait > self.budget or len(self._waiters) >= self.limit * QUEUE_FACTOR:
+            self.shed += 1
+            return wait
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            # asyncio.wait 超时不会取消 waiter，醒来后同步判断是否已拿到名额，没有竞争
+            await asyncio.wait((waiter,), timeout=self.budget)
+        except asyncio.CancelledError:
+            if waiter.done():
+                # 名额刚交过来请求就被取消 (客户端断开): 还回去
+                self.release()
+            else:
+                self._waiters.remove(waiter)
+                waiter.cancel()
+            raise
+        if not waiter.done():
+            self._waiters.remove(waiter)
+            waiter.cancel()
+            self.timed_out += 1
+            return self.expected_wait()
+        return None
+
+    def release(self) -> None:
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)   # 名额直接转交，active 不变
+                return
+        self.active -= 1
+
+    def observe(self, seconds: float) -> None:
+        if not self.streaming:
+            self.avg += EWMA_ALPHA * (seconds - self.avg)
+
+    def stats(self) -> dict:
+        return {
+            "cost": self.cost,
+            "concurrency_limit": self.limit,
+            "latency_budget_ms": round(self.budget * 1000, 1),
+            "active": self.active,
+            "waiting": self.waiting,
+            "avg_ms": round(self.avg * 1000, 2),
+            "admitted": self.admitted,
+            "throttled": self.throttled,
+            "shed": self.shed,
+            "timed_out": self.timed_out,
+        }
+
+
+class AdmissionController:
+
+    def __init__(self):
+        self.buckets = TokenBuckets(config.ADMISSION_RATE, config.ADMISSION_BURST,
+                                    config.ADMISSION_IDLE_SECONDS, config.ADMISSION_MAX_CLIENTS)
+        self.classes = {name: RouteClass(name, *params) for name, params in ROUTE_CLASSES.items()}
+
+    def stats(self) -> dict:
+        return {
+            "enabled": config.ADMISSION_ENABLED,
+            "rate_per_second": self.buckets.rate,
+            "burst": self.buckets.burst,
+            "clients": len(self.buckets),
+            "clients_evicted": self.buckets.evicted,
+            "classes": {name: rc.stats() for name, rc in self.classes.items()},
+        }
+
+
+controller = AdmissionController()
+
+
+async def _reject(send, status: int, retry_after: float, detail: str) -> None:
+    body = json.dumps({"detail": detail}, ensure_ascii=False).encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+class AdmissionMiddleware:
+    """放在 CORS 之内，被拒绝的响应也带 CORS 头，浏览器端能读到 Retry-After"""
+
+    def __init__(self, app, controller: AdmissionController = controller):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        name = classify(scope["method"], scope["path"]) if scope["type"] == "http" else None
+        if name is None or not config.ADMISSION_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        rc = self.controller.classes[name]
+        client = scope["client"][0] if scope.get("client") else "unknown"
+        retry_after = self.controller.buckets.take(client, rc.cost, time.monotonic())
+        if retry_after:
+            rc.throttled += 1
+            await _reject(send, 429, retry_after, "请求过于频繁，请稍后再试")
+            return
+
+        retry_after = await rc.acquire()
+        if retry_after is not None:
+            await _reject(send, 503, retry_after, "服务繁忙，请稍后再试")
+            return
+        rc.admitted += 1
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            rc.observe(time.perf_counter() - start)
+            rc.release()
@@ -0,0 +1,117 @@
+# backend/app/core/config.py
+# 运行配置 (均可用同名环境变量覆盖)
+import os
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.getenv(name)
+    return float(value) if value else default
+
+
+# 运行时产生的文件 (锁文件、采样分析、离线查找表) 统一放这里，已加入 .gitignore
+RUNTIME_DIR = os.getenv("RUNTIME_DIR", "./runtime")
+
+
+# --- 铜价数据源 ---
+FX_RATE_URL = os.getenv("FX_RATE_URL", "https://api.exchangerate-api.com/v4/latest/USD")
+YAHOO_COPPER_URL = os.getenv(
+    "YAHOO_COPPER_URL", "https://query1.finance.yahoo.com/v8/finance/chart/HG=F?interval=1d&range=1d"
+)
+EASTMONEY_COPPER_URL = os.getenv(
+    "EASTMONEY_COPPER_URL", "https://push2.eastmoney.com/api/qt/stock/get?secid=113.cu00&fields=f43"
+)
+
+# 各数据源超时 (秒)
+FX_TIMEOUT = _env_float("FX_TIMEOUT", 5.0)
+YAHOO_TIMEOUT = _env_float("YAHOO_TIMEOUT", 10.0)
+EASTMONEY_TIMEOUT = _env_float("EASTMONEY_TIMEOUT", 15.0)
+
+# 熔断: 连续失败多少次后熔断，熔断时长从 BASE 开始指数退避，最长 MAX
+BREAKER_FAILURE_THRESHOLD = int(_env_float("BREAKER_FAILURE_THRESHOLD", 3))
+BREAKER_BASE_BACKOFF = _env_float("BREAKER_BASE_BACKOFF", 60.0)
+BREAKER_MAX_BACKOFF = _env_float("BREAKER_MAX_BACKOFF", 3600.0)
+
+# --- 铜价历史保留策略 (天) ---
+# 原始逐时记录只保留最近 N 天 (至少 2 天，24 小时涨跌要用)，更早的只留在汇总表里
+PRICE_RAW_RETENTION_DAYS = max(2, int(_env_float("PRICE_RAW_RETENTION_DAYS", 30)))
+# 1h 汇总保留天数；1d / 1w 汇总永久保留
+PRICE_HOURLY_RETENTION_DAYS = int(_env_float("PRICE_HOURLY_RETENTION_DAYS", 365))
+
+# --- 数据库 ---
+# 同步连接 (seed.py 等脚本使用)
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./cable_expert.db")
+# 异步连接 (API 使用)；未配置时由同步 URL 推导 (sqlite -> sqlite+aiosqlite)
+ASYNC_DATABASE_URL = os.getenv(
+    "ASYNC_DATABASE_URL",
+    DATABASE_URL.replace("sqlite://", "sqlite+aiosqlite://", 1) if DATABASE_URL.startswith("sqlite://") else DATABASE_URL
+)
+
+# 连接池
+DB_POOL_SIZE = int(_env_float("DB_POOL_SIZE", 5))
+DB_MAX_OVERFLOW = int(_env_float("DB_MAX_OVERFLOW", 10))
+DB_POOL_TIMEOUT = _env_float("DB_POOL_TIMEOUT", 30.0)
+DB_POOL_RECYCLE = _env_float("DB_POOL_RECYCLE", 1800.0)
+
+# SQLite 调优: 内存映射大小 (字节) 与锁等待超时 (毫秒)
+SQLITE_MMAP_SIZE = int(_env_float("SQLITE_MMAP_SIZE", 256 * 1024 * 1024))
+SQLITE_BUSY_TIMEOUT_MS = int(_env_float("SQLITE_BUSY_TIMEOUT_MS", 5000))
+
+# --- 观测 ---
+# 慢请求采样分析: 请求耗时超过 N 毫秒时把调用栈样本写入 PROFILE_DIR (0 = 关闭)
+SLOW_REQUEST_PROFILE_MS = _env_float("SLOW_REQUEST_PROFILE_MS", 0)
+PROFILE_DIR = os.getenv("PROFILE_DIR", os.path.join(RUNTIME_DIR, "profiles"))
+
+# --- 项目造价 ---
+# 铝导体单价 / 铜导体单价 (铝材按铜价折算)
+ALUMINIUM_PRICE_RATIO = _env_float("ALUMINIUM_PRICE_RATIO", 0.28)
+
+# --- 防伪检测 ---
+# 正品每 100m 重量的制造公差 (相对标准差)
+ANTI_FAKE_TOLERANCE = _env_float("ANTI_FAKE_TOLERANCE", 0.03)
+# 同一批次的系统性偏差公差 (整批平均重量允许偏离标准的相对标准差)
+ANTI_FAKE_LOT_TOLERANCE = _env_float("ANTI_FAKE_LOT_TOLERANCE", 0.02)
+
+# --- 规格目录 ---
+# 检查 catalog_versions 是否有新导入的间隔 (秒)，有则热替换内存目录
+CATALOG_WATCH_SECONDS = _env_float("CATALOG_WATCH_SECONDS", 10.0)
+
+# --- 部署 (serve.py) ---
+HOST = os.getenv("HOST", "0.0.0.0")
+PORT = int(_env_float("PORT", 8000))
+# worker 进程数，默认 CPU 核数
+WEB_CONCURRENCY = max(1, int(_env_float("WEB_CONCURRENCY", os.cpu_count() or 1)))
+LOG_LEVEL = os.getenv("LOG_LEVEL", "info")
+ACCESS_LOG = os.getenv("ACCESS_LOG", "0") == "1"
+FORWARDED_ALLOW_IPS = os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1")
+# 定时任务 leader 锁文件 (同一台机器上的 worker 共用)；follower 每隔 N 秒重试接手
+SCHEDULER_LOCK_FILE = os.getenv("SCHEDULER_LOCK_FILE", os.path.join(RUNTIME_DIR, "scheduler.lock"))
+LEADER_RETRY_SECONDS = _env_float("LEADER_RETRY_SECONDS", 30.0)
+# 各 worker 检查数据库里是否有新铜价 (由 leader 写入) 的间隔 (秒)
+PRICE_SYNC_SECONDS = _env_float("PRICE_SYNC_SECONDS", 15.0)
+# 还没有任何铜价记录时 (首次抓取在后台进行) 建议客户端多少秒后重试
+PRICE_PENDING_RETRY_SECONDS = int(_env_float("PRICE_PENDING_RETRY_SECONDS", 3))
+# 铜价实时推送 (SSE / WebSocket): 单 worker 最多连接数、空闲心跳间隔 (秒)
+PRICE_STREAM_MAX_SUBSCRIBERS = int(_env_float("PRICE_STREAM_MAX_SUBSCRIBERS", 10000))
+PRICE_STREAM_HEARTBEAT_SECONDS = _env_float("PRICE_STREAM_HEARTBEAT_SECONDS", 20.0)
+
+# --- 准入控制 (按客户端限速 + 按接口类别限并发，状态在各 worker 进程内) ---
+ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "1") == "1"
+# 每个客户端 (IP) 的令牌桶: 每秒补充 RATE 个令牌，最多攒 BURST 个；单次选型消耗 1 个，批量 / 查库类更多
+ADMISSION_RATE = _env_float("ADMISSION_RATE", 10.0)
+ADMISSION_BURST = _env_float("ADMISSION_BURST", 40.0)
+# 空闲超过 N 秒的客户端状态直接丢弃 (此时桶早已补满，丢弃不影响限速)；同时最多跟踪多少个客户端
+ADMISSION_IDLE_SECONDS = _env_float("ADMISSION_IDLE_SECONDS", 300.0)
+ADMISSION_MAX_CLIENTS = int(_env_float("ADMISSION_MAX_CLIENTS", 100000))
+# 各接口类别同时处理的请求数上限，以及排队等待的延迟预算 (毫秒，预计等待超过预算直接 503)
+ADMISSION_SIZING_CONCURRENCY = int(_env_float("ADMISSION_SIZING_CONCURRENCY", 32))
+ADMISSION_SIZING_BUDGET_MS = _env_float("ADMISSION_SIZING_BUDGET_MS", 250.0)
+ADMISSION_HEAVY_CONCURRENCY = int(_env_float("ADMISSION_HEAVY_CONCURRENCY", 4))
+ADMISSION_HEAVY_BUDGET_MS = _env_float("ADMISSION_HEAVY_BUDGET_MS", 2000.0)
+ADMISSION_PRICE_CONCURRENCY = int(_env_float("ADMISSION_PRICE_CONCURRENCY", 64))
+ADMISSION_PRICE_BUDGET_MS = _env_float("ADMISSION_PRICE_BUDGET_MS", 100.0)
+# 流式导入一跑就是几分钟，单独一类: 同时最多 N 个，满了不排队直接 503
+ADMISSION_IMPORT_CONCURRENCY = int(_env_float("ADMISSION_IMPORT_CONCURRENCY", 2))
+
+# --- 管理接口 ---
+# /api/v1/admin/* 的访问令牌 (请求头 X-Admin-Token)；留空则管理接口关闭
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
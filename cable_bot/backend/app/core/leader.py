@@ -0,0 +1,55 @@
+# backend/app/core/leader.py
+"""
+多 worker 部署时的定时任务 leader 选举 (文件锁)
+
+每个 worker 启动时对 SCHEDULER_LOCK_FILE 加非阻塞排它锁 (flock)，拿到锁的就是 leader:
+只有 leader 抓铜价、写库、清理历史，其余 worker 只从数据库同步。
+锁跟随打开的文件，leader 进程退出 (包括被 kill) 时由内核自动释放，其它 worker 下次重试时接手。
+没有 fcntl 的平台 (Windows) 只支持单进程运行，直接视为 leader。
+"""
+import os
+from typing import Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+
+class LeaderLock:
+
+    def __init__(self, path: str):
+        self.path = path
+        self._fd: Optional[int] = None
+
+    @property
+    def is_leader(self) -> bool:
+        return self._fd is not None
+
+    def try_acquire(self) -> bool:
+        """拿到锁 (或已持有) 返回 True，锁被其它进程持有返回 False"""
+        if self._fd is not None:
+            return True
+        if fcntl is None:
+            self._fd = -1
+            return True
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        # 锁文件里写上 leader 的 pid，方便排查
+        os.ftruncate(fd, 0)
+        os.write(fd, f"{os.getpid()}\n".encode())
+        self._fd = fd
+        return True
+
+    def release(self) -> None:
+        if self._fd is None:
+            return
+        if self._fd >= 0:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+        self._fd = None
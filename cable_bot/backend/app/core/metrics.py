@@ -0,0 +1,259 @@
+# backend/app/core/metrics.py
+"""
+轻量指标 (Prometheus 文本格式)
+
+- 计数器 / 仪表 / 直方图，按标签分组，抓取时渲染成 /metrics 文本
+- ASGI 中间件按路由模板记录请求耗时 (用模板而不是原始路径，标签数量有上限)
+- timed() 给热路径内部的各阶段计时 (选型、断路器、序列化、数据库查询)
+- track_job() 记录定时任务耗时与成败
+不依赖 prometheus_client；记录一次观测只是一次二分 + 几次加法。
+"""
+import functools
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Tuple
+
+# 默认耗时分桶 (秒)
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Tuple[str, ...], values: Tuple, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Metric:
+    type_name = "untyped"
+
+    def __init__(self, name: str, help_text: str, label_names: Iterable[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(label_names)
+        self._lock = threading.Lock()
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type_name}"] + self._samples()
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple, float] = {}
+
+    def inc(self, *label_values, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0.0) + amount
+
+    def _samples(self) -> List[str]:
+        return [f"{self.name}{_labels(self.label_names, k)} {v}" for k, v in sorted(self._values.items())]
+
+
+class Gauge(Counter):
+    type_name = "gauge"
+
+    def set(self, *label_values, value: float) -> None:
+        with self._lock:
+            self._values[label_values] = value
+
+
+class CallbackGauge(_Metric):
+    """抓取时才取值的仪表 (缓存统计、熔断器状态等已有的状态)"""
+    type_name = "gauge"
+
+    def __init__(self, name: str, help_text: str, label_names: Iterable[str],
+                 callback: Callable[[], Iterable[Tuple[Tuple, float]]], type_name: str = "gauge"):
+        super().__init__(name, help_text, label_names)
+        self.callback = callback
+        self.type_name = type_name
+
+    def _samples(self) -> List[str]:
+        try:
+            items = list(self.callback())
+        except Exception:
+            return []
+        return [f"{self.name}{_labels(self.label_names, k)} {v}" for k, v in items]
+
+
+class Histogram(_Metric):
+    type_name = "histogram"
+
+    def __init__(self, name: str, help_text: str, label_names: Iterable[str] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, help_text, label_names)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Tuple, list] = {}  # labels -> [各桶计数..., +Inf 计数, 总和]
+
+    def observe(self, value: float, *label_values) -> None:
+        idx = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[idx] += 1
+            series[-1] += value
+
+    def _samples(self) -> List[str]:
+        lines = []
+        for key, series in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                le = 'le="%s"' % bound
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, key, le)} {cumulative}")
+            cumulative += series[len(self.buckets)]
+            le = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{_labels(self.label_names, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, key)} {series[-1]}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, key)} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.setdefault(metric.name, metric)
+        return self._metrics[metric.name]
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+# --- 核心指标 ---
+REQUEST_LATENCY = registry.register(Histogram(
+    "webcable_http_request_duration_seconds", "HTTP request latency by route template", ("method", "route", "status")
+))
+REQUESTS_IN_FLIGHT = registry.register(Gauge(
+    "webcable_http_requests_in_flight", "HTTP requests currently being served"
+))
+STAGE_LATENCY = registry.register(Histogram(
+    "webcable_stage_duration_seconds", "Time spent in internal hot-path stages", ("stage",)
+))
+DB_QUERY_LATENCY = registry.register(Histogram(
+    "webcable_db_query_duration_seconds", "Database statement execution time", ("operation",)
+))
+JOB_LATENCY = registry.register(Histogram(
+    "webcable_job_duration_seconds", "Scheduler job duration", ("job",)
+))
+JOB_RUNS = registry.register(Counter(
+    "webcable_job_runs_total", "Scheduler job runs by outcome", ("job", "status")
+))
+JOB_LAST_SUCCESS = registry.register(Gauge(
+    "webcable_job_last_success_timestamp_seconds", "Unix time of the last successful job run", ("job",)
+))
+
+
+@contextmanager
+def timed(stage: str):
+    """给一段代码计时，记入 webcable_stage_duration_seconds{stage=...}"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_LATENCY.observe(time.perf_counter() - start, stage)
+
+
+def track_job(name: str):
+    """异步定时任务装饰器: 记录耗时与成败；异常在这里记录并吞掉，不影响调度器"""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                result = await func(*args, **kwargs)
+            except Exception as e:
+                JOB_RUNS.inc(name, "failure")
+                print(f"❌ 定时任务 {name} 失败: {type(e).__name__}: {e}")
+                return None
+            finally:
+                JOB_LATENCY.observe(time.perf_counter() - start, name)
+            JOB_RUNS.inc(name, "success")
+            JOB_LAST_SUCCESS.set(name, value=time.time())
+            return result
+        return wrapper
+    return decorator
+
+
+def instrument_engine(sync_engine) -> None:
+    """给 SQLAlchemy 引擎挂上语句计时 (异步引擎传入其 sync_engine)"""
+    from sqlalchemy import event
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("_metrics_start", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get("_metrics_start")
+        if starts:
+            operation = statement.lstrip().split(None, 1)[0].lower() if statement else "unknown"
+            DB_QUERY_LATENCY.observe(time.perf_counter() - starts.pop(), operation)
+
+
+class MetricsMiddleware:
+    """纯 ASGI 中间件: 按 (方法, 路由模板, 状态码) 记录请求耗时
+    streaming_paths 是长连接推送接口: 只记耗时，不计入进行中请求数，也不触发慢请求采样"""
+
+    def __init__(self, app, profiler=None, streaming_paths: Iterable[str] = ()):
+        self.app = app
+        self.profiler = profiler
+        self.streaming_paths = frozenset(streaming_paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_holder = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status_holder[0] = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        streaming = scope["path"] in self.streaming_paths
+        if not streaming:
+            REQUESTS_IN_FLIGHT.inc(amount=1)
+        token = self.profiler.request_started() if self.profiler and not streaming else None
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            if not streaming:
+                REQUESTS_IN_FLIGHT.inc(amount=-1)
+            route = scope.get("route")
+            # 未匹配的路径统一记为 unmatched，避免扫描器把标签数量撑爆
+            route_path = getattr(route, "path", None) or "unmatched"
+            REQUEST_LATENCY.observe(elapsed, scope["method"], route_path, str(status_holder[0]))
+            if token is not None:
+                self.profiler.request_finished(token, elapsed, f"{scope['method']} {route_path}")
+
+
+def render() -> str:
+    return registry.render()
+
+
+def register_callback(name: str, help_text: str, label_names: Iterable[str],
+                      callback: Callable[[], Iterable[Tuple[Tuple, float]]],
+                      type_name: str = "gauge") -> None:
+    registry.register(CallbackGauge(name, help_text, label_names, callback, type_name))
@@ -0,0 +1,76 @@
+# backend/app/core/profiler.py
+"""
+慢请求采样分析 (默认关闭，设置 SLOW_REQUEST_PROFILE_MS 开启)
+
+后台线程每隔 interval 秒对事件循环线程的调用栈采样一次 (仅在有请求进行中时)，
+样本放进有界环形缓冲区。请求结束时若耗时超过阈值，把该请求时间窗内的样本
+按 collapsed 格式 (flamegraph.pl / speedscope 可直接读取) 写入 PROFILE_DIR。
+注意: 同一事件循环上并发的其它请求也会出现在时间窗里。
+"""
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter, deque
+from typing import Optional
+
+
+class SlowRequestProfiler:
+
+    def __init__(self, threshold_ms: float, output_dir: str, interval: float = 0.005, max_samples: int = 20000):
+        self.threshold = threshold_ms / 1000.0
+        self.output_dir = output_dir
+        self.interval = interval
+        self._samples: deque = deque(maxlen=max_samples)  # (时间, 折叠后的调用栈)
+        self._active = 0
+        self._target_thread: Optional[int] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    # --- 采样线程 ---
+    def start(self) -> None:
+        if self._thread is None:
+            os.makedirs(self.output_dir, exist_ok=True)
+            self._thread = threading.Thread(target=self._run, name="slow-request-profiler", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            if self._active <= 0 or self._target_thread is None:
+                continue
+            frame = sys._current_frames().get(self._target_thread)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            self._samples.append((time.perf_counter(), ";".join(reversed(stack))))
+
+    # --- 中间件回调 (在事件循环线程上调用) ---
+    def request_started(self) -> float:
+        self._target_thread = threading.get_ident()
+        self._active += 1
+        return time.perf_counter()
+
+    def request_finished(self, started: float, elapsed: float, label: str) -> None:
+        self._active -= 1
+        if elapsed < self.threshold:
+            return
+        end = started + elapsed
+        stacks = Counter(stack for ts, stack in list(self._samples) if started <= ts <= end)
+        if not stacks:
+            return
+        safe_label = re.sub(r"[^A-Za-z0-9_.-]+", "_", label).strip("_")
+        filename = f"{time.strftime('%Y%m%d-%H%M%S')}_{int(elapsed * 1000)}ms_{safe_label}.folded"
+        try:
+            with open(os.path.join(self.output_dir, filename), "w", encoding="utf-8") as f:
+                for stack, count in stacks.most_common():
+                    f.write(f"{stack} {count}\n")
+        except OSError:
+            pass
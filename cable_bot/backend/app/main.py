@@ -1,154 +1,254 @@
 # backend/app/main.py
-import math
-import random
-import requests
-import urllib3
+import time
+_IMPORT_STARTED = time.perf_counter()
+
+import asyncio
+import json
+import os
 from datetime import datetime, timedelta
-from fastapi import FastAPI, HTTPException, Depends
+from typing import Literal, Optional
+from fastapi import FastAPI, HTTPException, Depends, Request, Response, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from sqlalchemy import select
 from sqlalchemy.orm import Session
-import uvicorn
-from contextlib import asynccontextmanager
-from apscheduler.schedulers.background import BackgroundScheduler
+from contextlib import aclosing, asynccontextmanager
+
+from app.core import admission, config, metrics
+from app.core.admin import require_admin
+from app.core.leader import LeaderLock
+from app.core.profiler import SlowRequestProfiler
 
 # 引入数据库依赖
-from app.models.database import engine, Base, get_db, SessionLocal
-from app.models.tables import CableSpec, CopperPrice
-from app.models.schemas import CableCalcRequest, CableCalcResponse, AntiFakeRequest, AntiFakeResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.database import async_engine, Base, get_async_db, AsyncSessionLocal
+from app.models.tables import CatalogVersion, CopperPrice
+from app.models.schemas import (
+    CableCalcRequest, CableCalcResponse, CableBatchRequest, CableBatchResponse,
+    AntiFakeRequest, AntiFakeResponse, AntiFakeLotRequest, AntiFakeLotResponse, PanelRequest, PanelResponse,
+    FeederTreeRequest, FeederTreeResponse, FeederLoadPatch, FeederPatchResponse
+)
 from app.services.calc_logic import ElectricalCalculator
+from app.services import spec_catalog, batch_sizing, bulk_import, result_cache
+from app.services.price_sources import price_fetcher
+from app.services import price_snapshot, price_stream, price_history, derating, panel_optimizer, offline_table, anti_fake, feeder_tree
 
-# 🔇 禁用 SSL 警告 (为了在网络不佳时能强制连接国内源)
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+# --- 定时任务 ---
+def store_copper_price(db: Session, data: dict):
+    new_record = CopperPrice(
+        price_cny=data["CNY"]["price"],
+        price_usd=data["USD"]["price"],
+        exchange_rate=data["exchange_rate"],
+        source=data["USD"]["source"] if "Yahoo" in data["USD"]["source"] else data["CNY"]["source"]
+    )
+    db.add(new_record)
+    db.flush()
+    # 同一事务里累加进 OHLC 汇总桶，原始记录与汇总始终一致
+    price_history.apply_sample(db, new_record)
+    db.commit()
+    # 写入后立即生成接口快照，之后的请求不再查库
+    price_snapshot.refresh_snapshot(db)
 
-# --- 核心功能：获取实时铜价 (国际优化版) ---
-def get_realtime_copper_prices():
-    """
-    策略：Yahoo财经 (全球节点, 速度快) -> 东方财富 (国内备用) -> 模拟兜底
-    """
-    print(f"🕷️ [{datetime.now().strftime('%H:%M:%S')}] 正在获取铜价...", end=" ")
-    
-    result = {
-        "CNY": {"price": 0.0, "symbol": "¥", "source": "Failed"},
-        "USD": {"price": 0.0, "symbol": "$", "source": "Failed"},
-        "exchange_rate": 7.25,
-        "updated": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    }
+# 失败由 track_job 记录；会话关闭时未提交的事务自动回滚
+@metrics.track_job("fetch_copper_price")
+async def job_fetch_copper_price():
+    data = await price_fetcher.fetch()
+    async with AsyncSessionLocal() as db:
+        await db.run_sync(store_copper_price, data)
+    # 新快照推给所有实时连接 (同一记录只推一次)
+    price_stream.hub.publish(price_snapshot.get_snapshot())
 
-    # 1. 获取汇率 (USD -> CNY)
-    try:
-        headers = {"User-Agent": "Mozilla/5.0"}
-        rate_resp = requests.get("https://api.exchangerate-api.com/v4/latest/USD", headers=headers, timeout=5)
-        if rate_resp.status_code == 200:
-            result["exchange_rate"] = rate_resp.json().get("rates", {}).get("CNY", 7.25)
-    except: pass
+@metrics.track_job("compact_price_history")
+async def job_compact_price_history():
+    """按保留策略清理过期的原始价格和 1h 汇总"""
+    async with AsyncSessionLocal() as db:
+        await db.run_sync(price_history.compact_history)
 
-    usd_price = 0.0
-    
-    # ==============================
-    # 🌍 源 1: Yahoo Finance (全球最快, 推荐)
-    # ==============================
-    try:
-        # HG=F 是铜期货 (Copper Futures), 单位通常是 USD/Lbs (磅)
-        # 1 吨 = 2204.62 磅
-        yahoo_url = "https://query1.finance.yahoo.com/v8/finance/chart/HG=F?interval=1d&range=1d"
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-        }
-        resp = requests.get(yahoo_url, headers=headers, timeout=10) # 10秒超时
-        
-        if resp.status_code == 200:
-            data = resp.json()
-            meta = data['chart']['result'][0]['meta']
-            current_price_lbs = meta['regularMarketPrice'] # 美元/磅
-            
-            if current_price_lbs > 0:
-                # 换算为 美元/吨
-                usd_price = current_price_lbs * 2204.62
-                result["USD"]["source"] = "Yahoo Finance (Global)"
-                result["CNY"]["source"] = "Calculated"
-                print(f"✅ Yahoo成功: ${usd_price:.2f}", end=" ")
-    except Exception as e:
-        print(f"[Yahoo失败] ", end="")
-
-    # ==============================
-    # 🇨🇳 源 2: 东方财富 (如果Yahoo失败)
-    # ==============================
-    if usd_price == 0:
-        try:
-            # 增加 verify=False 忽略证书错误，增加 timeout=15 防止断连
-            em_url = "https://push2.eastmoney.com/api/qt/stock/get?secid=113.cu00&fields=f43"
-            headers = {"User-Agent": "Mozilla/5.0", "Referer": "https://quote.eastmoney.com/"}
-            
-            resp = requests.get(em_url, headers=headers, timeout=15, verify=False)
-            
-            if resp.status_code == 200:
-                data = resp.json()
-                if data.get("data") and data["data"].get("f43"):
-                    cny_val = float(data["data"]["f43"])
-                    if cny_val > 0:
-                        usd_price = cny_val / result["exchange_rate"]
-                        result["CNY"]["price"] = cny_val
-                        result["CNY"]["source"] = "东方财富 (EastMoney)"
-                        result["USD"]["source"] = "Calculated"
-                        print(f"✅ 东财成功: ¥{cny_val}", end=" ")
-        except Exception as e:
-            print(f"[东财超时] ", end="")
-
-    # --- 结算与兜底 ---
-    if usd_price > 0:
-        # 如果是从 Yahoo 拿的美元，算回人民币
-        if result["CNY"]["price"] == 0:
-            result["CNY"]["price"] = round(usd_price * result["exchange_rate"], 2)
-        # 如果是从东财拿的人民币，算回美元
-        if result["USD"]["price"] == 0:
-            result["USD"]["price"] = round(usd_price, 2)
-            
-        print("-> 完成")
-    else:
-        print("❌ 全部失败 -> 启用模拟")
-        usd_price = 9400.0 + random.randint(-50, 50)
-        result["USD"]["price"] = round(usd_price, 2)
-        result["CNY"]["price"] = round(usd_price * result["exchange_rate"], 2)
-        result["USD"]["source"] = "Simulated (Fallback)"
-        result["CNY"]["source"] = "Simulated (Fallback)"
+@metrics.track_job("watch_spec_catalog")
+async def job_watch_spec_catalog():
+    """规格导入工具写入新版本后热替换内存目录"""
+    async with AsyncSessionLocal() as db:
+        await db.run_sync(spec_catalog.reload_if_new_version)
 
-    return result
+@metrics.track_job("sync_price_snapshot")
+async def job_sync_price_snapshot():
+    """leader 写入新价格后刷新本 worker 的接口快照"""
+    async with AsyncSessionLocal() as db:
+        snapshot = await db.run_sync(price_snapshot.refresh_if_stale)
+    price_stream.hub.publish(snapshot)
 
-# --- 定时任务 ---
-def job_fetch_copper_price():
-    data = get_realtime_copper_prices()
-    db = SessionLocal()
-    try:
-        new_record = CopperPrice(
-            price_cny=data["CNY"]["price"],
-            price_usd=data["USD"]["price"],
-            exchange_rate=data["exchange_rate"],
-            source=data["USD"]["source"] if "Yahoo" in data["USD"]["source"] else data["CNY"]["source"]
-        )
-        db.add(new_record)
-        db.commit()
-    except Exception: pass
-    finally: db.close()
+_refresh_task = None
+
+def trigger_price_refresh():
+    """后台抓取一次铜价 (同一时间只跑一个)"""
+    global _refresh_task
+    if _refresh_task is None or _refresh_task.done():
+        _refresh_task = asyncio.create_task(job_fetch_copper_price())
+    return _refresh_task
+
+# --- 观测 ---
+class TimedJSONResponse(JSONResponse):
+    """默认响应类: 记录 JSON 序列化耗时"""
+    def render(self, content) -> bytes:
+        with metrics.timed("response_serialization"):
+            return super().render(content)
+
+# 慢请求采样分析默认关闭 (SLOW_REQUEST_PROFILE_MS > 0 时开启)
+profiler = SlowRequestProfiler(config.SLOW_REQUEST_PROFILE_MS, config.PROFILE_DIR) if config.SLOW_REQUEST_PROFILE_MS > 0 else None
+
+def _cache_samples():
+    for name, stats in result_cache.all_stats().items():
+        for field in ("hits", "misses", "evictions", "size"):
+            yield (name, field), stats[field]
+
+_BREAKER_STATES = ("closed", "half_open", "open")
+
+def _breaker_samples():
+    for source, health in price_fetcher.health().items():
+        for state in _BREAKER_STATES:
+            yield (source, state), 1 if health["state"] == state else 0
+
+metrics.register_callback("webcable_cache_stats", "Result cache hits, misses, evictions and size", ("cache", "field"), _cache_samples)
+metrics.register_callback("webcable_price_source_state", "Price source circuit breaker state (1 = current)", ("source", "state"), _breaker_samples)
+metrics.register_callback(
+    "webcable_price_source_consecutive_failures", "Consecutive failures per price source", ("source",),
+    lambda: (((source, ), h["consecutive_failures"]) for source, h in price_fetcher.health().items())
+)
+metrics.register_callback(
+    "webcable_price_stream_subscribers", "Open live price stream connections (SSE + WebSocket)", (),
+    lambda: [((), price_stream.hub.subscribers)]
+)
+metrics.register_callback(
+    "webcable_price_stream_published_total", "Price snapshots broadcast to live streams", (),
+    lambda: [((), price_stream.hub.published)], type_name="counter"
+)
+def _admission_samples():
+    for name, rc in admission.controller.classes.items():
+        for outcome in ("admitted", "throttled", "shed", "timed_out"):
+            yield (name, outcome), getattr(rc, outcome)
+
+metrics.register_callback("webcable_admission_requests_total", "Admission decisions by route class and outcome",
+                          ("class", "outcome"), _admission_samples, type_name="counter")
+metrics.register_callback(
+    "webcable_admission_active", "Requests holding a concurrency slot per route class", ("class",),
+    lambda: (((name, ), rc.active) for name, rc in admission.controller.classes.items())
+)
+metrics.register_callback(
+    "webcable_admission_waiting", "Requests queued for a concurrency slot per route class", ("class",),
+    lambda: (((name, ), rc.waiting) for name, rc in admission.controller.classes.items())
+)
+metrics.register_callback(
+    "webcable_admission_clients", "Clients with live token bucket state", (),
+    lambda: [((), len(admission.controller.buckets))]
+)
+metrics.register_callback(
+    "webcable_catalog_rows", "Cable specs loaded in the in-memory catalog", (),
+    lambda: [((), spec_catalog.get_catalog().row_count)]
+)
+
+# --- 定时任务 leader (多 worker 部署时只有一个 worker 抓价写库) ---
+leader = LeaderLock(config.SCHEDULER_LOCK_FILE)
+
+metrics.register_callback(
+    "webcable_scheduler_leader", "1 if this worker runs the singleton scheduler jobs", (),
+    lambda: [((), 1 if leader.is_leader else 0)]
+)
+
+async def become_leader(scheduler) -> bool:
+    """尝试成为 leader；成功则挂上只能单实例运行的任务"""
+    if not leader.try_acquire():
+        return False
+    print(f"👑 worker {os.getpid()} 成为定时任务 leader")
+    scheduler.add_job(job_fetch_copper_price, 'interval', hours=1)
+    scheduler.add_job(job_compact_price_history, 'interval', days=1)
+
+    async with AsyncSessionLocal() as db:
+        latest = await db.scalar(select(CopperPrice.timestamp).order_by(CopperPrice.timestamp.desc()).limit(1))
+        if latest is not None:
+            # 老库升级: 汇总表为空时用现有原始记录回填一次
+            await db.run_sync(price_history.backfill_rollups)
+    if latest is None:
+        # 空库: 首次抓取放到后台，不阻塞启动 (接口在此期间返回 pending)
+        trigger_price_refresh()
+    elif datetime.now() - latest > timedelta(hours=1):
+        # 接手时上一个 leader 可能已经错过了整点抓取
+        trigger_price_refresh()
+    return True
+
+@metrics.track_job("elect_leader")
+async def job_elect_leader(scheduler):
+    if await become_leader(scheduler):
+        scheduler.remove_job("elect_leader")
 
 # --- 生命周期 ---
+# 启动各阶段耗时 (秒)，启动完成时打印一次并通过 /metrics 暴露，方便发现启动变慢
+startup_timings = {"import": time.perf_counter() - _IMPORT_STARTED}
+
+metrics.register_callback(
+    "webcable_startup_seconds", "Time spent in each startup phase of this worker", ("phase",),
+    lambda: (((phase, ), round(seconds, 6)) for phase, seconds in startup_timings.items())
+)
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    Base.metadata.create_all(bind=engine)
-    scheduler = BackgroundScheduler()
-    scheduler.add_job(job_fetch_copper_price, 'interval', hours=1)
+    started = time.perf_counter()
+    mark = started
+
+    def lap(phase: str):
+        nonlocal mark
+        now = time.perf_counter()
+        startup_timings[phase] = now - mark
+        mark = now
+
+    async with async_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    lap("create_tables")
+    
+    # 规格目录一次性载入内存，选型不再查库
+    async with AsyncSessionLocal() as db:
+        await db.run_sync(spec_catalog.load_catalog)
+        lap("load_catalog")
+        price_stream.hub.publish(await db.run_sync(price_snapshot.refresh_snapshot))
+        lap("price_snapshot")
+    
+    # 定时任务跑在应用自己的事件循环上 (抓取是异步的，不占线程)
+    # 每个 worker 都要: 同步规格目录和铜价快照；抓价 / 清理只在 leader 上
+    # APScheduler 导入较慢，放到启动时再导入；抓价的 HTTP 连接池在第一次抓取时才建
+    from apscheduler.schedulers.asyncio import AsyncIOScheduler
+    scheduler = AsyncIOScheduler()
+    scheduler.add_job(job_watch_spec_catalog, 'interval', seconds=config.CATALOG_WATCH_SECONDS)
+    scheduler.add_job(job_sync_price_snapshot, 'interval', seconds=config.PRICE_SYNC_SECONDS)
     scheduler.start()
+    if profiler:
+        profiler.start()
+    lap("scheduler")
     
-    # 初次启动立即执行
-    db = SessionLocal()
-    if db.query(CopperPrice).count() == 0:
-        job_fetch_copper_price()
-    db.close()
+    if not await become_leader(scheduler):
+        scheduler.add_job(job_elect_leader, 'interval', seconds=config.LEADER_RETRY_SECONDS,
+                          args=[scheduler], id="elect_leader")
+    lap("leader_election")
+    startup_timings["total"] = startup_timings["import"] + (time.perf_counter() - started)
+    print("⏱️ 启动耗时 " + ", ".join(f"{phase} {seconds * 1000:.0f}ms" for phase, seconds in startup_timings.items()))
     
     yield
     scheduler.shutdown()
+    leader.release()
+    if profiler:
+        profiler.stop()
+    await price_fetcher.close()
+    await async_engine.dispose()
+
+# 铜价实时推送 (长连接)
+COPPER_STREAM_PATH = "/api/v1/market/copper/stream"
+COPPER_WS_PATH = "/api/v1/market/copper/ws"
 
-app = FastAPI(title="WebCable API", lifespan=lifespan)
+app = FastAPI(title="WebCable API", lifespan=lifespan, default_response_class=TimedJSONResponse)
 
+# 规格目录一旦替换，所有基于旧规格的缓存结果立即作废
+spec_catalog.add_reload_listener(result_cache.clear_all)
+
+# 准入控制在 CORS 之内: 429 / 503 也带 CORS 头，预检请求不计入限速
+app.add_middleware(admission.AdmissionMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -156,6 +256,8 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# 最外层: 覆盖包括 CORS 在内的整条链路
+app.add_middleware(metrics.MetricsMiddleware, profiler=profiler, streaming_paths=(COPPER_STREAM_PATH, COPPER_WS_PATH))
 
 # 🛠️ 修复日志报错：屏蔽 /c_hello 请求
 @app.get("/c_hello")
@@ -168,68 +270,119 @@ async def root():
 
 # --- 业务接口 ---
 @app.get("/api/v1/market/copper")
-async def get_copper_price_api(db: Session = Depends(get_db)):
-    latest = db.query(CopperPrice).order_by(CopperPrice.timestamp.desc()).first()
-    if not latest:
-        # 数据库空，临时抓取
-        data = get_realtime_copper_prices()
-        return {
-            "CNY": data["CNY"], "USD": data["USD"], 
-            "trends": {"hourly_change_percent": 0, "daily_change_percent": 0},
-            "updated_at": data["updated"]
-        }
-
-    now = datetime.now()
-    record_1h = db.query(CopperPrice).filter(CopperPrice.timestamp <= now - timedelta(hours=1)).order_by(CopperPrice.timestamp.desc()).first()
-    record_24h = db.query(CopperPrice).filter(CopperPrice.timestamp <= now - timedelta(days=1)).order_by(CopperPrice.timestamp.desc()).first()
-
-    def calc_change(current, old_record):
-        if not old_record or old_record.price_usd == 0: return 0.0
-        return round(((current - old_record.price_usd) / old_record.price_usd) * 100, 2)
+async def get_copper_price_api(request: Request):
+    snapshot = price_snapshot.get_snapshot()
+    if snapshot is None:
+        # 数据库空 (首次抓取还在后台进行): 请求里不做抓取，只在后台触发一次 (仅 leader)，
+        # 返回 status=pending 和最近一次抓取结果 (或模拟兜底)，Retry-After 提示客户端稍后重取
+        if leader.is_leader:
+            trigger_price_refresh()
+        data = price_fetcher.last_result or price_fetcher.fallback_quote()
+        return JSONResponse(
+            {
+                "status": "pending",
+                "CNY": data["CNY"], "USD": data["USD"],
+                "trends": {"hourly_change_percent": 0, "daily_change_percent": 0},
+                "updated_at": data["updated"]
+            },
+            headers={"Retry-After": str(config.PRICE_PENDING_RETRY_SECONDS), "Cache-Control": "no-store"}
+        )
 
-    return {
-        "CNY": {"price": round(latest.price_cny, 2), "symbol": "¥", "source": "Calculated" if "Yahoo" in latest.source else latest.source},
-        "USD": {"price": round(latest.price_usd, 2), "symbol": "$", "source": latest.source},
-        "exchange_rate": latest.exchange_rate,
-        "trends": {
-            "hourly_change_percent": calc_change(latest.price_usd, record_1h),
-            "daily_change_percent": calc_change(latest.price_usd, record_24h)
-        },
-        "updated_at": latest.timestamp.strftime("%Y-%m-%d %H:%M:%S")
-    }
+    # 快照由定时任务预先生成，这里零查库；条件请求命中直接 304
+    if snapshot.is_not_modified(request.headers.get("if-none-match"), request.headers.get("if-modified-since")):
+        return Response(status_code=304, headers=snapshot.headers)
+    return Response(content=snapshot.body, media_type="application/json", headers=snapshot.headers)
+
+def _stream_full_error() -> HTTPException:
+    return HTTPException(
+        status_code=503, detail=f"实时推送连接数已达上限 ({price_stream.hub.max_subscribers})，请改用轮询",
+        headers={"Retry-After": str(price_stream.RECONNECT_MS // 1000)}
+    )
+
+@app.get(COPPER_STREAM_PATH)
+async def stream_copper_price(request: Request, last_event_id: Optional[str] = None):
+    """
+    SSE 实时铜价: 连接后立即推送当前快照，之后每次更新推一次 (event: price，data 与 /api/v1/market/copper 相同)。
+    浏览器 EventSource 重连时自动带 Last-Event-ID 头；不支持自定义头的客户端可用 ?last_event_id=
+    """
+    events = price_stream.hub.subscribe(request.headers.get("last-event-id") or last_event_id)
+    if events is None:
+        raise _stream_full_error()
+    return StreamingResponse(
+        price_stream.sse_stream(events), media_type="text/event-stream",
+        # 禁止 nginx 等反向代理缓冲，否则事件会攒到缓冲区满才下发
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.websocket(COPPER_WS_PATH)
+async def copper_price_websocket(websocket: WebSocket, last_event_id: Optional[str] = None):
+    """WebSocket 版实时铜价 (消息格式 {"event": "price", "id": ..., "data": {...}} / {"event": "heartbeat"})"""
+    events = price_stream.hub.subscribe(last_event_id)
+    if events is None:
+        await websocket.close(code=1013)  # Try Again Later
+        return
+    try:
+        async with aclosing(events):
+            await websocket.accept()
+            async for event in events:
+                await websocket.send_text(price_stream.WS_HEARTBEAT if event is None else event.ws)
+    except WebSocketDisconnect:
+        pass
+
+@app.get("/api/v1/market/copper/history")
+async def get_copper_price_history(
+    interval: Literal["1h", "1d", "1w"] = "1d",
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    currency: Literal["usd", "cny"] = "usd",
+    db: AsyncSession = Depends(get_async_db)
+):
+    """铜价 OHLC 历史 (只读汇总表)"""
+    if start and end and start > end:
+        raise HTTPException(status_code=400, detail="start 不能晚于 end")
+    return await db.run_sync(price_history.query_history, interval, start, end, currency)
 
 @app.post("/api/v1/calculate/sizing", response_model=CableCalcResponse)
-@app.post("/api/v1/calculate/sizing", response_model=CableCalcResponse)
-async def calculate_cable_sizing(request: CableCalcRequest, db: Session = Depends(get_db)):
+async def calculate_cable_sizing(request: CableCalcRequest):
     # 1. 计算负载电流
     amps = ElectricalCalculator.calculate_current(
         request.power, request.power_unit, request.voltage_type
     )
     
-    # 2. 智能选型 (传入所有环境参数)
-    selection = ElectricalCalculator.smart_select_cable(
-        db, 
-        current=amps, 
-        material=request.material, 
-        cable_type=request.cable_type,
-        distance=request.distance,
-        voltage=request.voltage_type,
-        max_drop=request.max_voltage_drop,
-        ambient_temp=request.temperature
-    )
+    # 2. 综合降容 (温度 × 并列 × 土壤 × 谐波)，超出降容表范围直接 422
+    try:
+        factors = derating.derating_breakdown(
+            request.cable_type, request.temperature, request.derating_mode, request.installation,
+            request.circuits_grouped, request.soil_resistivity, request.harmonics_percent,
+            three_phase=request.voltage_type == "380v", soil_temperature=request.soil_temperature
+        )
+    except derating.DeratingError as e:
+        raise HTTPException(status_code=422, detail=str(e))
     
-    # 3. 推荐断路器 (MCB)
-    # 规则: IB < In < Iz (负载电流 < 开关 < 电缆修正后载流量)
-    mcb_val = math.ceil(amps * 1.2)
-    standard_mcb = [6, 10, 16, 20, 25, 32, 40, 50, 63, 80, 100, 125, 160, 200, 250, 400]
-    final_mcb = next((x for x in standard_mcb if x >= mcb_val), mcb_val)
+    # 3. 智能选型 (传入所有环境参数，相同输入直接命中缓存)
+    catalog = await spec_catalog.reload_if_changed(AsyncSessionLocal)
+    cache_key = result_cache.sizing_key(
+        catalog.version, amps, request.material, request.cable_type, request.distance,
+        request.voltage_type, request.max_voltage_drop, request.temperature, tuple(factors.values())
+    )
+    def select():
+        with metrics.timed("smart_select_cable"):
+            return ElectricalCalculator.smart_select_cable(
+                catalog, 
+                current=amps, 
+                material=request.material, 
+                cable_type=request.cable_type,
+                distance=request.distance,
+                voltage=request.voltage_type,
+                max_drop=request.max_voltage_drop,
+                ambient_temp=request.temperature,
+                derating_factors=factors
+            )
+    selection = result_cache.sizing_cache.get_or_compute(cache_key, select)
     
-    # 简单的安全检查: 选的开关不能大于电缆的实际载流量
-    safe_limit = selection["safe_ampacity"]
-    if safe_limit > 0 and final_mcb > safe_limit:
-        mcb_msg = f"{final_mcb}A (⚠️注意: 接近电缆极限 {safe_limit}A)"
-    else:
-        mcb_msg = f"{final_mcb}A"
+    # 4. 推荐断路器 (MCB)
+    with metrics.timed("mcb_lookup"):
+        mcb_msg = ElectricalCalculator.recommend_mcb(amps, selection["safe_ampacity"])
     
     return CableCalcResponse(
         current_amps=amps,
@@ -237,15 +390,216 @@ async def calculate_cable_sizing(request: CableCalcRequest, db: Session = Depend
         voltage_drop_percent=selection["drop"],
         mcb_rating=mcb_msg,
         selection_reason=selection["reason"],
-        safe_ampacity=selection["safe_ampacity"]
+        safe_ampacity=selection["safe_ampacity"],
+        derating=selection["derating"]
     )
 
+@app.post("/api/v1/calculate/sizing/offline", response_model=CableCalcResponse)
+async def calculate_cable_sizing_offline(request: CableCalcRequest):
+    """与离线客户端相同的查表选型 (O(1)，电流 / 距离向上取到网格点，结果只会偏大)"""
+    if (request.installation, request.circuits_grouped, request.harmonics_percent, request.derating_mode) != ("conduit", 1, 0, "step") \
+            or request.temperature is None or request.max_voltage_drop is None:
+        raise HTTPException(status_code=422, detail="离线表只覆盖默认敷设条件，请使用 /api/v1/calculate/sizing")
+    amps = ElectricalCalculator.calculate_current(request.power, request.power_unit, request.voltage_type)
+    table = offline_table.get_table(await spec_catalog.reload_if_changed(AsyncSessionLocal))
+    selection = table.lookup(
+        amps, request.material, request.cable_type, request.distance,
+        request.voltage_type, request.max_voltage_drop, request.temperature
+    )
+    if selection is None:
+        raise HTTPException(status_code=422, detail="参数超出离线表范围，请使用 /api/v1/calculate/sizing")
+    return CableCalcResponse(
+        current_amps=amps,
+        recommended_size=selection["size"],
+        voltage_drop_percent=selection["drop"],
+        mcb_rating=ElectricalCalculator.recommend_mcb(amps, selection["safe_ampacity"]),
+        selection_reason=selection["reason"],
+        safe_ampacity=selection["safe_ampacity"],
+        derating=selection["derating"]
+    )
+
+@app.get("/api/v1/sizing-table")
+async def get_sizing_table_manifest():
+    """离线查找表清单: 客户端比对版本，变化时再下载二进制"""
+    table = offline_table.get_table(await spec_catalog.reload_if_changed(AsyncSessionLocal))
+    return Response(
+        content=json.dumps({
+            "version": table.catalog_version,
+            "format": offline_table.FORMAT_VERSION,
+            "size_bytes": len(table.binary),
+            "generated_at": table.generated_at.strftime("%Y-%m-%d %H:%M:%S"),
+            "url": f"/api/v1/sizing-table/{table.catalog_version}"
+        }),
+        media_type="application/json",
+        headers={"Cache-Control": "no-cache"}
+    )
+
+@app.get("/api/v1/sizing-table/{version}")
+async def get_sizing_table(version: str, request: Request):
+    """按目录版本下载查找表；内容随版本固定，可永久缓存"""
+    table = offline_table.get_table(await spec_catalog.reload_if_changed(AsyncSessionLocal))
+    if version != table.catalog_version:
+        raise HTTPException(status_code=404, detail="查找表版本已过期，请重新获取 /api/v1/sizing-table")
+    headers = {"ETag": table.etag, "Cache-Control": "public, max-age=31536000, immutable"}
+    if request.headers.get("if-none-match") == table.etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=table.binary, media_type="application/octet-stream", headers=headers)
+
+@app.post("/api/v1/calculate/sizing/batch", response_model=CableBatchResponse)
+async def calculate_cable_sizing_batch(request: CableBatchRequest):
+    """整个项目的回路清单一次选型，结果按输入顺序返回"""
+    if len(request.items) > batch_sizing.MAX_BATCH_ITEMS:
+        raise HTTPException(status_code=413, detail=f"单次最多 {batch_sizing.MAX_BATCH_ITEMS} 条回路")
+    catalog = await spec_catalog.reload_if_changed(AsyncSessionLocal)
+    with metrics.timed("batch_sizing"):
+        results = batch_sizing.size_batch(catalog, request.items)
+    return {
+        "total": len(results),
+        "failed": sum(1 for r in results if not r["ok"]),
+        "results": results
+    }
+
+@app.post("/api/v1/calculate/sizing/import")
+async def import_cable_sizing(request: Request, format: Optional[Literal["csv", "ndjson"]] = None):
+    """
+    流式导入 CSV / NDJSON 回路清单，逐行返回选型结果。
+    格式优先取 ?format=，否则按 Content-Type 判断 (默认 CSV)。
+    """
+    if format is None:
+        content_type = request.headers.get("content-type", "")
+        format = "ndjson" if "ndjson" in content_type or "jsonl" in content_type else "csv"
+    fmt = bulk_import.get_format(format)
+    # 整个任务使用同一份规格目录快照
+    catalog = await spec_catalog.reload_if_changed(AsyncSessionLocal)
+    return bulk_import.DuplexStreamingResponse(
+        bulk_import.stream_sizing(catalog, request.stream(), fmt),
+        media_type=fmt.media_type
+    )
+
+@app.post("/api/v1/calculate/panel", response_model=PanelResponse)
+async def optimize_panel_sizing(request: PanelRequest):
+    """配电箱 / 项目级选型: 汇总导体用量与造价，并在材料费与线损之间优化规格"""
+    if len(request.circuits) > panel_optimizer.MAX_PANEL_CIRCUITS:
+        raise HTTPException(status_code=413, detail=f"单次最多 {panel_optimizer.MAX_PANEL_CIRCUITS} 个回路")
+    currency = request.currency.upper()
+    # 铜价优先取内存快照，没有快照时才查最新一条记录
+    snapshot = price_snapshot.get_snapshot()
+    if snapshot is not None:
+        copper_price, updated_at = snapshot.payload[currency]["price"], snapshot.payload["updated_at"]
+    else:
+        async with AsyncSessionLocal() as db:
+            latest = await db.scalar(select(CopperPrice).order_by(CopperPrice.timestamp.desc()).limit(1))
+        if latest is None:
+            raise HTTPException(status_code=503, detail="铜价数据尚未就绪，请稍后再试")
+        copper_price = latest.price_usd if currency == "USD" else latest.price_cny
+        updated_at = latest.timestamp.strftime("%Y-%m-%d %H:%M:%S")
+    
+    catalog = await spec_catalog.reload_if_changed(AsyncSessionLocal)
+    with metrics.timed("panel_optimizer"):
+        result = panel_optimizer.optimize_panel(
+            catalog, request.circuits, copper_price, request.energy_price,
+            request.operating_hours, request.years, request.max_upsize, request.budget
+        )
+    prices = panel_optimizer.material_prices(copper_price)
+    return {
+        "currency": currency,
+        "copper_price_per_ton": round(prices["cu"], 2),
+        "aluminium_price_per_ton": round(prices["al"], 2),
+        "price_updated_at": updated_at,
+        **result
+    }
+
+@app.post("/api/v1/feeder-trees", response_model=FeederTreeResponse)
+async def create_feeder_tree(request: FeederTreeRequest):
+    """提交整棵配电树: 逐段选型并计算每个节点的累计压降"""
+    catalog = await spec_catalog.reload_if_changed(AsyncSessionLocal)
+    try:
+        with metrics.timed("feeder_tree_build"):
+            tree = feeder_tree.create_tree(catalog, request)
+    except (feeder_tree.FeederTreeError, derating.DeratingError) as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return tree.result()
+
+def _get_feeder_tree(tree_id: str) -> feeder_tree.FeederTree:
+    tree = feeder_tree.get_tree(tree_id)
+    if tree is None:
+        raise HTTPException(status_code=404, detail="配电树不存在或已过期，请重新提交")
+    return tree
+
+@app.get("/api/v1/feeder-trees/{tree_id}", response_model=FeederTreeResponse)
+async def get_feeder_tree(tree_id: str):
+    return _get_feeder_tree(tree_id).result()
+
+@app.patch("/api/v1/feeder-trees/{tree_id}/loads", response_model=FeederPatchResponse)
+async def update_feeder_loads(tree_id: str, request: FeederLoadPatch):
+    """修改若干节点的负载，只重算这些节点到根的路径"""
+    tree = _get_feeder_tree(tree_id)
+    try:
+        with metrics.timed("feeder_tree_update"):
+            return feeder_tree.update_tree(tree, request.loads)
+    except feeder_tree.FeederTreeError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
 @app.post("/api/v1/check/fake", response_model=AntiFakeResponse)
-async def check_fake_cable(request: AntiFakeRequest, db: Session = Depends(get_db)):
-    result = ElectricalCalculator.check_fake(db, request.nominal_size, request.measured_weight)
-    spec = db.query(CableSpec).filter(CableSpec.size == request.nominal_size, CableSpec.insulation == 'bv', CableSpec.material == 'cu').first()
-    std_weight = spec.weight_per_100m if spec else 0.0
-    return AntiFakeResponse(is_pass=result.get("pass", False), standard_weight=std_weight, diff_percent=round(((request.measured_weight - std_weight) / std_weight) * 100, 2) if std_weight else 0, message=result["msg"], risk_level=result["risk"])
+async def check_fake_cable(request: AntiFakeRequest):
+    catalog = await spec_catalog.reload_if_changed(AsyncSessionLocal)
+    with metrics.timed("fake_check_lookup"):
+        return anti_fake.get_index(catalog).check(request)
+
+@app.post("/api/v1/check/fake/batch", response_model=AntiFakeLotResponse)
+async def check_fake_cable_lot(request: AntiFakeLotRequest):
+    """整批检测 (同一批次的多卷)，除逐卷结果外给出整批是否系统性亏方"""
+    if len(request.items) > anti_fake.MAX_LOT_ITEMS:
+        raise HTTPException(status_code=413, detail=f"单次最多 {anti_fake.MAX_LOT_ITEMS} 卷")
+    catalog = await spec_catalog.reload_if_changed(AsyncSessionLocal)
+    with metrics.timed("fake_check_lot"):
+        return anti_fake.get_index(catalog).check_lot(request.items)
+
+# --- 管理接口 ---
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def get_metrics():
+    """Prometheus 抓取入口"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.get("/api/v1/cache/stats")
+async def get_cache_stats():
+    """各结果缓存的命中 / 未命中 / 淘汰计数"""
+    return {"catalog_version": spec_catalog.get_catalog().version, "caches": result_cache.all_stats()}
+
+@app.get("/api/v1/admission/stats")
+async def get_admission_stats():
+    """准入控制计数: 各类别放行 / 限速 (429) / 过载拒绝 (503) 次数、当前并发与排队 (当前 worker)"""
+    return admission.controller.stats()
+
+@app.post("/api/v1/admin/catalog/reload", dependencies=[Depends(require_admin)])
+async def reload_spec_catalog(db: AsyncSession = Depends(get_async_db)):
+    """导入规格后手动触发规格目录重载 (spec_loader --notify 调用)"""
+    catalog = await db.run_sync(spec_catalog.load_catalog)
+    return {
+        "version": catalog.version,
+        "rows": catalog.row_count,
+        "loaded_at": catalog.loaded_at.strftime("%Y-%m-%d %H:%M:%S")
+    }
+
+@app.get("/api/v1/admin/catalog/versions", dependencies=[Depends(require_admin)])
+async def list_catalog_versions(limit: int = 20, db: AsyncSession = Depends(get_async_db)):
+    """最近的规格导入记录 (最新在前)"""
+    rows = (await db.scalars(
+        select(CatalogVersion).order_by(CatalogVersion.id.desc()).limit(max(1, min(limit, 200)))
+    )).all()
+    return {
+        "loaded_version": spec_catalog.get_catalog().version,
+        "versions": [
+            {
+                "id": r.id, "version": r.version, "label": r.label, "source": r.source,
+                "inserted": r.rows_inserted, "updated": r.rows_updated, "deleted": r.rows_deleted,
+                "rows": r.row_count, "loaded_at": r.loaded_at.strftime("%Y-%m-%d %H:%M:%S")
+            }
+            for r in rows
+        ]
+    }
 
 if __name__ == "__main__":
+    # 开发模式 (单进程 + 自动重载)；生产环境用 serve.py
+    import uvicorn
     uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
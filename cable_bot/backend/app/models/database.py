@@ -1,21 +1,64 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
-SQLALCHEMY_DATABASE_URL = "sqlite:///./cable_expert.db"
+from app.core import config, metrics
+
+SQLALCHEMY_DATABASE_URL = config.DATABASE_URL
+_IS_SQLITE = SQLALCHEMY_DATABASE_URL.startswith("sqlite")
 
 # SQLite 特有的配置: check_same_thread=False
 engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
+    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False} if _IS_SQLITE else {}
 )
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# 异步引擎 (API 请求与定时任务使用，本地默认 aiosqlite)
+async_engine = create_async_engine(
+    config.ASYNC_DATABASE_URL,
+    pool_size=config.DB_POOL_SIZE,
+    max_overflow=config.DB_MAX_OVERFLOW,
+    pool_timeout=config.DB_POOL_TIMEOUT,
+    pool_recycle=config.DB_POOL_RECYCLE,
+)
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
+
+def _set_sqlite_pragmas(dbapi_connection, _connection_record):
+    """
+    每个新连接都设置:
+    WAL 日志模式 -> 写入 (每小时的铜价任务) 不阻塞读请求
+    synchronous=NORMAL -> WAL 下仍然安全，提交不用每次 fsync
+    mmap -> 读取走内存映射，少一次内核拷贝
+    """
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA mmap_size={config.SQLITE_MMAP_SIZE}")
+    cursor.execute(f"PRAGMA busy_timeout={config.SQLITE_BUSY_TIMEOUT_MS}")
+    cursor.close()
+
+
+if _IS_SQLITE:
+    event.listen(engine, "connect", _set_sqlite_pragmas)
+if config.ASYNC_DATABASE_URL.startswith("sqlite"):
+    event.listen(async_engine.sync_engine, "connect", _set_sqlite_pragmas)
+
+# 语句级耗时 -> webcable_db_query_duration_seconds
+metrics.instrument_engine(engine)
+metrics.instrument_engine(async_engine.sync_engine)
+
 # 依赖注入 (Dependency)
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Literal, Optional
+from typing import Any, List, Literal, Optional
 
 # --- 电缆选型请求模型 (升级版) ---
 class CableCalcRequest(BaseModel):
@@ -13,6 +13,21 @@ class CableCalcRequest(BaseModel):
     # 新增高级参数
     temperature: Optional[float] = Field(40.0, description="环境温度 (默认柬埔寨 40°C)")
     max_voltage_drop: Optional[float] = Field(5.0, description="最大允许压降% (默认 5%)")
+    derating_mode: Literal["step", "interpolate"] = Field("step", description="温度降容: step 向上取档 (保守) / interpolate 线性插值")
+    
+    # 敷设条件 (综合降容)
+    installation: Literal["conduit", "tray", "buried"] = Field("conduit", description="敷设方式: 穿管 / 桥架 / 直埋 (直埋需规格库提供埋地载流量，目前会被拒绝)")
+    circuits_grouped: int = Field(1, ge=1, description="并列敷设的回路数 (含本回路)")
+    soil_resistivity: float = Field(2.5, gt=0, description="土壤热阻系数 K·m/W (仅直埋)")
+    soil_temperature: float = Field(20.0, description="土壤温度 °C (仅直埋，基准 20°C；temperature 为空气温度)")
+    harmonics_percent: float = Field(0.0, ge=0, le=100, description="三次谐波含量% (仅 380V 三相)")
+
+class DeratingBreakdown(BaseModel):
+    temperature: float
+    grouping: float
+    soil: float
+    harmonics: float
+    total: float
 
 class CableCalcResponse(BaseModel):
     current_amps: float
@@ -23,11 +38,30 @@ class CableCalcResponse(BaseModel):
     # 新增解释字段，告诉用户为什么选这么大
     selection_reason: str      # 例如: "因压降过大(6.5%)，已自动从 4mm² 升级为 6mm²"
     safe_ampacity: float       # 该电缆在当前温度下的实际载流量
+    derating: Optional[DeratingBreakdown] = None  # 各降容分项
+
+# --- 批量选型 (整个项目的回路清单) ---
+class CableBatchRequest(BaseModel):
+    # 逐条校验 (格式与 CableCalcRequest 相同)，单条不合法只在该条返回错误
+    items: List[Any] = Field(..., description="回路列表，每项同 CableCalcRequest")
+
+class CableBatchItem(BaseModel):
+    index: int                 # 在输入列表中的位置
+    ok: bool
+    result: Optional[CableCalcResponse] = None
+    error: Optional[str] = None
+
+class CableBatchResponse(BaseModel):
+    total: int
+    failed: int
+    results: List[CableBatchItem]
+
 # --- 防伪检测请求模型 ---
 class AntiFakeRequest(BaseModel):
-    nominal_size: str = Field(..., description="标称截面，如 '2.5', '4.0'")
+    nominal_size: str = Field(..., description="标称截面，如 '2.5', '4', '4.0mm²'")
     measured_weight: float = Field(..., gt=0, description="实测重量 (kg/100m)")
-    cable_type: str = Field("bv", description="默认针对家装BV线")
+    cable_type: str = Field("bv", description="绝缘类型，默认针对家装BV线")
+    material: Literal["cu", "al"] = Field("cu", description="材质: 铜/铝")
 
 # --- 防伪检测响应模型 ---
 class AntiFakeResponse(BaseModel):
@@ -35,4 +69,150 @@ class AntiFakeResponse(BaseModel):
     standard_weight: float
     diff_percent: float
     message: str
-    risk_level: Literal["safe", "warning", "danger"]
\ No newline at end of file
+    risk_level: Literal["safe", "warning", "danger"]
+    confidence: float = 0.0                 # 正品称出这么轻或更轻的概率 (0~1)
+    matched_size: Optional[str] = None      # 命中的规格库规格
+    weight_source: Optional[Literal["catalog", "interpolated", "modeled"]] = None  # 标准重量来源
+    tolerance_percent: float = 0.0          # 容差模型的相对标准差 %
+
+# --- 整批 (多卷) 防伪检测 ---
+class AntiFakeLotRequest(BaseModel):
+    # 逐条校验 (格式同 AntiFakeRequest，可附带 reel_id 卷号)
+    items: List[Any] = Field(..., description="每卷的检测数据")
+
+class AntiFakeLotItem(BaseModel):
+    index: int
+    reel_id: Optional[Any] = None
+    ok: bool
+    result: Optional[AntiFakeResponse] = None
+    error: Optional[str] = None
+
+class AntiFakeLotSummary(BaseModel):
+    checked: int
+    passed: int
+    warning: int
+    danger: int
+    mean_diff_percent: float
+    lot_confidence: float      # 整批平均偏差的置信度 (系统性亏方时很低)
+    lot_risk_level: Literal["safe", "warning", "danger"]
+    lot_message: str
+
+class AntiFakeLotResponse(BaseModel):
+    total: int
+    failed: int
+    summary: AntiFakeLotSummary
+    results: List[AntiFakeLotItem]
+# --- 配电箱 / 项目级选型与造价优化 ---
+class PanelRequest(BaseModel):
+    circuits: List[CableCalcRequest] = Field(..., min_length=1, description="出线回路列表")
+    currency: Literal["usd", "cny"] = Field("usd", description="造价币种 (铜价、电价、预算均按此币种)")
+    budget: Optional[float] = Field(None, gt=0, description="导体材料总预算 (不填则按全寿命成本最低)")
+    energy_price: float = Field(0.2, ge=0, description="电价 (每 kWh)")
+    operating_hours: float = Field(3000, ge=0, le=8760, description="年满载等效运行小时数")
+    years: float = Field(10, ge=0, le=50, description="线损计算年限")
+    max_upsize: int = Field(3, ge=0, le=6, description="每个回路最多向上放大的档数")
+
+class PanelTotals(BaseModel):
+    conductor_mass_kg: float
+    material_cost: float
+    annual_loss_kwh: float
+    loss_cost: float
+    total_cost: float
+
+class PanelCircuit(BaseModel):
+    index: int
+    ok: bool
+    error: Optional[str] = None
+    current_amps: Optional[float] = None
+    baseline_size: Optional[str] = None      # 满足载流量与压降的最小规格
+    recommended_size: Optional[str] = None   # 优化后的规格
+    upsized_steps: Optional[int] = None
+    voltage_drop_percent: Optional[float] = None
+    safe_ampacity: Optional[float] = None
+    mcb_rating: Optional[str] = None
+    conductor_mass_kg: Optional[float] = None
+    material_cost: Optional[float] = None
+    annual_loss_kwh: Optional[float] = None
+    loss_cost: Optional[float] = None
+
+class PanelResponse(BaseModel):
+    currency: str
+    copper_price_per_ton: float
+    aluminium_price_per_ton: float
+    price_updated_at: str
+    strategy: Literal["min_lifecycle_cost", "budget"]
+    budget: Optional[float] = None
+    budget_feasible: bool
+    total: int
+    failed: int
+    baseline: PanelTotals
+    optimized: PanelTotals
+    circuits: List[PanelCircuit]
+
+# --- 多级配电树 (总进线 -> 分箱 -> 末端回路) ---
+class FeederNode(BaseModel):
+    id: str = Field(..., min_length=1, description="节点编号")
+    parent: Optional[str] = Field(None, description="上级节点编号 (根节点为空)")
+    length: float = Field(0.0, ge=0, description="从上级到本节点的电缆长度(米)，0 表示不经电缆")
+    load_kw: float = Field(0.0, ge=0, description="本节点自身负载 (kW)")
+    power_factor: Optional[float] = Field(None, gt=0, le=1, description="本节点负载功率因数 (默认取整树设置)")
+
+class FeederTreeRequest(BaseModel):
+    nodes: List[FeederNode] = Field(..., min_length=1)
+    voltage_type: Literal["220v", "380v"] = Field(..., description="电压等级")
+    material: Literal["cu", "al"] = Field("cu", description="材质: 铜/铝")
+    cable_type: Literal["yjv", "bv"] = Field("yjv", description="绝缘类型")
+    max_voltage_drop: float = Field(5.0, gt=0, description="根到任一末端的最大允许压降%")
+    power_factor: float = Field(0.85, gt=0, le=1, description="默认功率因数")
+    temperature: float = Field(40.0, description="环境温度")
+    derating_mode: Literal["step", "interpolate"] = Field("step", description="温度降容方式")
+
+class FeederLoadUpdate(BaseModel):
+    id: str
+    load_kw: float = Field(..., ge=0)
+    power_factor: Optional[float] = Field(None, gt=0, le=1)
+
+class FeederLoadPatch(BaseModel):
+    loads: List[FeederLoadUpdate] = Field(..., min_length=1)
+
+class FeederNodeResult(BaseModel):
+    id: str
+    parent: Optional[str] = None
+    length: float
+    load_kw: float
+    downstream_kw: float          # 本段承担的下游总负载
+    current_amps: float
+    size: Optional[str] = None    # 不经电缆的节点为空
+    safe_ampacity: Optional[float] = None
+    segment_drop_percent: float
+    cumulative_drop_percent: float
+    budget_percent: Optional[float] = None  # 分摊给本段的压降预算
+    is_leaf: bool
+
+class FeederSummary(BaseModel):
+    nodes: int
+    leaves: int
+    total_load_kw: float
+    main_current_amps: float
+    worst_node: str
+    worst_drop_percent: float
+    max_voltage_drop: float
+    out_of_range_segments: int
+    ok: bool
+    updates: int
+
+class FeederTreeResponse(BaseModel):
+    tree_id: str
+    catalog_version: str
+    voltage_type: str
+    material: str
+    cable_type: str
+    temperature_factor: float
+    summary: FeederSummary
+    nodes: List[FeederNodeResult]
+
+class FeederPatchResponse(BaseModel):
+    tree_id: str
+    elapsed_ms: float
+    summary: FeederSummary
+    changed: List[FeederNodeResult]   # 被修改节点到根的路径，以及因此换了规格的段
@@ -1,9 +1,11 @@
-from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime
+from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, Index, UniqueConstraint
 from datetime import datetime
 from .database import Base
 
 class CableSpec(Base):
     __tablename__ = "cable_specs"
+    # 导入工具按此唯一索引 upsert (老库由 spec_loader.ensure_unique_index 去重后补建)
+    __table_args__ = (Index("uq_cable_spec_key", "material", "insulation", "size", unique=True),)
     
     id = Column(Integer, primary_key=True, index=True)
     material = Column(String)    # cu, al
@@ -12,6 +14,20 @@ class CableSpec(Base):
     ampacity = Column(Float)     # 载流量
     weight_per_100m = Column(Float, nullable=True) # 标准重量
 
+# --- 规格目录导入记录 (每次有变化的导入一条) ---
+class CatalogVersion(Base):
+    __tablename__ = "catalog_versions"
+
+    id = Column(Integer, primary_key=True)
+    version = Column(String, nullable=False)   # 导入后的目录内容哈希 (同 SpecCatalog.version)
+    label = Column(String, nullable=True)      # 规格文件自带的版本号 (如厂家样本年份)
+    source = Column(String)                    # 来源文件
+    rows_inserted = Column(Integer, default=0)
+    rows_updated = Column(Integer, default=0)
+    rows_deleted = Column(Integer, default=0)
+    row_count = Column(Integer, default=0)     # 导入后目录总行数
+    loaded_at = Column(DateTime, default=datetime.now, index=True)
+
 # --- 修改后的铜价表 ---
 class CopperPrice(Base):
     __tablename__ = "copper_prices"
@@ -21,4 +37,25 @@ class CopperPrice(Base):
     price_cny = Column(Float) # 人民币价格
     price_usd = Column(Float) # 美元价格
     exchange_rate = Column(Float) # 当时汇率
-    source = Column(String)   # 数据源 (e.g., "SHFE")
\ No newline at end of file
+    source = Column(String)   # 数据源 (e.g., "SHFE")
+
+# --- 铜价 OHLC 汇总表 (由定时任务增量维护) ---
+class CopperPriceRollup(Base):
+    __tablename__ = "copper_price_rollups"
+    # (interval, bucket_start) 唯一索引同时用作区间查询索引
+    __table_args__ = (UniqueConstraint("interval", "bucket_start", name="uq_rollup_interval_bucket"),)
+    
+    id = Column(Integer, primary_key=True)
+    interval = Column(String, nullable=False)        # 1h, 1d, 1w
+    bucket_start = Column(DateTime, nullable=False)  # 区间起点 (本地时间)
+    open_usd = Column(Float)
+    high_usd = Column(Float)
+    low_usd = Column(Float)
+    close_usd = Column(Float)
+    open_cny = Column(Float)
+    high_cny = Column(Float)
+    low_cny = Column(Float)
+    close_cny = Column(Float)
+    samples = Column(Integer, default=0)             # 汇入的原始记录数
+    first_sample_at = Column(DateTime)
+    last_sample_at = Column(DateTime)
@@ -0,0 +1,265 @@
+# backend/app/services/anti_fake.py
+"""
+防伪 / 亏方检测 (进程内查表，不查库)
+
+1. 规格按数值截面建索引 ("4" / "4.0" / "4mm²" 都指同一规格)
+2. 标准重量 = 导体质量 (截面 × 密度) + 绝缘层质量。规格库里有重量的直接用；
+   没有的按同绝缘类型的已知点推算绝缘层质量:
+   - 落在本表已知截面之间: 按 √截面 线性插值 ("interpolated")
+   - 超出范围或本表没有任何重量 (如铝芯): 用 绝缘质量 = a + b·√截面 的最小二乘拟合 ("modeled")
+   绝缘层厚度与导体材质无关，所以铝芯直接复用铜芯的绝缘模型，规格档位也沿用同绝缘类型的铜芯表。
+3. 容差模型: 正品实测重量 ~ 正态(标准重量, σ)，σ 由制造公差与标准重量本身的推算误差合成。
+   置信度 = 2·Φ(z) (封顶 1)，即正品称出这么轻或更轻的概率；偏重不扣分。
+4. 整批 (同一批次多卷) 检测时再看平均偏差: 每卷都只轻一点也可能是整批系统性亏方。
+   同一批次共用一套工艺，卷与卷之间不独立，所以平均值的 σ 不会随卷数无限缩小；
+   标准重量的推算误差对同一规格的每一卷都一样，也不会被平均掉，只有制造公差按卷数缩小:
+   σ_批 = √(批次系统公差² + 平均推算误差² + 制造公差² / 卷数)。
+目录对象不可变，索引按目录版本缓存，目录换版本后下次访问重建。
+"""
+import math
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from pydantic import ValidationError
+
+from app.core import config
+from app.models.schemas import AntiFakeRequest
+from app.services.batch_sizing import format_errors
+from app.services.spec_catalog import SpecCatalog, normalize_size
+
+# 单次批量检测最多卷数
+MAX_LOT_ITEMS = 10000
+
+# 导体密度 (kg/m³)，与 panel_optimizer 一致
+DENSITY = {"cu": 8890.0, "al": 2700.0}
+
+# 标准重量本身的相对误差 (与制造公差合成)
+SOURCE_SIGMA = {"catalog": 0.0, "interpolated": 0.02, "modeled": 0.05}
+
+# 置信度分级: 不低于 SAFE_CONFIDENCE 判合格，低于 DANGER_CONFIDENCE 判高风险
+SAFE_CONFIDENCE = 0.05
+DANGER_CONFIDENCE = 1e-4
+
+MESSAGES = {
+    "safe": "✅ 正品标准",
+    "warning": "⚠️ 疑似非标线",
+    "danger": "🚫 极高风险：铜包铝/亏方",
+}
+MISSING_MESSAGE = "规格库缺失"
+
+def conductor_weight(area, material: str):
+    """导体质量 (kg/100m): 截面 mm² × 100 m × 密度"""
+    return np.asarray(area, dtype=np.float64) * 1e-4 * DENSITY[material]
+
+
+def confidence_scores(ratio: np.ndarray, sigma: np.ndarray) -> np.ndarray:
+    """实测/标准 比值 -> 置信度 (0~1)"""
+    z = (np.asarray(ratio, dtype=np.float64) - 1.0) / np.asarray(sigma, dtype=np.float64)
+    # 2·Φ(z) = erfc(-z/√2)
+    return np.minimum(1.0, np.array([math.erfc(-v / math.sqrt(2.0)) for v in z.ravel()]).reshape(z.shape))
+
+
+def risk_level(confidence: float) -> str:
+    if confidence >= SAFE_CONFIDENCE:
+        return "safe"
+    if confidence >= DANGER_CONFIDENCE:
+        return "warning"
+    return "danger"
+
+
+class _InsulationModel:
+    """绝缘层质量 ≈ a + b·√截面 (同一绝缘类型所有已知点拟合)"""
+
+    def __init__(self, roots: np.ndarray, residuals: np.ndarray):
+        self.a, self.b = 0.0, 0.0
+        if len(np.unique(roots)) >= 2:
+            self.b, self.a = (float(v) for v in np.polyfit(roots, residuals, 1))
+        elif len(roots):
+            # 只有一个已知点: 过原点按比例缩放
+            self.b = float(residuals.mean() / roots.mean())
+
+    def __call__(self, roots: np.ndarray) -> np.ndarray:
+        return np.maximum(self.a + self.b * roots, 0.0)
+
+
+class AntiFakeIndex:
+    """某个目录版本的标准重量索引: (材质, 绝缘, 数值截面) -> (规格, 标准重量, 来源)"""
+
+    def __init__(self, catalog: SpecCatalog):
+        self.catalog_version = catalog.version
+        self.entries: Dict[Tuple[str, str, float], Tuple[str, float, str]] = {}
+
+        # 各绝缘类型的已知点 (绝缘层质量 = 规格库重量 - 导体质量)
+        known: Dict[str, List[Tuple[float, float]]] = {}
+        for (material, insulation), table in catalog.tables.items():
+            if material not in DENSITY:
+                continue
+            for area, weight in zip(table.size_values, table.weights):
+                if weight and area > 0:
+                    known.setdefault(insulation, []).append(
+                        (math.sqrt(area), float(weight) - float(conductor_weight(area, material)))
+                    )
+        every = [p for points in known.values() for p in points]
+        models = {}
+        for insulation in {ins for _, ins in catalog.tables}:
+            points = known.get(insulation) or every
+            models[insulation] = _InsulationModel(np.array([p[0] for p in points]), np.array([p[1] for p in points]))
+
+        for insulation, model in models.items():
+            for material in DENSITY:
+                table = catalog.get(material, insulation)
+                if table is None:
+                    # 该材质没有规格表: 沿用同绝缘类型其它材质的规格档位
+                    table = next(t for (m, ins), t in catalog.tables.items() if ins == insulation)
+                    own = False
+                else:
+                    own = True
+                self._add_table(material, insulation, table.sizes, table.size_values,
+                                table.weights if own else (None,) * len(table), model)
+
+    def _add_table(self, material, insulation, sizes, size_values, weights, model: _InsulationModel) -> None:
+        keys = [normalize_size(v) for v in size_values]
+        roots = np.sqrt(np.array([k or 0.0 for k in keys]))
+        conductor = conductor_weight(np.array([k or 0.0 for k in keys]), material)
+        points = sorted((r, float(w) - c) for r, w, c in zip(roots, weights, conductor) if w and r > 0)
+
+        estimate = model(roots)
+        source = np.full(len(keys), "modeled", dtype=object)
+        if len(points) >= 2:
+            xs, ys = np.array([p[0] for p in points]), np.array([p[1] for p in points])
+            inside = (roots >= xs[0]) & (roots <= xs[-1])
+            estimate = np.where(inside, np.interp(roots, xs, ys), estimate)
+            source[inside] = "interpolated"
+
+        for i, key in enumerate(keys):
+            if key is None:
+                continue
+            if weights[i]:
+                weight, src = float(weights[i]), "catalog"
+            else:
+                weight, src = float(conductor[i] + estimate[i]), str(source[i])
+            # 同一截面出现多次时保留第一条 (与规格库查询顺序一致)
+            self.entries.setdefault((material, insulation, key), (sizes[i], round(weight, 2), src))
+
+    def lookup(self, material: str, insulation: str, size: Any) -> Optional[Tuple[str, float, str]]:
+        key = normalize_size(size)
+        if key is None:
+            return None
+        return self.entries.get((material, insulation, key))
+
+    def check_many(self, requests: List[AntiFakeRequest]) -> List[Dict[str, Any]]:
+        """逐卷检测 (一次向量化算完置信度)，结果里的 _stats 为 (实测/标准, 推算误差)，供整批汇总使用"""
+        found = [self.lookup(r.material, r.cable_type, r.nominal_size) for r in requests]
+        hits = [i for i, f in enumerate(found) if f is not None]
+        std = np.array([found[i][1] for i in hits], dtype=np.float64)
+        measured = np.array([requests[i].measured_weight for i in hits], dtype=np.float64)
+        source_sigma = np.array([SOURCE_SIGMA[found[i][2]] for i in hits], dtype=np.float64)
+        sigma = np.hypot(config.ANTI_FAKE_TOLERANCE, source_sigma)
+        ratio = measured / std if hits else std
+        scores = confidence_scores(ratio, sigma) if hits else std
+
+        results: List[Dict[str, Any]] = [
+            {
+                "is_pass": False, "standard_weight": 0.0, "diff_percent": 0.0, "message": MISSING_MESSAGE,
+                "risk_level": "warning", "confidence": 0.0, "matched_size": None, "weight_source": None,
+                "tolerance_percent": 0.0, "_stats": None,
+            }
+            for _ in requests
+        ]
+        for pos, i in enumerate(hits):
+            level = risk_level(float(scores[pos]))
+            results[i] = {
+                "is_pass": level == "safe",
+                "standard_weight": found[i][1],
+                "diff_percent": round((float(ratio[pos]) - 1.0) * 100, 2),
+                "message": MESSAGES[level],
+                "risk_level": level,
+                "confidence": round(float(scores[pos]), 4),
+                "matched_size": found[i][0],
+                "weight_source": found[i][2],
+                "tolerance_percent": round(float(sigma[pos]) * 100, 2),
+                "_stats": (float(ratio[pos]), float(source_sigma[pos])),
+            }
+        return results
+
+    def check(self, request: AntiFakeRequest) -> Dict[str, Any]:
+        result = self.check_many([request])[0]
+        result.pop("_stats")
+        return result
+
+    def check_lot(self, items: List[Any]) -> Dict[str, Any]:
+        """整批检测入口: 逐卷校验 + 检测，外加整批汇总"""
+        requests: List[Optional[AntiFakeRequest]] = []
+        errors: List[Optional[str]] = []
+        for item in items:
+            if not isinstance(item, dict):
+                requests.append(None)
+                errors.append("item: 必须是 JSON 对象")
+                continue
+            try:
+                requests.append(AntiFakeRequest(**item))
+                errors.append(None)
+            except ValidationError as e:
+                requests.append(None)
+                errors.append(format_errors(e))
+
+        valid = [i for i, r in enumerate(requests) if r is not None]
+        checked = dict(zip(valid, self.check_many([requests[i] for i in valid])))
+        results = []
+        counts = {"safe": 0, "warning": 0, "danger": 0}
+        ratios, source_sigmas = [], []
+        for i, item in enumerate(items):
+            reel_id = item.get("reel_id") if isinstance(item, dict) else None
+            res = checked.get(i)
+            if res is None:
+                results.append({"index": i, "reel_id": reel_id, "ok": False, "result": None, "error": errors[i]})
+                continue
+            stats = res.pop("_stats")
+            if stats is None:
+                results.append({"index": i, "reel_id": reel_id, "ok": False, "result": None,
+                                "error": f"{MISSING_MESSAGE}: {requests[i].material}/{requests[i].cable_type} {requests[i].nominal_size}"})
+                continue
+            counts[res["risk_level"]] += 1
+            ratios.append(stats[0])
+            source_sigmas.append(stats[1])
+            results.append({"index": i, "reel_id": reel_id, "ok": True, "result": res, "error": None})
+
+        n = len(ratios)
+        lot_confidence = 0.0
+        if n:
+            lot_sigma = math.sqrt(config.ANTI_FAKE_LOT_TOLERANCE ** 2 + float(np.mean(np.square(source_sigmas)))
+                                  + config.ANTI_FAKE_TOLERANCE ** 2 / n)
+            lot_confidence = float(confidence_scores(np.mean(ratios), lot_sigma))
+        lot_level = risk_level(lot_confidence) if n else "warning"
+        return {
+            "total": len(items),
+            "failed": len(items) - n,
+            "summary": {
+                "checked": n,
+                "passed": counts["safe"],
+                "warning": counts["warning"],
+                "danger": counts["danger"],
+                "mean_diff_percent": round((float(np.mean(ratios)) - 1.0) * 100, 2) if ratios else 0.0,
+                "lot_confidence": round(lot_confidence, 4),
+                "lot_risk_level": lot_level,
+                "lot_message": MESSAGES[lot_level] if n else MISSING_MESSAGE,
+            },
+            "results": results,
+        }
+
+
+_index: Optional[AntiFakeIndex] = None
+_build_lock = threading.Lock()
+
+
+def get_index(catalog: SpecCatalog) -> AntiFakeIndex:
+    """当前目录版本对应的标准重量索引 (按需构建)"""
+    global _index
+    index = _index
+    if index is None or index.catalog_version != catalog.version:
+        with _build_lock:
+            if _index is None or _index.catalog_version != catalog.version:
+                _index = AntiFakeIndex(catalog)
+            index = _index
+    return index
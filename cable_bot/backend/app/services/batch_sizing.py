@@ -0,0 +1,244 @@
+# backend/app/services/batch_sizing.py
+"""
+批量选型 (整个项目的电缆清单一次提交)
+
+按 (材质, 绝缘, 电压, 降容模式) 分组，每组的电流、综合降容、选型、断路器都用 NumPy 一次算完。
+浮点运算顺序与 ElectricalCalculator 逐条计算完全相同，所以结果逐位一致。
+结果按输入顺序返回，单条出错只标记该条，不影响其它回路。
+"""
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from pydantic import ValidationError
+
+from app.models.schemas import CableCalcRequest
+from app.services import derating
+from app.services.calc_logic import ElectricalCalculator, STANDARD_MCB
+from app.services.spec_catalog import SpecCatalog, SpecTable
+
+# 单次批量请求的最大回路数
+MAX_BATCH_ITEMS = 10000
+
+_MCB_ARRAY = np.array(STANDARD_MCB, dtype=np.float64)
+_PF = 0.85
+
+
+def format_errors(exc: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" for err in exc.errors()
+    )
+
+
+def validate_items(items: List[Any]) -> Tuple[List[Optional[CableCalcRequest]], List[Optional[str]]]:
+    """逐条校验，返回 (请求对象列表, 错误信息列表)，两者与输入一一对应"""
+    requests: List[Optional[CableCalcRequest]] = []
+    errors: List[Optional[str]] = []
+    for item in items:
+        if not isinstance(item, dict):
+            requests.append(None)
+            errors.append("item: 必须是 JSON 对象")
+            continue
+        try:
+            req = CableCalcRequest(**item)
+        except ValidationError as e:
+            requests.append(None)
+            errors.append(format_errors(e))
+            continue
+        if req.temperature is None or req.max_voltage_drop is None:
+            requests.append(None)
+            errors.append("temperature / max_voltage_drop: 不能为 null")
+            continue
+        requests.append(req)
+        errors.append(None)
+    return requests, errors
+
+
+def calculate_currents(powers: np.ndarray, units: List[str], voltage: str) -> List[float]:
+    """向量化版 ElectricalCalculator.calculate_current (同一电压等级)"""
+    is_amps = np.array([u == "amps" for u in units], dtype=bool)
+    is_hp = np.array([u == "hp" for u in units], dtype=bool)
+    kw_val = np.where(is_hp, powers * 0.746, powers)
+    if voltage == "380v":
+        raw = (kw_val * 1000) / (380 * 1.732 * _PF)
+    else:
+        raw = (kw_val * 1000) / (220 * _PF)
+    # 保留两位小数用 Python round (与逐条计算的舍入规则一致，np.round 在 .5 边界上会有差异)
+    return [p if a else round(r, 2) for p, a, r in zip(powers.tolist(), is_amps.tolist(), raw.tolist())]
+
+
+def select_indices(table: Optional[SpecTable], currents: np.ndarray, distances: np.ndarray,
+                   max_drops: np.ndarray, material: str, voltage: str,
+                   derating_factors) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    向量化选型: 返回 (满足载流量的下标, 最终选中下标, 选中规格的压降)
+    最终下标 == len(table) 表示超出规格库范围。要求 table.monotone。
+    """
+    count = len(currents)
+    n = len(table) if table else 0
+    if n == 0:
+        zeros = np.zeros(count, dtype=np.int64)
+        return zeros, zeros, np.zeros(count)
+
+    sizes = table.size_array
+    rho = 0.0175 if material == "cu" else 0.028
+    factor = 1.732 if voltage == "380v" else 2.0
+    v_base = 380 if voltage == "380v" else 220
+
+    target = currents / derating_factors
+    i_amp = np.searchsorted(table.ampacity_array, target, side="left")
+
+    # 与 calculate_voltage_drop_pure 相同的运算顺序
+    k = factor * currents * distances * rho
+
+    def drops_at(idx):
+        return ((k / sizes[np.minimum(idx, n - 1)]) / v_base) * 100
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # 闭式解给出压降所需最小截面的初值，再用精确压降公式前后微调到逐位一致的断点
+        needed = k / (max_drops * v_base / 100)
+        j = np.maximum(np.searchsorted(sizes, needed, side="left"), i_amp)
+        for _ in range(n + 1):
+            too_small = (j < n) & (drops_at(j) > max_drops)
+            if not too_small.any():
+                break
+            j = j + too_small
+        for _ in range(n + 1):
+            can_shrink = (j > i_amp) & (drops_at(j - 1) <= max_drops)
+            if not can_shrink.any():
+                break
+            j = j - can_shrink
+        drops = np.where(j < n, drops_at(j), 0.0)
+    return i_amp, j, drops
+
+
+def recommend_mcbs(amps: np.ndarray) -> np.ndarray:
+    """向量化断路器档位 (超出标准档时取计算值本身)"""
+    mcb_val = np.ceil(amps * 1.2)
+    idx = np.searchsorted(_MCB_ARRAY, mcb_val, side="left")
+    return np.where(idx < len(_MCB_ARRAY), _MCB_ARRAY[np.minimum(idx, len(_MCB_ARRAY) - 1)], mcb_val)
+
+
+def _size_group(catalog: SpecCatalog, key: tuple, reqs: List[CableCalcRequest],
+                breakdowns: Dict[str, np.ndarray]) -> List[Dict[str, Any]]:
+    material, cable_type, voltage, mode = key
+    table = catalog.get(material, cable_type)
+
+    amps = calculate_currents(
+        np.array([r.power for r in reqs], dtype=np.float64), [r.power_unit for r in reqs], voltage
+    )
+
+    factors = breakdowns["total"]
+    rows = [dict(zip(breakdowns, values)) for values in zip(*(v.tolist() for v in breakdowns.values()))]
+
+    if table is not None and not table.monotone:
+        # 规格顺序不规则，逐条走标量路径
+        selections = [
+            ElectricalCalculator.smart_select_cable(
+                catalog, current=a, material=material, cable_type=cable_type, distance=r.distance,
+                voltage=voltage, max_drop=r.max_voltage_drop, ambient_temp=r.temperature, derating_factors=f
+            )
+            for a, r, f in zip(amps, reqs, rows)
+        ]
+    else:
+        amps_arr = np.array(amps, dtype=np.float64)
+        i_amp, j, drops = select_indices(
+            table, amps_arr,
+            np.array([r.distance for r in reqs], dtype=np.float64),
+            np.array([r.max_voltage_drop for r in reqs], dtype=np.float64),
+            material, voltage, factors
+        )
+        n = len(table) if table else 0
+        selections = []
+        for r, row, ia, jj, drop in zip(reqs, rows, i_amp.tolist(), j.tolist(), drops.tolist()):
+            derating_factor = row["total"]
+            if jj >= n:
+                selections.append({
+                    "size": "Out of Range",
+                    "drop": 0.0,
+                    "reason": "❌ 负载过大或距离过长，超出数据库范围",
+                    "safe_ampacity": 0,
+                    "derating": row
+                })
+                continue
+            upgrade_count = jj - ia
+            reason = "✅ 规格合适"
+            if upgrade_count > 0:
+                reason = f"⚠️ 因长距离压降(>{r.max_voltage_drop}%)，已自动放大 {upgrade_count} 档规格"
+            elif derating_factor < 1.0:
+                reason = derating.reason_text(r.temperature, row)
+            selections.append({
+                "size": table.sizes[jj],
+                "drop": round(drop, 2),
+                "reason": reason,
+                "safe_ampacity": round(table.ampacities[jj] * derating_factor, 1),
+                "derating": row
+            })
+
+    mcbs = recommend_mcbs(np.array(amps, dtype=np.float64)).tolist()
+    results = []
+    for a, sel, mcb in zip(amps, selections, mcbs):
+        final_mcb = int(mcb)
+        safe_limit = sel["safe_ampacity"]
+        if safe_limit > 0 and final_mcb > safe_limit:
+            mcb_msg = f"{final_mcb}A (⚠️注意: 接近电缆极限 {safe_limit}A)"
+        else:
+            mcb_msg = f"{final_mcb}A"
+        results.append({
+            "current_amps": a,
+            "recommended_size": sel["size"],
+            "voltage_drop_percent": sel["drop"],
+            "mcb_rating": mcb_msg,
+            "selection_reason": sel["reason"],
+            "safe_ampacity": sel["safe_ampacity"],
+            "derating": sel["derating"]
+        })
+    return results
+
+
+def size_batch(catalog: SpecCatalog, items: List[Any]) -> List[Dict[str, Any]]:
+    """批量选型入口: 返回与输入顺序一致的 {index, ok, result, error} 列表"""
+    requests, errors = validate_items(items)
+    return size_requests(catalog, requests, errors)
+
+
+def size_requests(catalog: SpecCatalog, requests: List[Optional[CableCalcRequest]],
+                  errors: Optional[List[Optional[str]]] = None) -> List[Dict[str, Any]]:
+    """对已校验的请求批量选型 (requests 中为 None 的位置须在 errors 中给出原因)"""
+    errors = list(errors) if errors is not None else [None] * len(requests)
+
+    groups: Dict[tuple, List[int]] = {}
+    for i, req in enumerate(requests):
+        if req is not None:
+            key = (req.material, req.cable_type, req.voltage_type, req.derating_mode)
+            groups.setdefault(key, []).append(i)
+
+    results: List[Optional[Dict[str, Any]]] = [None] * len(requests)
+    for key, indices in groups.items():
+        material, cable_type, voltage, mode = key
+        reqs = [requests[i] for i in indices]
+        # 整组降容一次查表；任一分项超出降容表范围的回路单独报错
+        breakdowns = derating.derate(
+            cable_type, mode, [r.temperature for r in reqs], [r.installation for r in reqs],
+            [r.circuits_grouped for r in reqs], [r.soil_resistivity for r in reqs],
+            [r.harmonics_percent for r in reqs], voltage == "380v", [r.soil_temperature for r in reqs]
+        )
+        valid = ~np.isnan(breakdowns["total"])
+        if not valid.all():
+            for i, r, ok, pos in zip(indices, reqs, valid.tolist(), range(len(reqs))):
+                if not ok:
+                    errors[i] = derating.describe_error(
+                        cable_type, r.temperature, r.installation, r.circuits_grouped, r.soil_resistivity,
+                        {k: float(v[pos]) for k, v in breakdowns.items()}, r.soil_temperature
+                    )
+            indices = [i for i, ok in zip(indices, valid.tolist()) if ok]
+            breakdowns = {k: v[valid] for k, v in breakdowns.items()}
+            if not indices:
+                continue
+        group_results = _size_group(catalog, key, [requests[i] for i in indices], breakdowns)
+        for i, res in zip(indices, group_results):
+            results[i] = res
+
+    return [
+        {"index": i, "ok": errors[i] is None, "result": results[i], "error": errors[i]}
+        for i in range(len(requests))
+    ]
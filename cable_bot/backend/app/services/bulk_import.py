@@ -0,0 +1,182 @@
+# backend/app/services/bulk_import.py
+"""
+流式批量选型导入 (设计软件导出的 CSV / NDJSON)
+
+请求体边读边解析，每攒够 CHUNK_ROWS 行就走一次批量选型，结果逐行写回响应流。
+输入和输出都不会整体驻留内存，峰值内存只和单个分块有关，与文件大小无关。
+格式错误的行在结果里原位报错，不会中断整个任务。
+
+限制: CSV 按物理行解析，不支持引号内换行。
+"""
+import codecs
+import csv
+import io
+import json
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from starlette.responses import StreamingResponse
+
+from app.services import batch_sizing
+from app.services.spec_catalog import SpecCatalog
+
+# 每次批量选型的行数
+CHUNK_ROWS = 1000
+# 单行最大长度 (字符)，超长行直接报错丢弃，防止恶意输入撑爆内存
+MAX_LINE_CHARS = 64 * 1024
+
+RESULT_COLUMNS = [
+    "line", "status", "current_amps", "recommended_size", "voltage_drop_percent",
+    "mcb_rating", "selection_reason", "safe_ampacity", "derating_factor", "error"
+]
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, Optional[str]]]:
+    """
+    增量解码并切分行，产出 (行号, 内容)；超长行的内容为 None。
+    只保留当前未完成的一行在内存中。
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    pending = ""
+    overflow = False
+    line_no = 0
+    async for chunk in chunks:
+        text = pending + decoder.decode(chunk)
+        lines = text.split("\n")
+        pending = lines.pop()
+        for line in lines:
+            line_no += 1
+            # 超长行可能跨块 (overflow) 也可能整行落在同一块里，两种都丢弃，结果与客户端分块方式无关
+            if overflow or len(line) > MAX_LINE_CHARS:
+                overflow = False
+                yield line_no, None
+            else:
+                yield line_no, line.rstrip("\r")
+        if len(pending) > MAX_LINE_CHARS:
+            overflow = True
+            pending = ""
+    pending += decoder.decode(b"", final=True)
+    if overflow or len(pending) > MAX_LINE_CHARS:
+        yield line_no + 1, None
+    elif pending.strip():
+        yield line_no + 1, pending.rstrip("\r")
+
+
+class DuplexStreamingResponse(StreamingResponse):
+    """
+    边读请求体边写响应体的 StreamingResponse。
+    父类会并发 receive() 监听断开，把还没读到的请求体消息抢走，导致读取端永远等不到数据；
+    这里只负责写出，客户端断开时 send 会直接抛错结束。
+    """
+
+    async def __call__(self, scope, receive, send) -> None:
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+
+class _RowError(str):
+    """行级错误信息 (与正常解析出的数据区分开)"""
+
+
+def _csv_row(values: List[str]) -> str:
+    buf = io.StringIO()
+    csv.writer(buf, lineterminator="\n").writerow(values)
+    return buf.getvalue()
+
+
+class _CsvFormat:
+    media_type = "text/csv; charset=utf-8"
+
+    def __init__(self):
+        self.header: Optional[List[str]] = None
+
+    def parse(self, line: str):
+        """返回 (是否表头, 行数据 dict 或错误信息)"""
+        try:
+            values = next(csv.reader([line]))
+        except csv.Error as e:
+            return False, _RowError(f"CSV 解析失败: {e}")
+        if self.header is None:
+            self.header = [v.strip() for v in values]
+            return True, None
+        if len(values) != len(self.header):
+            return False, _RowError(f"列数不符: 期望 {len(self.header)} 列，实际 {len(values)} 列")
+        # 空单元格视为未填写，使用默认值
+        return False, {k: v.strip() for k, v in zip(self.header, values) if v.strip() != ""}
+
+    def head(self) -> str:
+        return _csv_row(RESULT_COLUMNS)
+
+    def render(self, line_no: int, res: Dict) -> str:
+        r = res["result"] or {}
+        return _csv_row([
+            line_no, "ok" if res["ok"] else "error",
+            r.get("current_amps", ""), r.get("recommended_size", ""), r.get("voltage_drop_percent", ""),
+            r.get("mcb_rating", ""), r.get("selection_reason", ""), r.get("safe_ampacity", ""),
+            (r.get("derating") or {}).get("total", ""), res["error"] or ""
+        ])
+
+
+class _NdjsonFormat:
+    media_type = "application/x-ndjson"
+
+    def parse(self, line: str):
+        try:
+            return False, json.loads(line)
+        except ValueError as e:
+            return False, _RowError(f"JSON 解析失败: {e}")
+
+    def head(self) -> str:
+        return ""
+
+    def render(self, line_no: int, res: Dict) -> str:
+        return json.dumps(
+            {"line": line_no, "ok": res["ok"], "result": res["result"], "error": res["error"]},
+            ensure_ascii=False
+        ) + "\n"
+
+
+def get_format(name: str):
+    if name == "csv":
+        return _CsvFormat()
+    if name == "ndjson":
+        return _NdjsonFormat()
+    raise ValueError(f"Unsupported import format: {name}")
+
+
+async def stream_sizing(catalog: SpecCatalog, chunks: AsyncIterator[bytes], fmt) -> AsyncIterator[bytes]:
+    """边读边算边写: 产出编码后的结果片段 (每个分块一次)"""
+    head = fmt.head()
+    if head:
+        yield head.encode("utf-8")
+
+    # 一个分块内: 行号 + (待计算的数据 或 解析错误)
+    batch: List[Tuple[int, object]] = []
+
+    def flush() -> bytes:
+        items = [data for _, data in batch if not isinstance(data, _RowError)]
+        sized = iter(batch_sizing.size_batch(catalog, items))
+        out = []
+        for line_no, data in batch:
+            if isinstance(data, _RowError):
+                res = {"ok": False, "result": None, "error": data}
+            else:
+                res = next(sized)
+            out.append(fmt.render(line_no, res))
+        batch.clear()
+        return "".join(out).encode("utf-8")
+
+    async for line_no, line in iter_lines(chunks):
+        if line is None:
+            batch.append((line_no, _RowError(f"行过长 (>{MAX_LINE_CHARS} 字符)")))
+        elif not line.strip():
+            continue
+        else:
+            is_header, data = fmt.parse(line)
+            if is_header:
+                continue
+            batch.append((line_no, data))
+        if len(batch) >= CHUNK_ROWS:
+            yield flush()
+    if batch:
+        yield flush()
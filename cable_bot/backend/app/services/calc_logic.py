@@ -1,17 +1,12 @@
 # backend/app/services/calc_logic.py
-from sqlalchemy.orm import Session
-from app.models.tables import CableSpec
+import math
+from bisect import bisect_left
+from typing import Dict, Optional
+from app.services.spec_catalog import SpecCatalog
+from app.services import derating
 
-# 温度修正系数表 (参考 IEC 60364-5-52)
-# 基准温度: 空气中 30°C
-TEMP_CORRECTION_FACTORS = {
-    "bv": {  # PVC 绝缘
-        30: 1.00, 35: 0.94, 40: 0.87, 45: 0.79, 50: 0.71
-    },
-    "yjv": { # XLPE 绝缘 (耐热更好)
-        30: 1.00, 35: 0.94, 40: 0.91, 45: 0.87, 50: 0.82
-    }
-}
+# 标准断路器额定电流 (A)
+STANDARD_MCB = [6, 10, 16, 20, 25, 32, 40, 50, 63, 80, 100, 125, 160, 200, 250, 400]
 
 class ElectricalCalculator:
     
@@ -33,21 +28,9 @@ class ElectricalCalculator:
             return round((kw_val * 1000) / (220 * pf), 2)
 
     @staticmethod
-    def get_temp_factor(cable_type: str, temp: float) -> float:
-        """获取温度降容系数"""
-        # 找到最接近的温度档位 (向上取整，安全起见)
-        factors = TEMP_CORRECTION_FACTORS.get(cable_type, TEMP_CORRECTION_FACTORS["bv"])
-        
-        # 简单的档位匹配逻辑
-        check_temps = [30, 35, 40, 45, 50]
-        selected_temp = 30
-        for t in check_temps:
-            if temp <= t:
-                selected_temp = t
-                break
-            selected_temp = t # 超过50度按50度算，或后续扩展
-            
-        return factors.get(selected_temp, 1.0)
+    def get_temp_factor(cable_type: str, temp: float, mode: str = "step", location: str = "air") -> float:
+        """获取温度降容系数 (IEC 60364-5-52 全表，超出范围抛 DeratingError)"""
+        return derating.temperature_factor(cable_type, temp, mode, location)
 
     @staticmethod
     def calculate_voltage_drop_pure(current: float, distance: float, size_str: str, material: str, voltage: str) -> float:
@@ -56,7 +39,11 @@ class ElectricalCalculator:
             size = float(size_str)
         except ValueError:
             return 999.0 
-            
+        return ElectricalCalculator.voltage_drop_for_size(current, distance, size, material, voltage)
+
+    @staticmethod
+    def voltage_drop_for_size(current: float, distance: float, size: float, material: str, voltage: str) -> float:
+        """压降计算 (截面已是数值，供预解析的规格数组使用)"""
         rho = 0.0175 if material == "cu" else 0.028
         factor = 1.732 if voltage == "380v" else 2.0
         v_base = 380 if voltage == "380v" else 220
@@ -65,12 +52,13 @@ class ElectricalCalculator:
         return (v_drop_val / v_base) * 100
 
     @staticmethod
-    def smart_select_cable(db: Session, current: float, material: str, cable_type: str, 
+    def smart_select_cable(catalog: SpecCatalog, current: float, material: str, cable_type: str, 
                            distance: float, voltage: str, 
-                           max_drop: float = 5.0, ambient_temp: float = 40.0) -> dict:
+                           max_drop: float = 5.0, ambient_temp: float = 40.0,
+                           derating_mode: str = "step", derating_factors: Optional[Dict[str, float]] = None) -> dict:
         """
         智能选型核心逻辑:
-        1. 获取温度系数，计算所需最小载流量。
+        1. 获取降容系数 (默认只有温度；derating_factors 为 derating.derating_breakdown 的综合分项)，计算所需最小载流量。
         2. 初选：满足载流量的最小电缆。
         3. 校验：计算压降。
         4. 迭代：如果压降超标，自动尝试大一号的电缆，直到合格。
@@ -78,81 +66,83 @@ class ElectricalCalculator:
         
         # 1. 计算温度修正后的目标载流量
         # 例如: 负载 40A, 40度环境(系数0.87) -> 电缆额定载流量至少要 40 / 0.87 = 46A
-        derating_factor = ElectricalCalculator.get_temp_factor(cable_type, ambient_temp)
+        if derating_factors is None:
+            derating_factors = derating.temperature_only(
+                ElectricalCalculator.get_temp_factor(cable_type, ambient_temp, derating_mode)
+            )
+        derating_factor = derating_factors["total"]
         target_ampacity = current / derating_factor
         
-        # 2. 从数据库获取所有规格 (按载流量从小到大排序)
-        specs = db.query(CableSpec).filter(
-            CableSpec.material == material,
-            CableSpec.insulation == cable_type
-        ).order_by(CableSpec.ampacity).all()
+        # 2. 从内存目录获取规格 (已按载流量从小到大排序)
+        table = catalog.get(material, cable_type)
+        n = len(table) if table else 0
         
-        selected_spec = None
-        final_drop = 0.0
-        upgrade_count = 0 # 记录升规次数
+        # 3. “双重校验”
+        # 校验 A (热稳定): 第一个载流量 >= 目标值的规格，一次二分
+        i_amp = bisect_left(table.ampacities, target_ampacity) if n else 0
+        
+        # 校验 B (压降): 压降与截面成反比，截面单调时“压降合格”是一个前缀断点，
+        # 同样二分即可；逐档判断用与原逐条计算完全相同的公式，保证结果逐位一致
+        def drop_at(i):
+            size = table.size_values[i]
+            if size != size: # NaN: 规格字符串无法解析
+                return 999.0
+            return ElectricalCalculator.voltage_drop_for_size(current, distance, size, material, voltage)
+        
+        if n and table.monotone:
+            lo, hi = i_amp, n
+            while lo < hi:
+                mid = (lo + hi) // 2
+                if drop_at(mid) <= max_drop:
+                    hi = mid
+                else:
+                    lo = mid + 1
+            j = lo
+        else:
+            # 规格顺序不规则 (或截面无法解析)，退回逐条校验
+            j = i_amp
+            while j < n and drop_at(j) > max_drop:
+                j += 1
+        
+        selected_spec = j if j < n else None
+        final_drop = drop_at(j) if selected_spec is not None else 0.0
+        upgrade_count = j - i_amp # 记录升规次数 (载流量够但压降超标而放大的档数)
         
-        # 3. 遍历规格进行“双重校验”
-        for spec in specs:
-            # 校验 A: 载流量是否足够 (热稳定)
-            if spec.ampacity < target_ampacity:
-                continue # 太细了，烧线风险，跳过
-            
-            # 校验 B: 压降是否合格
-            drop = ElectricalCalculator.calculate_voltage_drop_pure(
-                current, distance, spec.size, material, voltage
-            )
-            
-            if drop <= max_drop:
-                # 找到既满足载流量，又满足压降的线了！
-                selected_spec = spec
-                final_drop = drop
-                break
-            else:
-                # 载流量够，但压降太大，继续看下一条更大的线
-                upgrade_count += 1
-                continue
-                
         # 4. 构造返回结果
-        if selected_spec:
+        if selected_spec is not None:
             # 生成选型理由
             reason = "✅ 规格合适"
             if upgrade_count > 0:
                 reason = f"⚠️ 因长距离压降(>{max_drop}%)，已自动放大 {upgrade_count} 档规格"
             elif derating_factor < 1.0:
-                reason = f"🌡️ 已包含高温修正 ({ambient_temp}°C, 系数{derating_factor})"
+                reason = derating.reason_text(ambient_temp, derating_factors)
             
             return {
-                "size": selected_spec.size,
+                "size": table.sizes[selected_spec],
                 "drop": round(final_drop, 2),
                 "reason": reason,
-                "safe_ampacity": round(selected_spec.ampacity * derating_factor, 1) # 修正后的实际承载力
+                "safe_ampacity": round(table.ampacities[selected_spec] * derating_factor, 1), # 修正后的实际承载力
+                "derating": derating_factors
             }
         else:
             return {
                 "size": "Out of Range",
                 "drop": 0.0,
                 "reason": "❌ 负载过大或距离过长，超出数据库范围",
-                "safe_ampacity": 0
+                "safe_ampacity": 0,
+                "derating": derating_factors
             }
 
     @staticmethod
-    def check_fake(db: Session, size: str, measured: float, cable_type: str = 'bv') -> dict:
-        """防伪检测逻辑 (保持不变)"""
-        spec = db.query(CableSpec).filter(
-            CableSpec.size == size, 
-            CableSpec.insulation == cable_type, 
-            CableSpec.material == 'cu'          
-        ).first()
-
-        if not spec or not spec.weight_per_100m:
-            return {"pass": False, "risk": "warning", "msg": "规格库缺失"}
-
-        std = spec.weight_per_100m
-        ratio = measured / std
+    def recommend_mcb(amps: float, safe_ampacity: float) -> str:
+        """
+        推荐断路器 (MCB)
+        规则: IB < In < Iz (负载电流 < 开关 < 电缆修正后载流量)
+        """
+        mcb_val = math.ceil(amps * 1.2)
+        final_mcb = next((x for x in STANDARD_MCB if x >= mcb_val), mcb_val)
         
-        if ratio >= 0.95:
-            return {"pass": True, "risk": "safe", "msg": "✅ 正品标准"}
-        elif ratio >= 0.85:
-            return {"pass": False, "risk": "warning", "msg": "⚠️ 疑似非标线"}
-        else:
-            return {"pass": False, "risk": "danger", "msg": "🚫 极高风险：铜包铝/亏方"}
\ No newline at end of file
+        # 简单的安全检查: 选的开关不能大于电缆的实际载流量
+        if safe_ampacity > 0 and final_mcb > safe_ampacity:
+            return f"{final_mcb}A (⚠️注意: 接近电缆极限 {safe_ampacity}A)"
+        return f"{final_mcb}A"
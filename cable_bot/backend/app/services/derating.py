@@ -0,0 +1,238 @@
+# backend/app/services/derating.py
+"""
+降容系数 (IEC 60364-5-52)
+
+总系数 = 环境温度 × 并列回路 × 土壤热阻 × 谐波，每一项都是预编译数组上的一次查表:
+- 环境温度 (B.52.14 / B.52.15): 空气中按环境温度 (基准 30°C)，埋地按单独的土壤温度 (基准 20°C)；
+  PVC 最高 60°C，XLPE / EPR 最高 80°C，超出表格范围直接报错 (不再静默套用最后一档)
+- 并列回路 (B.52.17 / B.52.18): 按敷设方式 (穿管 / 桥架 / 直埋) 取表，回路数向上取档；
+  超出该敷设方式表格范围的回路数直接报错 (直埋 B.52.18 只到 6 回路)
+- 土壤热阻 (B.52.16): 仅直埋，基准 2.5 K·m/W
+- 三次谐波 (附录 E): 仅 380V 三相四线，谐波含量高时改按中性线电流选型
+这些系数只能乘在同一敷设位置的额定载流量上。规格库目前只有空气中的载流量，没有埋地 (参考方法 D) 的，
+所以直埋的系数可以查，但选型时直接报错，规格库补齐埋地载流量之前不拿空气中的载流量去套。
+step: 向上取到下一档 (保守，原有行为)；interpolate: 相邻两档线性插值 (温度、土壤热阻)。
+插值结果与总系数一律向下取到 3 位小数: 系数偏小只会让选型偏大，四舍五入可能把载流量算高。
+批量选型把所有回路的参数组成数组，一次 searchsorted / interp 算完。
+"""
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+# 绝缘类型 -> 降容表所用的绝缘材料
+INSULATION_MATERIAL = {"bv": "pvc", "yjv": "xlpe", "pvc": "pvc", "xlpe": "xlpe", "epr": "xlpe"}
+
+MODES = ("step", "interpolate")
+LOCATIONS = ("air", "ground")
+
+_TEMPS = (10, 15, 20, 25, 30, 35, 40, 45, 50, 55, 60, 65, 70, 75, 80)
+
+# (敷设位置, 绝缘材料) -> 各档温度的校正系数 (从 10°C 起，每 5°C 一档)
+CORRECTION_TABLES: Dict[Tuple[str, str], Tuple[float, ...]] = {
+    # B.52.14 空气温度 (基准 30°C)
+    ("air", "pvc"): (1.22, 1.17, 1.12, 1.06, 1.00, 0.94, 0.87, 0.79, 0.71, 0.61, 0.50),
+    ("air", "xlpe"): (1.15, 1.12, 1.08, 1.04, 1.00, 0.96, 0.91, 0.87, 0.82, 0.76, 0.71, 0.65, 0.58, 0.50, 0.41),
+    # B.52.15 土壤温度 (基准 20°C)
+    ("ground", "pvc"): (1.10, 1.05, 1.00, 0.95, 0.89, 0.84, 0.77, 0.71, 0.63, 0.55, 0.45),
+    ("ground", "xlpe"): (1.07, 1.04, 1.00, 0.96, 0.93, 0.89, 0.85, 0.80, 0.76, 0.71, 0.65, 0.60, 0.53, 0.46, 0.38),
+}
+
+# 预编译的查找数组 (只读)
+_COMPILED: Dict[Tuple[str, str], Tuple[np.ndarray, np.ndarray]] = {}
+for _key, _factors in CORRECTION_TABLES.items():
+    _t = np.array(_TEMPS[:len(_factors)], dtype=np.float64)
+    _f = np.array(_factors, dtype=np.float64)
+    _t.setflags(write=False)
+    _f.setflags(write=False)
+    _COMPILED[_key] = (_t, _f)
+
+
+# 敷设方式 -> 温度表位置
+INSTALLATIONS = {"conduit": "air", "tray": "air", "buried": "ground"}
+# 规格库有额定载流量的敷设位置 (目前只有空气中)
+RATED_LOCATIONS = frozenset({"air"})
+
+# 并列回路数档位与各敷设方式的系数 (表格没有的档位为 NaN，查到即超出范围)
+_GROUP_COUNTS = np.array((1, 2, 3, 4, 5, 6, 7, 8, 9, 12, 16, 20), dtype=np.float64)
+_NA = float("nan")
+GROUPING_TABLES: Dict[str, Tuple[float, ...]] = {
+    # B.52.17 成束穿管 / 线槽
+    "conduit": (1.00, 0.80, 0.70, 0.65, 0.60, 0.57, 0.54, 0.52, 0.50, 0.45, 0.41, 0.38),
+    # B.52.17 单层敷设于有孔桥架 (9 回路以上不再降低)
+    "tray": (1.00, 0.88, 0.82, 0.77, 0.75, 0.73, 0.73, 0.72, 0.72, 0.72, 0.72, 0.72),
+    # B.52.18 直埋并排 (电缆相互接触)，表格只到 6 回路
+    "buried": (1.00, 0.75, 0.65, 0.60, 0.55, 0.50, _NA, _NA, _NA, _NA, _NA, _NA),
+}
+# 各敷设方式表格覆盖的最大回路数
+MAX_GROUPED_CIRCUITS: Dict[str, int] = {
+    name: int(_GROUP_COUNTS[max(i for i, f in enumerate(factors) if f == f)])
+    for name, factors in GROUPING_TABLES.items()
+}
+# 敷设方式按固定顺序编号，批量计算时用整数下标选行
+_INSTALLATION_ORDER = tuple(INSTALLATIONS)
+_GROUPING_MATRIX = np.array([GROUPING_TABLES[k] for k in _INSTALLATION_ORDER], dtype=np.float64)
+_GROUPING_MATRIX.setflags(write=False)
+
+# 土壤热阻系数 (K·m/W) -> 直埋电缆校正系数
+_SOIL_RESISTIVITY = np.array((0.5, 0.7, 1.0, 1.5, 2.0, 2.5, 3.0), dtype=np.float64)
+_SOIL_FACTORS = np.array((1.88, 1.62, 1.50, 1.28, 1.12, 1.00, 0.90), dtype=np.float64)
+REFERENCE_SOIL_RESISTIVITY = 2.5
+REFERENCE_SOIL_TEMPERATURE = 20.0
+
+
+class DeratingError(ValueError):
+    """温度超出降容表范围 / 参数不支持"""
+
+
+def _floor3(values) -> np.ndarray:
+    """向下取 3 位小数 (加一个远小于 0.001 的量，避免 0.87 这类值因二进制误差被取成 0.869)"""
+    return np.floor(np.asarray(values, dtype=np.float64) * 1000 + 1e-6) / 1000
+
+
+def _lookup(cable_type: str, location: str) -> Tuple[np.ndarray, np.ndarray]:
+    insulation = INSULATION_MATERIAL.get(cable_type)
+    if insulation is None:
+        raise DeratingError(f"不支持的绝缘类型: {cable_type}")
+    if location not in LOCATIONS:
+        raise DeratingError(f"不支持的敷设位置: {location}")
+    return _COMPILED[(location, insulation)]
+
+
+def temperature_range(cable_type: str, location: str = "air") -> Tuple[float, float]:
+    temps, _ = _lookup(cable_type, location)
+    return float(temps[0]), float(temps[-1])
+
+
+def temperature_factors(cable_type: str, temps, mode: str = "step", location: str = "air") -> np.ndarray:
+    """
+    向量化查表: 返回与 temps 等长的系数数组，超出表格范围 (或 NaN) 的位置为 NaN。
+    插值结果向下取 3 位小数，单条与批量走同一路径，结果逐位一致。
+    """
+    if mode not in MODES:
+        raise DeratingError(f"不支持的降容模式: {mode}")
+    table_t, table_f = _lookup(cable_type, location)
+    t = np.asarray(temps, dtype=np.float64)
+    in_range = (t >= table_t[0]) & (t <= table_t[-1])
+    if mode == "step":
+        idx = np.searchsorted(table_t, t, side="left")
+        factors = table_f[np.minimum(idx, len(table_f) - 1)]
+    else:
+        factors = _floor3(np.interp(t, table_t, table_f))
+    return np.where(in_range, factors, np.nan)
+
+
+def temperature_factor(cable_type: str, temp: float, mode: str = "step", location: str = "air") -> float:
+    """单条查表，超出范围抛 DeratingError"""
+    factor = float(temperature_factors(cable_type, [temp], mode, location)[0])
+    if factor != factor:
+        low, high = temperature_range(cable_type, location)
+        raise DeratingError(f"环境温度 {temp}°C 超出 {cable_type.upper()} 降容表范围 ({low:g}~{high:g}°C)")
+    return factor
+
+
+def grouping_factors(installations, circuits) -> np.ndarray:
+    """并列回路系数 (回路数向上取档，超出该敷设方式表格范围为 NaN)"""
+    rows = np.array([_INSTALLATION_ORDER.index(i) for i in installations], dtype=np.int64)
+    n = np.asarray(circuits, dtype=np.float64)
+    idx = np.searchsorted(_GROUP_COUNTS, n, side="left")
+    factors = _GROUPING_MATRIX[rows, np.minimum(idx, len(_GROUP_COUNTS) - 1)]
+    return np.where((n >= 1) & (n <= _GROUP_COUNTS[-1]), factors, np.nan)
+
+
+def soil_factors(resistivity, mode: str = "step") -> np.ndarray:
+    """土壤热阻系数 (step 取更大的热阻档，偏保守；超出 0.5~3 K·m/W 为 NaN)"""
+    r = np.asarray(resistivity, dtype=np.float64)
+    if mode == "step":
+        idx = np.searchsorted(_SOIL_RESISTIVITY, r, side="left")
+        factors = _SOIL_FACTORS[np.minimum(idx, len(_SOIL_FACTORS) - 1)]
+    else:
+        factors = _floor3(np.interp(r, _SOIL_RESISTIVITY, _SOIL_FACTORS))
+    return np.where((r >= _SOIL_RESISTIVITY[0]) & (r <= _SOIL_RESISTIVITY[-1]), factors, np.nan)
+
+
+def harmonic_factors(percent, three_phase) -> np.ndarray:
+    """
+    三次谐波系数 (附录 E，表示为相电流所需载流量的折算系数):
+    ≤15% 不修正；15~33% 取 0.86；33~45% 按中性线电流 (3h·I) 选型再乘 0.86；>45% 按中性线电流选型。
+    单相回路中性线电流等于相电流，不修正。
+    """
+    h = np.asarray(percent, dtype=np.float64)
+    neutral_ratio = np.maximum(3 * h / 100, 1e-9)
+    factors = np.select(
+        [h <= 15, h <= 33, h <= 45],
+        [1.0, 0.86, 0.86 / neutral_ratio],
+        1.0 / neutral_ratio
+    )
+    return np.where(np.asarray(three_phase, dtype=bool), _floor3(factors), 1.0)
+
+
+def derate(cable_type: str, mode: str, temps, installations, circuits, soil_resistivity,
+           harmonics_percent, three_phase, soil_temps=REFERENCE_SOIL_TEMPERATURE) -> Dict[str, np.ndarray]:
+    """
+    向量化降容流水线: 各参数为等长数组 (或标量)，返回各分项系数与总系数。
+    temps 为空气温度，soil_temps 为土壤温度 (仅直埋)。
+    任一分项超出表格范围、或规格库没有该敷设位置的载流量时总系数为 NaN，由调用方用 describe_error 生成错误信息。
+    """
+    temps = np.asarray(temps, dtype=np.float64)
+    locations = np.array([INSTALLATIONS[i] for i in installations])
+    temperature = np.where(
+        locations == "ground",
+        temperature_factors(cable_type, soil_temps, mode, "ground"),
+        temperature_factors(cable_type, temps, mode, "air")
+    )
+    grouping = grouping_factors(installations, circuits)
+    soil = np.where(locations == "ground", soil_factors(soil_resistivity, mode), 1.0)
+    harmonics = harmonic_factors(harmonics_percent, three_phase)
+    rated = np.isin(locations, list(RATED_LOCATIONS))
+    total = np.where(rated, _floor3(temperature * grouping * soil * harmonics), np.nan)
+    return {"temperature": temperature, "grouping": grouping, "soil": soil, "harmonics": harmonics, "total": total}
+
+
+def describe_error(cable_type: str, temp: float, installation: str, circuits: int,
+                   soil_resistivity: float, factors: Dict[str, float],
+                   soil_temp: float = REFERENCE_SOIL_TEMPERATURE) -> Optional[str]:
+    """单条回路为什么不能选型 (规格库缺该敷设位置的载流量 / 哪一项超出了降容表)，都正常返回 None"""
+    location = INSTALLATIONS[installation]
+    if location not in RATED_LOCATIONS:
+        return f"规格库只有空气中敷设的载流量，没有埋地 (参考方法 D) 载流量，暂不支持 {installation} 敷设选型"
+    if factors["temperature"] != factors["temperature"]:
+        low, high = temperature_range(cable_type, location)
+        if location == "ground":
+            return f"土壤温度 {soil_temp}°C 超出 {cable_type.upper()} 降容表范围 ({low:g}~{high:g}°C)"
+        return f"环境温度 {temp}°C 超出 {cable_type.upper()} 降容表范围 ({low:g}~{high:g}°C)"
+    if factors["grouping"] != factors["grouping"]:
+        return f"并列回路数 {circuits} 超出 {installation} 敷设的降容表范围 (1~{MAX_GROUPED_CIRCUITS[installation]})"
+    if factors["soil"] != factors["soil"]:
+        return f"土壤热阻 {soil_resistivity} K·m/W 超出降容表范围 ({_SOIL_RESISTIVITY[0]:g}~{_SOIL_RESISTIVITY[-1]:g})"
+    return None
+
+
+def derating_breakdown(cable_type: str, temp: float, mode: str = "step", installation: str = "conduit",
+                       circuits: int = 1, soil_resistivity: float = REFERENCE_SOIL_RESISTIVITY,
+                       harmonics_percent: float = 0.0, three_phase: bool = False,
+                       soil_temperature: float = REFERENCE_SOIL_TEMPERATURE) -> Dict[str, float]:
+    """单条回路的降容分项 (与批量同一路径)，超出范围或无法选型时抛 DeratingError"""
+    arrays = derate(cable_type, mode, [temp], [installation], [circuits], [soil_resistivity],
+                    [harmonics_percent], [three_phase], [soil_temperature])
+    factors = {k: float(v[0]) for k, v in arrays.items()}
+    error = describe_error(cable_type, temp, installation, circuits, soil_resistivity, factors, soil_temperature)
+    if error:
+        raise DeratingError(error)
+    return factors
+
+
+def temperature_only(factor: float) -> Dict[str, float]:
+    """只有温度修正时的分项 (其余各项为 1)"""
+    return {"temperature": factor, "grouping": 1.0, "soil": 1.0, "harmonics": 1.0, "total": factor}
+
+
+def reason_text(ambient_temp: float, factors: Dict[str, float]) -> str:
+    """选型理由中的降容说明: 只有温度修正时沿用原文案"""
+    total = factors["total"]
+    if all(factors[k] == 1.0 for k in ("grouping", "soil", "harmonics")):
+        return f"🌡️ 已包含高温修正 ({ambient_temp}°C, 系数{total})"
+    parts = [f"温度{factors['temperature']}"]
+    for key, label in (("grouping", "并列"), ("soil", "土壤"), ("harmonics", "谐波")):
+        if factors[key] != 1.0:
+            parts.append(f"{label}{factors[key]}")
+    return f"📉 已包含综合降容 ({' × '.join(parts)} = 系数{total})"
@@ -0,0 +1,327 @@
+# backend/app/services/feeder_tree.py
+"""
+多级配电树: 累计压降计算与逐段选型 (总进线 -> 分配电箱 -> 末端回路)
+
+每个节点 = 从上级到本节点的一段电缆 + 本节点自身的负载 (根节点的长度为进线电缆，0 表示直接接母排)。
+- 阻抗模型: R = ρ·L / S，X = x·L (单位长度电抗按绝缘类型取低压电缆典型值)
+  分段压降 ΔU = k·(R·P + X·Q) / U，P / Q 为该段下游全部负载的有功 / 无功之和 (三相 k=1，单相来回线 k=2)
+  节点累计压降 = 根到该节点路径上各段压降之和
+- 压降预算自上而下分配，下游用不完的余量留给上游:
+  先自下而上算出每段以下的两种压降: 全部用最大规格时的下限、全部只按载流量选最小规格时的压降；
+  段 i 可用压降 = 允许压降 - 上游实际累计压降，
+  预算 = min(可用 - 下游下限, max(可用 × 本段长度 / 到最远末端的长度, 可用 - 下游按载流量选型的压降, 本段下限))，
+  不超过 "可用 - 下游下限" 就保证下游总还有可行解，所以只有任何分配都满足不了时才会标记 Out of Range
+  (载流量不够，或这条路径全用最大规格仍超压降)
+- 每段选同时满足载流量 (含温度降容) 与本段预算的最小规格
+- 修改负载时只沿 该节点 -> 根 的路径更新 P / Q 与下游压降，再自上而下重新选型:
+  路径上的段，加上上级累计压降有变化的段 (按层向量化，累计压降没变的子树整棵跳过)
+配电树只保存在当前进程的 LRU 里 (多 worker 部署时 PATCH 可能落到别的 worker，404 时重新提交即可)。
+"""
+import math
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from app.services import derating
+from app.services.result_cache import LRUCache
+from app.services.spec_catalog import SpecCatalog
+
+MAX_TREE_NODES = 20000
+MAX_TREES = 256
+TREE_TTL_SECONDS = 4 * 3600.0
+
+# 电阻率 (Ω·mm²/m)，与 ElectricalCalculator.voltage_drop_for_size 一致
+RESISTIVITY = {"cu": 0.0175, "al": 0.028}
+# 单位长度电抗 (Ω/m)
+REACTANCE = {"yjv": 0.08e-3, "bv": 0.1e-3}
+DEFAULT_REACTANCE = 0.08e-3
+
+
+class FeederTreeError(ValueError):
+    """配电树结构或参数不合法"""
+
+
+def _reactive(p: float, power_factor: float) -> float:
+    return p * math.tan(math.acos(power_factor))
+
+
+class FeederTree:
+    """一棵配电树的全部状态 (数组下标 = DFS 先序位置)"""
+
+    def __init__(self, catalog: SpecCatalog, nodes: List[Any], voltage: str, material: str, cable_type: str,
+                 max_drop: float, power_factor: float, temperature: float, derating_mode: str = "step"):
+        table = catalog.get(material, cable_type)
+        if table is None or not len(table):
+            raise FeederTreeError(f"规格库缺少 {material}/{cable_type}")
+        if len(nodes) > MAX_TREE_NODES:
+            raise FeederTreeError(f"单棵树最多 {MAX_TREE_NODES} 个节点")
+        self.tree_id = uuid.uuid4().hex
+        self.catalog_version = catalog.version
+        self.table = table
+        self.voltage, self.material, self.cable_type = voltage, material, cable_type
+        self.max_drop = max_drop
+        self.factor = derating.temperature_factor(cable_type, temperature, derating_mode)
+        self.u = 380.0 if voltage == "380v" else 220.0
+        self.k = 1.0 if voltage == "380v" else 2.0
+        self.rho = RESISTIVITY[material]
+        self.reactance = REACTANCE.get(cable_type, DEFAULT_REACTANCE)
+        self.area = table.size_array
+        self.ampacity = table.ampacity_array
+
+        by_id = {}
+        for node in nodes:
+            if node.id in by_id:
+                raise FeederTreeError(f"节点 id 重复: {node.id}")
+            by_id[node.id] = node
+        children: Dict[Optional[str], List[str]] = {}
+        for node in nodes:
+            if node.parent is not None and node.parent not in by_id:
+                raise FeederTreeError(f"节点 {node.id} 的上级 {node.parent} 不存在")
+            children.setdefault(node.parent, []).append(node.id)
+        roots = children.get(None, [])
+        if len(roots) != 1:
+            raise FeederTreeError("必须有且只有一个根节点 (parent 为空)")
+        order, stack = [], [roots[0]]
+        while stack:
+            nid = stack.pop()
+            order.append(nid)
+            stack.extend(reversed(children.get(nid, [])))
+        if len(order) != len(nodes):
+            raise FeederTreeError("存在环路或与根节点不连通的节点")
+
+        n = len(order)
+        self.ids = order
+        self.index = {nid: i for i, nid in enumerate(order)}
+        self.parent = [self.index[by_id[nid].parent] if by_id[nid].parent is not None else -1 for nid in order]
+        self.length = np.array([float(by_id[nid].length) for nid in order])
+        self.pf = np.array([by_id[nid].power_factor or power_factor for nid in order])
+        self.load_p = np.array([float(by_id[nid].load_kw) * 1000 for nid in order])
+        self.load_q = np.array([_reactive(p, pf) for p, pf in zip(self.load_p, self.pf)])
+
+        # 子树大小 / 下游负载 / 到根距离 / 下游最远末端距离 / 深度
+        size = np.ones(n, dtype=np.int64)
+        self.sub_p, self.sub_q = self.load_p.copy(), self.load_q.copy()
+        dist = self.length.copy()
+        depth = np.zeros(n, dtype=np.int64)
+        self.children: List[List[int]] = [[] for _ in range(n)]
+        for i in range(1, n):
+            dist[i] += dist[self.parent[i]]
+            depth[i] = depth[self.parent[i]] + 1
+            self.children[self.parent[i]].append(i)
+        farthest = dist.copy()
+        for i in range(n - 1, 0, -1):
+            p = self.parent[i]
+            size[p] += size[i]
+            self.sub_p[p] += self.sub_p[i]
+            self.sub_q[p] += self.sub_q[i]
+            farthest[p] = max(farthest[p], farthest[i])
+        self.end = (np.arange(n) + size).tolist()
+        self.is_leaf = size == 1
+        self.depth = depth
+        self.parent_ix = np.array(self.parent, dtype=np.int64)
+        # 本段起点到最远末端的长度 (按长度分摊预算用)
+        self.reach = farthest - dist + self.length
+        order_by_depth = np.argsort(depth, kind="stable")
+        self.levels = np.split(order_by_depth, np.flatnonzero(np.diff(depth[order_by_depth])) + 1)
+
+        self.current = np.zeros(n)
+        self.drop_min = np.zeros(n)     # 本段用最大规格时的压降
+        self.drop_amp = np.zeros(n)     # 本段只按载流量选最小规格时的压降
+        self.down_min = np.zeros(n)     # 本节点以下到最差末端的压降下限
+        self.down_amp = np.zeros(n)     # 本节点以下全部只按载流量选型时到最差末端的压降
+        self._bounds(np.arange(n))
+        for i in range(n - 1, 0, -1):
+            p = self.parent[i]
+            self.down_min[p] = max(self.down_min[p], self.drop_min[i] + self.down_min[i])
+            self.down_amp[p] = max(self.down_amp[p], self.drop_amp[i] + self.down_amp[i])
+
+        self.budget = np.zeros(n)
+        self.sel = np.full(n, -1, dtype=np.int64)
+        self.seg_drop = np.zeros(n)
+        self.cum = np.zeros(n)
+        for level in self.levels:
+            self._select(level)
+        self.updates = 0
+
+    def _segments(self, ix: np.ndarray):
+        """给定段的电流、各档规格的分段压降矩阵、各档载流量是否满足"""
+        p, q = self.sub_p[ix], self.sub_q[ix]
+        s = np.hypot(p, q)
+        current = s / (380 * 1.732) if self.voltage == "380v" else s / 220
+        length = self.length[ix]
+        r = self.rho * length[:, None] / self.area[None, :]
+        x = self.reactance * length[:, None]
+        drops = self.k * (r * p[:, None] + x * q[:, None]) / self.u ** 2 * 100
+        amp_ok = self.ampacity[None, :] >= (current / self.factor)[:, None]
+        return current, drops, amp_ok
+
+    def _bounds(self, ix: np.ndarray) -> None:
+        """重新计算给定段的电流与两种压降 (最大规格 / 只按载流量选型，载流量不够时同样按最大规格)"""
+        current, drops, amp_ok = self._segments(ix)
+        rows = np.arange(len(ix))
+        amp_sel = np.where(amp_ok.any(axis=1), amp_ok.argmax(axis=1), len(self.area) - 1)
+        self.current[ix] = current
+        self.drop_min[ix] = drops[:, -1]
+        self.drop_amp[ix] = drops[rows, amp_sel]
+
+    def _downstream(self, i: int) -> None:
+        kids = self.children[i]
+        if kids:
+            self.down_min[i] = (self.drop_min[kids] + self.down_min[kids]).max()
+            self.down_amp[i] = (self.drop_amp[kids] + self.down_amp[kids]).max()
+
+    def _select(self, ix: np.ndarray) -> np.ndarray:
+        """给定段 (上级已选型) 分配预算并选型，更新累计压降，返回累计压降有变化的段"""
+        _, drops, amp_ok = self._segments(ix)
+        parent = self.parent_ix[ix]
+        upstream = np.where(parent >= 0, self.cum[np.maximum(parent, 0)], 0.0)
+        avail = self.max_drop - upstream
+        reach = self.reach[ix]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            share = np.where(reach > 0, avail * self.length[ix] / reach, avail)
+        wanted = np.maximum(np.maximum(share, avail - self.down_amp[ix]), self.drop_min[ix])
+        budget = np.minimum(avail - self.down_min[ix], wanted)
+        ok = amp_ok & (drops <= budget[:, None])
+        found = ok.any(axis=1)
+        sel = np.where(found, ok.argmax(axis=1), -1)
+        # 无可行解: 按最后一档规格算压降 (与下游下限的假设一致，该段标记 Out of Range)
+        seg_drop = drops[np.arange(len(ix)), np.where(found, sel, len(self.area) - 1)]
+
+        cum = upstream + seg_drop
+        changed = ix[cum != self.cum[ix]]
+        self.budget[ix] = budget
+        self.sel[ix] = sel
+        self.seg_drop[ix] = seg_drop
+        self.cum[ix] = cum
+        return changed
+
+    def update_loads(self, changes: List[Any]) -> List[int]:
+        """修改节点负载，返回路径上的段与规格有变化的段的下标"""
+        for change in changes:
+            if change.id not in self.index:
+                raise FeederTreeError(f"节点不存在: {change.id}")
+        touched = set()
+        for change in changes:
+            i = self.index[change.id]
+            if change.power_factor is not None:
+                self.pf[i] = change.power_factor
+            p = float(change.load_kw) * 1000
+            q = _reactive(p, self.pf[i])
+            dp, dq = p - self.load_p[i], q - self.load_q[i]
+            self.load_p[i], self.load_q[i] = p, q
+            while i >= 0:
+                self.sub_p[i] += dp
+                self.sub_q[i] += dq
+                touched.add(i)
+                i = self.parent[i]
+
+        path = np.array(sorted(touched), dtype=np.int64)
+        self._bounds(path)
+        # 下标大的先算: 子节点总在上级之后
+        for i in reversed(path.tolist()):
+            self._downstream(i)
+
+        # 自上而下逐层: 路径上的段 + 上级累计压降变了的段
+        old_sel = self.sel.copy()
+        pending: Dict[int, set] = {}
+        for i in touched:
+            pending.setdefault(int(self.depth[i]), set()).add(i)
+        visited = set()
+        depth = 0
+        while pending:
+            level = pending.pop(depth, None)
+            depth += 1
+            if not level:
+                continue
+            ix = np.array(sorted(level), dtype=np.int64)
+            visited.update(level)
+            for i in self._select(ix).tolist():
+                if self.children[i]:
+                    pending.setdefault(depth, set()).update(self.children[i])
+        self.updates += 1
+        return sorted(touched | {i for i in visited if self.sel[i] != old_sel[i]})
+
+    # --- 输出 ---
+    def node_result(self, i: int) -> Dict[str, Any]:
+        cable = bool(self.length[i] > 0)
+        sel = int(self.sel[i])
+        size = None
+        if cable:
+            size = self.table.sizes[sel] if sel >= 0 else "Out of Range"
+        p = self.parent[i]
+        return {
+            "id": self.ids[i],
+            "parent": self.ids[p] if p >= 0 else None,
+            "length": float(self.length[i]),
+            "load_kw": round(float(self.load_p[i]) / 1000, 3),
+            "downstream_kw": round(float(self.sub_p[i]) / 1000, 3),
+            "current_amps": round(float(self.current[i]), 2),
+            "size": size,
+            "safe_ampacity": round(self.table.ampacities[sel] * self.factor, 1) if cable and sel >= 0 else None,
+            "segment_drop_percent": round(float(self.seg_drop[i]), 3),
+            "cumulative_drop_percent": round(float(self.cum[i]), 3),
+            "budget_percent": round(float(self.budget[i]), 3) if cable else None,
+            "is_leaf": bool(self.is_leaf[i]),
+        }
+
+    def summary(self) -> Dict[str, Any]:
+        worst = int(np.argmax(self.cum))
+        out_of_range = int(np.count_nonzero((self.length > 0) & (self.sel < 0)))
+        worst_drop = float(self.cum[worst])
+        return {
+            "nodes": len(self.ids),
+            "leaves": int(self.is_leaf.sum()),
+            "total_load_kw": round(float(self.sub_p[0]) / 1000, 3),
+            "main_current_amps": round(float(self.current[0]), 2),
+            "worst_node": self.ids[worst],
+            "worst_drop_percent": round(worst_drop, 3),
+            "max_voltage_drop": self.max_drop,
+            "out_of_range_segments": out_of_range,
+            "ok": out_of_range == 0 and worst_drop <= self.max_drop + 1e-9,
+            "updates": self.updates,
+        }
+
+    def result(self) -> Dict[str, Any]:
+        return {
+            "tree_id": self.tree_id,
+            "catalog_version": self.catalog_version,
+            "voltage_type": self.voltage,
+            "material": self.material,
+            "cable_type": self.cable_type,
+            "temperature_factor": self.factor,
+            "summary": self.summary(),
+            "nodes": [self.node_result(i) for i in range(len(self.ids))],
+        }
+
+
+_trees = LRUCache("feeder_trees", MAX_TREES, TREE_TTL_SECONDS)
+
+
+def create_tree(catalog: SpecCatalog, request) -> FeederTree:
+    """按请求建树、全量计算并保存 (request 为 FeederTreeRequest)"""
+    tree = FeederTree(
+        catalog, request.nodes, request.voltage_type, request.material, request.cable_type,
+        request.max_voltage_drop, request.power_factor, request.temperature, request.derating_mode
+    )
+    _trees.put(tree.tree_id, tree)
+    return tree
+
+
+def get_tree(tree_id: str) -> Optional[FeederTree]:
+    return _trees.get(tree_id)
+
+
+def update_tree(tree: FeederTree, changes: List[Any]) -> Dict[str, Any]:
+    started = time.perf_counter()
+    touched = tree.update_loads(changes)
+    elapsed = (time.perf_counter() - started) * 1000
+    # 写回以刷新 LRU 顺序与过期时间
+    _trees.put(tree.tree_id, tree)
+    return {
+        "tree_id": tree.tree_id,
+        "elapsed_ms": round(elapsed, 3),
+        "summary": tree.summary(),
+        "changed": [tree.node_result(i) for i in touched],
+    }
@@ -0,0 +1,201 @@
+# backend/app/services/offline_table.py
+"""
+离线选型查找表 (现场无信号时前端直接查表)
+
+选型结果 = max(载流量下标, 压降下标)，两者互相独立，所以整张决策空间可以拆成两组小表:
+- 载流量表: (材质, 绝缘, 温度档) × 电流网格 -> 第一个满足 I / 温度系数 的规格下标
+- 压降表:   (材质, 绝缘, 电压, 允许压降) × 电流·距离 网格 -> 第一个压降合格的规格下标
+网格按对数等比划分 (相邻两格相差 GRID_RATIO)，输入值向上取到网格点，只会选大不会选小。
+温度档即 step 模式的 5°C 档，所以温度这一维是精确的；只覆盖默认敷设条件 (单回路穿管、无谐波)。
+
+二进制格式: MAGIC + 格式版本 (u8) + 表头长度 (u32 LE) + 表头 JSON + zlib 压缩的 uint8 数组。
+表头里带规格目录版本、网格参数、各规格表的截面 / 载流量 / 温度系数，客户端解压后按下标直接取值。
+"""
+import json
+import math
+import struct
+import threading
+import zlib
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.services import derating
+from app.services.calc_logic import ElectricalCalculator
+from app.services.spec_catalog import SpecCatalog
+
+MAGIC = b"WCST"
+FORMAT_VERSION = 1
+
+VOLTAGES = ("220v", "380v")
+# 可离线查询的允许压降 (%)，其它值向下取最近一档 (更严格)
+MAX_DROPS = (2.5, 3.0, 4.0, 5.0, 6.0, 7.0)
+TEMPERATURES = tuple(float(t) for t in range(10, 85, 5))
+
+GRID_RATIO = 1.01
+CURRENT_GRID = (0.1, 2000.0)        # A
+MOMENT_GRID = (1.0, 2000000.0)      # 电流 × 距离 (A·m)
+
+# 下标用 uint8 存储，规格数不能超过 254 (255 保留)
+MAX_SPECS = 254
+
+
+def _grid(low: float, high: float) -> np.ndarray:
+    count = int(math.ceil(math.log(high / low) / math.log(GRID_RATIO))) + 1
+    return low * GRID_RATIO ** np.arange(count, dtype=np.float64)
+
+
+def grid_index(value: float, low: float, count: int) -> Optional[int]:
+    """值 -> 不小于它的网格点下标 (超出网格返回 None)"""
+    if value <= low:
+        return 0
+    k = int(math.ceil(math.log(value / low) / math.log(GRID_RATIO) - 1e-9))
+    return k if k < count else None
+
+
+class SizingTable:
+    """一份构建好的查找表 (不可变)，binary 为下发给客户端的字节"""
+
+    def __init__(self, catalog: SpecCatalog):
+        self.catalog_version = catalog.version
+        self.current_grid = _grid(*CURRENT_GRID)
+        self.moment_grid = _grid(*MOMENT_GRID)
+        self.keys: List[Tuple[str, str]] = sorted(
+            key for key, table in catalog.tables.items() if table.monotone and 0 < len(table) <= MAX_SPECS
+        )
+        self.tables = [catalog.get(*key) for key in self.keys]
+
+        ampacity, drop, meta = [], [], []
+        for (material, insulation), table in zip(self.keys, self.tables):
+            factors = derating.temperature_factors(insulation, TEMPERATURES, "step", "air")
+            for f in factors:
+                if f != f:
+                    # 该绝缘不支持的温度档: 整行标记为超出范围
+                    ampacity.append(np.full(len(self.current_grid), len(table), dtype=np.uint8))
+                else:
+                    ampacity.append(np.searchsorted(table.ampacity_array, self.current_grid / f, side="left").astype(np.uint8))
+            rho = 0.0175 if material == "cu" else 0.028
+            for voltage in VOLTAGES:
+                factor = 1.732 if voltage == "380v" else 2.0
+                v_base = 380 if voltage == "380v" else 220
+                # 每个网格点在每个规格上的压降 (与 voltage_drop_for_size 相同公式)
+                drops = ((factor * self.moment_grid[:, None] * rho) / table.size_array[None, :]) / v_base * 100
+                for max_drop in MAX_DROPS:
+                    ok = drops <= max_drop
+                    first = np.where(ok.any(axis=1), ok.argmax(axis=1), len(table))
+                    drop.append(first.astype(np.uint8))
+            meta.append({
+                "material": material,
+                "insulation": insulation,
+                "sizes": list(table.sizes),
+                "size_values": list(table.size_values),
+                "ampacities": list(table.ampacities),
+                "temp_factors": [None if f != f else float(f) for f in factors],
+            })
+
+        self.ampacity_index = np.array(ampacity, dtype=np.uint8).reshape(
+            len(self.keys), len(TEMPERATURES), len(self.current_grid)
+        )
+        self.drop_index = np.array(drop, dtype=np.uint8).reshape(
+            len(self.keys), len(VOLTAGES), len(MAX_DROPS), len(self.moment_grid)
+        )
+        self.generated_at = datetime.now()
+
+        header = {
+            "catalog_version": self.catalog_version,
+            "generated_at": self.generated_at.strftime("%Y-%m-%d %H:%M:%S"),
+            "grid_ratio": GRID_RATIO,
+            "current_grid": {"min": CURRENT_GRID[0], "count": len(self.current_grid)},
+            "moment_grid": {"min": MOMENT_GRID[0], "count": len(self.moment_grid)},
+            "temperatures": list(TEMPERATURES),
+            "voltages": list(VOLTAGES),
+            "max_drops": list(MAX_DROPS),
+            "tables": meta,
+            # 解压后的布局: 载流量表 [规格表][温度档][电流格]，紧接着压降表 [规格表][电压][压降档][电流·距离格]
+            "ampacity_bytes": int(self.ampacity_index.size),
+            "drop_bytes": int(self.drop_index.size),
+        }
+        header_bytes = json.dumps(header, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        payload = zlib.compress(self.ampacity_index.tobytes() + self.drop_index.tobytes(), 9)
+        self.binary = MAGIC + struct.pack("<BI", FORMAT_VERSION, len(header_bytes)) + header_bytes + payload
+        self.etag = f'"{self.catalog_version}-{FORMAT_VERSION}"'
+
+    def lookup(self, current: float, material: str, cable_type: str, distance: float,
+               voltage: str, max_drop: float, ambient_temp: float) -> Optional[Dict[str, Any]]:
+        """
+        O(1) 查表选型 (结果格式同 smart_select_cable)。
+        参数不在表覆盖范围内 (规格表、温度、压降档、网格) 时返回 None，由调用方回退到实时计算。
+        """
+        try:
+            t = self.keys.index((material, cable_type))
+        except ValueError:
+            return None
+        table = self.tables[t]
+        drops_below = [i for i, d in enumerate(MAX_DROPS) if d <= max_drop]
+        if not TEMPERATURES[0] <= ambient_temp <= TEMPERATURES[-1] or not drops_below or current <= 0:
+            return None
+        band = int(np.searchsorted(TEMPERATURES, ambient_temp, side="left"))
+        factor = derating.temperature_factors(cable_type, [ambient_temp], "step", "air")[0]
+        ci = grid_index(current, CURRENT_GRID[0], len(self.current_grid))
+        mi = grid_index(current * distance, MOMENT_GRID[0], len(self.moment_grid))
+        if factor != factor or ci is None or mi is None:
+            return None
+        factor = float(factor)
+
+        n = len(table)
+        i_amp = int(self.ampacity_index[t, band, ci])
+        j = max(i_amp, int(self.drop_index[t, VOLTAGES.index(voltage), drops_below[-1], mi]))
+        if j >= n:
+            return {"size": "Out of Range", "drop": 0.0, "reason": "❌ 负载过大或距离过长，超出数据库范围",
+                    "safe_ampacity": 0, "derating": derating.temperature_only(factor)}
+        drop = ElectricalCalculator.voltage_drop_for_size(current, distance, table.size_values[j], material, voltage)
+        reason = "✅ 规格合适"
+        if j > i_amp:
+            reason = f"⚠️ 因长距离压降(>{max_drop}%)，已自动放大 {j - i_amp} 档规格"
+        elif factor < 1.0:
+            reason = derating.reason_text(ambient_temp, derating.temperature_only(factor))
+        return {
+            "size": table.sizes[j],
+            "drop": round(drop, 2),
+            "reason": reason,
+            "safe_ampacity": round(table.ampacities[j] * factor, 1),
+            "derating": derating.temperature_only(factor),
+        }
+
+
+_table: Optional[SizingTable] = None
+_build_lock = threading.Lock()
+
+
+def get_table(catalog: SpecCatalog) -> SizingTable:
+    """当前目录版本对应的查找表 (按需构建，目录换版本后下次访问重建)"""
+    global _table
+    table = _table
+    if table is None or table.catalog_version != catalog.version:
+        with _build_lock:
+            if _table is None or _table.catalog_version != catalog.version:
+                _table = SizingTable(catalog)
+            table = _table
+    return table
+
+
+if __name__ == "__main__":
+    # 构建步骤: python -m app.services.offline_table [输出文件]，可把表随前端一起打包
+    # 默认输出到 RUNTIME_DIR/sizing_table.bin
+    import os
+    import sys
+    from app.core import config
+    from app.models.database import SessionLocal
+    from app.services import spec_catalog
+
+    out_path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(config.RUNTIME_DIR, "sizing_table.bin")
+    os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+    db = SessionLocal()
+    try:
+        built = SizingTable(spec_catalog.build_catalog(db))
+    finally:
+        db.close()
+    with open(out_path, "wb") as f:
+        f.write(built.binary)
+    print(f"✅ 查找表已生成: {out_path} ({len(built.binary) / 1024:.1f} KB, 目录版本 {built.catalog_version})")
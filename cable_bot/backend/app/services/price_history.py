@@ -0,0 +1,151 @@
+# backend/app/services/price_history.py
+"""
+铜价历史 (OHLC 汇总 + 分级保留)
+
+copper_prices 每小时一条、只增不减，而图表只需要按时/日/周的开高低收。
+定时任务每写入一条原始价格，就在同一事务里把它累加进 1h / 1d / 1w 三个汇总桶；
+历史接口只查汇总表 (按 (interval, bucket_start) 索引做区间扫描)，不扫原始记录。
+保留策略: 原始记录只留最近 PRICE_RAW_RETENTION_DAYS 天，1h 汇总留 PRICE_HOURLY_RETENTION_DAYS 天，
+1d / 1w 汇总永久保留。
+"""
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core import config
+from app.models.tables import CopperPrice, CopperPriceRollup
+
+INTERVALS = ("1h", "1d", "1w")
+
+# 未指定起止时间时默认返回的时间跨度
+DEFAULT_SPANS = {
+    "1h": timedelta(days=7),
+    "1d": timedelta(days=365),
+    "1w": timedelta(days=5 * 365),
+}
+
+# 单次最多返回的桶数 (超出时只返回最近的 MAX_POINTS 个，并标记 truncated)
+MAX_POINTS = 5000
+
+
+def bucket_start(ts: datetime, interval: str) -> datetime:
+    """时间戳所在汇总桶的起点 (周以周一 00:00 为起点)"""
+    if interval == "1h":
+        return ts.replace(minute=0, second=0, microsecond=0)
+    day = ts.replace(hour=0, minute=0, second=0, microsecond=0)
+    if interval == "1d":
+        return day
+    if interval == "1w":
+        return day - timedelta(days=day.weekday())
+    raise ValueError(f"Unknown interval: {interval}")
+
+
+def _merge(bucket: CopperPriceRollup, record: CopperPrice) -> None:
+    """把一条原始记录并入汇总桶 (记录可能乱序到达)"""
+    ts = record.timestamp
+    if bucket.samples == 0 or bucket.first_sample_at is None:
+        bucket.open_usd = bucket.high_usd = bucket.low_usd = bucket.close_usd = record.price_usd
+        bucket.open_cny = bucket.high_cny = bucket.low_cny = bucket.close_cny = record.price_cny
+        bucket.first_sample_at = bucket.last_sample_at = ts
+        bucket.samples = 1
+        return
+    bucket.high_usd = max(bucket.high_usd, record.price_usd)
+    bucket.low_usd = min(bucket.low_usd, record.price_usd)
+    bucket.high_cny = max(bucket.high_cny, record.price_cny)
+    bucket.low_cny = min(bucket.low_cny, record.price_cny)
+    if ts < bucket.first_sample_at:
+        bucket.open_usd, bucket.open_cny, bucket.first_sample_at = record.price_usd, record.price_cny, ts
+    if ts >= bucket.last_sample_at:
+        bucket.close_usd, bucket.close_cny, bucket.last_sample_at = record.price_usd, record.price_cny, ts
+    bucket.samples += 1
+
+
+def apply_sample(db: Session, record: CopperPrice, buckets: Optional[Dict] = None) -> None:
+    """
+    将新记录累加进各级汇总桶 (不提交，由调用方与原始记录一起提交)。
+    buckets 用于批量回填时缓存已取出的桶，避免重复查询。
+    """
+    for interval in INTERVALS:
+        start = bucket_start(record.timestamp, interval)
+        key = (interval, start)
+        bucket = buckets.get(key) if buckets is not None else None
+        if bucket is None:
+            bucket = db.query(CopperPriceRollup).filter(
+                CopperPriceRollup.interval == interval,
+                CopperPriceRollup.bucket_start == start
+            ).first()
+        if bucket is None:
+            bucket = CopperPriceRollup(interval=interval, bucket_start=start, samples=0)
+            db.add(bucket)
+        if buckets is not None:
+            buckets[key] = bucket
+        _merge(bucket, record)
+
+
+def backfill_rollups(db: Session) -> int:
+    """汇总表为空时，用现存原始记录一次性回填 (老库升级用)"""
+    if db.query(CopperPriceRollup.id).first() is not None:
+        return 0
+    buckets: Dict = {}
+    count = 0
+    for record in db.query(CopperPrice).filter(CopperPrice.timestamp.isnot(None)).order_by(CopperPrice.timestamp).yield_per(1000):
+        apply_sample(db, record, buckets)
+        count += 1
+    db.commit()
+    return count
+
+
+def compact_history(db: Session, now: Optional[datetime] = None) -> Dict[str, int]:
+    """
+    按保留策略清理: 删除过期原始记录和过期 1h 汇总。
+    原始记录写入时已在同一事务里汇总过，直接删除不会丢失图表数据。
+    """
+    now = now or datetime.now()
+    raw_cutoff = now - timedelta(days=config.PRICE_RAW_RETENTION_DAYS)
+    hourly_cutoff = now - timedelta(days=config.PRICE_HOURLY_RETENTION_DAYS)
+
+    raw_deleted = db.query(CopperPrice).filter(
+        CopperPrice.timestamp < raw_cutoff
+    ).delete(synchronize_session=False)
+    hourly_deleted = db.query(CopperPriceRollup).filter(
+        CopperPriceRollup.interval == "1h",
+        CopperPriceRollup.bucket_start < hourly_cutoff
+    ).delete(synchronize_session=False)
+    db.commit()
+    return {"raw_deleted": raw_deleted, "hourly_rollups_deleted": hourly_deleted}
+
+
+def query_history(db: Session, interval: str, start: Optional[datetime] = None,
+                  end: Optional[datetime] = None, currency: str = "usd") -> dict:
+    """按区间读取 OHLC 桶 (区间内桶数超过 MAX_POINTS 时保留最近的，丢弃最早的)"""
+    end = end or datetime.now()
+    start = start or (end - DEFAULT_SPANS[interval])
+    suffix = "usd" if currency == "usd" else "cny"
+    columns = [getattr(CopperPriceRollup, f"{f}_{suffix}") for f in ("open", "high", "low", "close")]
+
+    rows = db.query(CopperPriceRollup.bucket_start, *columns, CopperPriceRollup.samples).filter(
+        CopperPriceRollup.interval == interval,
+        CopperPriceRollup.bucket_start >= bucket_start(start, interval),
+        CopperPriceRollup.bucket_start <= end
+    ).order_by(CopperPriceRollup.bucket_start.desc()).limit(MAX_POINTS + 1).all()
+    truncated = len(rows) > MAX_POINTS
+    rows = rows[:MAX_POINTS]
+    rows.reverse()
+
+    points: List[dict] = [
+        {
+            "t": ts.strftime("%Y-%m-%d %H:%M:%S"),
+            "o": round(o, 2), "h": round(h, 2), "l": round(l, 2), "c": round(c, 2),
+            "n": n
+        }
+        for ts, o, h, l, c, n in rows
+    ]
+    return {
+        "interval": interval,
+        "currency": currency.upper(),
+        "start": start.strftime("%Y-%m-%d %H:%M:%S"),
+        "end": end.strftime("%Y-%m-%d %H:%M:%S"),
+        "truncated": truncated,
+        "points": points
+    }
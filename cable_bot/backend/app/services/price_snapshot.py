@@ -0,0 +1,108 @@
+# backend/app/services/price_snapshot.py
+"""
+铜价接口快照
+
+铜价每小时才更新一次，而 /api/v1/market/copper 每次打开首页都会请求。
+定时任务写入新价格后立即算好完整响应 (含小时/日涨跌)，序列化成 JSON 字节存进内存，
+接口直接返回这份字节，不再查库；同时带 ETag / Last-Modified，客户端条件请求命中时回 304。
+多 worker 部署时只有 leader 抓价写库，其它 worker 由 refresh_if_stale 定期发现新记录后重建快照。
+"""
+import hashlib
+import json
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Dict, Optional
+
+from sqlalchemy.orm import Session
+
+from app.models.tables import CopperPrice
+
+
+class PriceSnapshot:
+    """一份预序列化好的铜价响应 (不可变)"""
+
+    __slots__ = ("payload", "body", "etag", "last_modified", "modified_at", "headers", "record_id")
+
+    def __init__(self, payload: dict, modified_at: datetime, record_id: Optional[int] = None):
+        self.payload = payload
+        self.record_id = record_id         # 生成快照所用的最新价格记录 id
+        # 与 FastAPI 默认 JSONResponse 的序列化方式一致
+        self.body = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        self.etag = '"' + hashlib.sha1(self.body).hexdigest()[:16] + '"'
+        # 数据库里存的是本地时间，HTTP 头要求 GMT
+        self.modified_at = modified_at.astimezone(timezone.utc).replace(microsecond=0)
+        self.last_modified = format_datetime(self.modified_at, usegmt=True)
+        self.headers: Dict[str, str] = {
+            "ETag": self.etag,
+            "Last-Modified": self.last_modified,
+            "Cache-Control": "no-cache",   # 允许缓存，但每次都要带条件头回来校验
+        }
+
+    def is_not_modified(self, if_none_match: Optional[str], if_modified_since: Optional[str]) -> bool:
+        """条件请求判断: If-None-Match 优先，其次 If-Modified-Since"""
+        if if_none_match:
+            tags = [t.strip() for t in if_none_match.split(",")]
+            return "*" in tags or self.etag in tags or f"W/{self.etag}" in tags
+        if if_modified_since:
+            try:
+                since = parsedate_to_datetime(if_modified_since)
+            except (TypeError, ValueError):
+                return False
+            if since.tzinfo is None:
+                since = since.replace(tzinfo=timezone.utc)
+            return self.modified_at <= since
+        return False
+
+
+def _calc_change(current: float, old_record: Optional[CopperPrice]) -> float:
+    if not old_record or old_record.price_usd == 0:
+        return 0.0
+    return round(((current - old_record.price_usd) / old_record.price_usd) * 100, 2)
+
+
+def build_snapshot(db: Session) -> Optional[PriceSnapshot]:
+    """查最新价格及 1 小时 / 24 小时前的价格，生成完整响应；表为空时返回 None"""
+    latest = db.query(CopperPrice).order_by(CopperPrice.timestamp.desc()).first()
+    if not latest:
+        return None
+
+    now = datetime.now()
+    record_1h = db.query(CopperPrice).filter(CopperPrice.timestamp <= now - timedelta(hours=1)).order_by(CopperPrice.timestamp.desc()).first()
+    record_24h = db.query(CopperPrice).filter(CopperPrice.timestamp <= now - timedelta(days=1)).order_by(CopperPrice.timestamp.desc()).first()
+
+    payload = {
+        "status": "ok",
+        "CNY": {"price": round(latest.price_cny, 2), "symbol": "¥", "source": "Calculated" if "Yahoo" in latest.source else latest.source},
+        "USD": {"price": round(latest.price_usd, 2), "symbol": "$", "source": latest.source},
+        "exchange_rate": latest.exchange_rate,
+        "trends": {
+            "hourly_change_percent": _calc_change(latest.price_usd, record_1h),
+            "daily_change_percent": _calc_change(latest.price_usd, record_24h)
+        },
+        "updated_at": latest.timestamp.strftime("%Y-%m-%d %H:%M:%S")
+    }
+    return PriceSnapshot(payload, latest.timestamp, latest.id)
+
+
+_snapshot: Optional[PriceSnapshot] = None
+
+
+def refresh_snapshot(db: Session) -> Optional[PriceSnapshot]:
+    """重新生成快照并原子替换"""
+    global _snapshot
+    snapshot = build_snapshot(db)
+    if snapshot is not None:
+        _snapshot = snapshot
+    return snapshot
+
+
+def refresh_if_stale(db: Session) -> Optional[PriceSnapshot]:
+    """数据库里有比快照更新的价格记录 (其它 worker 写入) 时重建快照"""
+    latest_id = db.query(CopperPrice.id).order_by(CopperPrice.timestamp.desc()).limit(1).scalar()
+    if latest_id is None or (_snapshot is not None and _snapshot.record_id == latest_id):
+        return None
+    return refresh_snapshot(db)
+
+
+def get_snapshot() -> Optional[PriceSnapshot]:
+    return _snapshot
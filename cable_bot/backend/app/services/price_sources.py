@@ -0,0 +1,252 @@
+# backend/app/services/price_sources.py
+"""
+铜价数据源 (异步版)
+
+汇率、Yahoo、东方财富三个请求并发发出，价格取最先返回的有效报价，
+最坏等待时间是最慢的一个超时，而不是三个超时之和。
+每个数据源有独立熔断器: 连续失败后暂停请求一段时间 (指数退避)，避免每小时都去撞同一个挂掉的源。
+HTTP 客户端在应用生命周期内复用连接池；httpx 在第一次抓取时才导入并建池，不拖慢启动。
+"""
+import asyncio
+import random
+import time
+from datetime import datetime
+from typing import TYPE_CHECKING, Awaitable, Callable, Dict, Optional, Tuple
+
+from app.core import config
+
+if TYPE_CHECKING:
+    import httpx
+
+BROWSER_UA = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+LBS_PER_TON = 2204.62          # 1 吨 = 2204.62 磅
+DEFAULT_EXCHANGE_RATE = 7.25
+
+
+class CircuitBreaker:
+    """
+    简单熔断器:
+    closed    -> 正常请求
+    open      -> 连续失败达到阈值，backoff 秒内直接跳过
+    half_open -> 熔断到期，只放行一个试探请求 (其余并发调用仍跳过)；成功则恢复，失败则退避时间翻倍
+    """
+
+    def __init__(self, name: str, failure_threshold: int = config.BREAKER_FAILURE_THRESHOLD,
+                 base_backoff: float = config.BREAKER_BASE_BACKOFF,
+                 max_backoff: float = config.BREAKER_MAX_BACKOFF):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.failures = 0          # 连续失败次数
+        self.trips = 0             # 连续熔断次数 (决定退避时长)
+        self.open_until = 0.0
+        self.last_error: Optional[str] = None
+        self.last_success: Optional[datetime] = None
+        self.probing = False       # half_open 时是否已有试探请求在途
+
+    @property
+    def state(self) -> str:
+        if self.failures < self.failure_threshold:
+            return "closed"
+        return "open" if time.monotonic() < self.open_until else "half_open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "open" or self.probing:
+            return False
+        self.probing = True
+        return True
+
+    def abort(self) -> None:
+        """放行的调用没有结果就结束 (被取消)，不计成败，释放试探名额"""
+        self.probing = False
+
+    def record_success(self) -> None:
+        self.probing = False
+        self.failures = 0
+        self.trips = 0
+        self.open_until = 0.0
+        self.last_error = None
+        self.last_success = datetime.now()
+
+    def record_failure(self, error: str) -> None:
+        self.probing = False
+        self.failures += 1
+        self.last_error = error
+        if self.failures >= self.failure_threshold:
+            backoff = min(self.base_backoff * (2 ** self.trips), self.max_backoff)
+            self.trips += 1
+            self.open_until = time.monotonic() + backoff
+
+    def snapshot(self) -> dict:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "retry_in_seconds": max(0.0, round(self.open_until - time.monotonic(), 1)),
+            "last_error": self.last_error,
+            "last_success": self.last_success.strftime("%Y-%m-%d %H:%M:%S") if self.last_success else None
+        }
+
+
+class CopperPriceFetcher:
+    """并发抓取汇率与铜价，结构与原 get_realtime_copper_prices 返回值一致"""
+
+    def __init__(self, transport=None):
+        self._transport = transport                 # 测试时注入 httpx.MockTransport
+        self._client: Optional["httpx.AsyncClient"] = None
+        self._insecure_client: Optional["httpx.AsyncClient"] = None  # 东方财富证书经常有问题
+        self.breakers: Dict[str, CircuitBreaker] = {
+            name: CircuitBreaker(name) for name in ("fx", "yahoo", "eastmoney")
+        }
+        self.last_result: Optional[dict] = None
+
+    # --- 连接池生命周期 ---
+    async def start(self) -> None:
+        if self._client is None:
+            import httpx
+
+            limits = httpx.Limits(max_connections=10, max_keepalive_connections=5)
+            self._client = httpx.AsyncClient(limits=limits, follow_redirects=True, transport=self._transport)
+            self._insecure_client = httpx.AsyncClient(limits=limits, follow_redirects=True, verify=False,
+                                                      transport=self._transport)
+
+    async def close(self) -> None:
+        for client in (self._client, self._insecure_client):
+            if client is not None:
+                await client.aclose()
+        self._client = self._insecure_client = None
+
+    # --- 各数据源 ---
+    async def _fetch_fx(self) -> Optional[float]:
+        resp = await self._client.get(
+            config.FX_RATE_URL, headers={"User-Agent": "Mozilla/5.0"}, timeout=config.FX_TIMEOUT
+        )
+        resp.raise_for_status()
+        rate = resp.json().get("rates", {}).get("CNY")
+        return float(rate) if rate else None
+
+    async def _fetch_yahoo(self) -> Optional[Tuple[str, float]]:
+        # HG=F 是铜期货 (Copper Futures)，单位 美元/磅
+        resp = await self._client.get(
+            config.YAHOO_COPPER_URL, headers={"User-Agent": BROWSER_UA}, timeout=config.YAHOO_TIMEOUT
+        )
+        resp.raise_for_status()
+        price_lbs = resp.json()["chart"]["result"][0]["meta"]["regularMarketPrice"]
+        if price_lbs and price_lbs > 0:
+            return "USD", float(price_lbs) * LBS_PER_TON
+        return None
+
+    async def _fetch_eastmoney(self) -> Optional[Tuple[str, float]]:
+        resp = await self._insecure_client.get(
+            config.EASTMONEY_COPPER_URL,
+            headers={"User-Agent": "Mozilla/5.0", "Referer": "https://quote.eastmoney.com/"},
+            timeout=config.EASTMONEY_TIMEOUT
+        )
+        resp.raise_for_status()
+        data = resp.json().get("data") or {}
+        if data.get("f43"):
+            cny_val = float(data["f43"])
+            if cny_val > 0:
+                return "CNY", cny_val
+        return None
+
+    async def _guarded(self, name: str, fetch: Callable[[], Awaitable]):
+        """经熔断器调用数据源: 熔断中直接返回 None，异常和无效数据都计为失败"""
+        breaker = self.breakers[name]
+        if not breaker.allow():
+            return None
+        try:
+            value = await fetch()
+        except asyncio.CancelledError:
+            # 价格源输给了别的源被取消: 不算失败，但要释放 half_open 的试探名额
+            breaker.abort()
+            raise
+        except Exception as e:
+            breaker.record_failure(f"{type(e).__name__}: {e}")
+            return None
+        if value is None:
+            breaker.record_failure("invalid payload")
+        else:
+            breaker.record_success()
+        return value
+
+    # --- 主流程 ---
+    async def fetch(self) -> dict:
+        """
+        策略: 汇率与两个价格源同时请求，取最先返回的有效报价 -> 全部失败则模拟兜底
+        """
+        await self.start()
+        print(f"🕷️ [{datetime.now().strftime('%H:%M:%S')}] 正在获取铜价...", end=" ")
+
+        result = {
+            "CNY": {"price": 0.0, "symbol": "¥", "source": "Failed"},
+            "USD": {"price": 0.0, "symbol": "$", "source": "Failed"},
+            "exchange_rate": DEFAULT_EXCHANGE_RATE,
+            "updated": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        }
+
+        fx_task = asyncio.create_task(self._guarded("fx", self._fetch_fx))
+        price_tasks = {
+            asyncio.create_task(self._guarded("yahoo", self._fetch_yahoo)): "yahoo",
+            asyncio.create_task(self._guarded("eastmoney", self._fetch_eastmoney)): "eastmoney",
+        }
+
+        quote, winner = None, None
+        pending = set(price_tasks)
+        try:
+            while pending and quote is None:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if quote is None and task.result() is not None:
+                        quote, winner = task.result(), price_tasks[task]
+        finally:
+            for task in pending:
+                task.cancel()
+
+        rate = await fx_task
+        if rate:
+            result["exchange_rate"] = rate
+
+        if quote is not None:
+            currency, value = quote
+            if currency == "USD":
+                usd_price = value
+                result["USD"]["source"] = "Yahoo Finance (Global)"
+                result["CNY"]["source"] = "Calculated"
+                result["CNY"]["price"] = round(usd_price * result["exchange_rate"], 2)
+                print(f"✅ Yahoo成功: ${usd_price:.2f}", end=" ")
+            else:
+                usd_price = value / result["exchange_rate"]
+                result["CNY"]["price"] = value
+                result["CNY"]["source"] = "东方财富 (EastMoney)"
+                result["USD"]["source"] = "Calculated"
+                print(f"✅ 东财成功: ¥{value}", end=" ")
+            result["USD"]["price"] = round(usd_price, 2)
+            print("-> 完成")
+        else:
+            print("❌ 全部失败 -> 启用模拟")
+            result = self.fallback_quote(result["exchange_rate"])
+
+        self.last_result = result
+        return result
+
+    @staticmethod
+    def fallback_quote(exchange_rate: float = DEFAULT_EXCHANGE_RATE) -> dict:
+        """所有数据源都不可用时的模拟报价"""
+        usd_price = 9400.0 + random.randint(-50, 50)
+        return {
+            "CNY": {"price": round(usd_price * exchange_rate, 2), "symbol": "¥", "source": "Simulated (Fallback)"},
+            "USD": {"price": round(usd_price, 2), "symbol": "$", "source": "Simulated (Fallback)"},
+            "exchange_rate": exchange_rate,
+            "updated": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        }
+
+    def health(self) -> Dict[str, dict]:
+        return {name: breaker.snapshot() for name, breaker in self.breakers.items()}
+
+
+# 进程内唯一实例 (连接池随应用启动 / 关闭)
+price_fetcher = CopperPriceFetcher()
@@ -0,0 +1,146 @@
+# backend/app/services/price_stream.py
+"""
+铜价实时推送 (SSE / WebSocket 共用的进程内广播)
+
+首页原来每次打开都整包请求一次 /api/v1/market/copper，而价格一小时才变一次。
+现在客户端保持一条长连接，快照更新时由服务端推一次:
+- 每份快照只编码一次 (SSE 帧 / WebSocket 文本都预先生成)，所有订阅者共享同一份字节
+- 订阅者不建队列: 只等待同一个"下一次发布" Future，每次发布后换一个新的，
+  单个连接的开销只有它自己的协程帧，数千个空闲连接也没有额外内存
+- 事件 id = 快照所用的价格记录 id，各 worker 一致；
+  重连时带 Last-Event-ID，与当前一致就不重发，否则立即补发最新快照 (快照是全量的，不需要补历史)
+- 空闲时按 PRICE_STREAM_HEARTBEAT_SECONDS 发心跳，防止代理 / 负载均衡断开空闲连接
+- 连接名额在处理函数里 subscribe() 时同步占用 (检查与占用之间没有 await)，重启后的重连风暴也不会超过上限；
+  订阅关闭 (aclose) 或被回收时归还
+发布由抓价任务 (leader) 和快照同步任务 (其它 worker) 在事件循环里调用，同一记录只发布一次。
+"""
+import asyncio
+import json
+from typing import AsyncIterator, Optional
+
+from app.core import config
+from app.services.price_snapshot import PriceSnapshot
+
+# 客户端断线后的重连间隔建议 (毫秒，SSE retry 字段)
+RECONNECT_MS = 3000
+SSE_HEARTBEAT = b": ping\n\n"
+WS_HEARTBEAT = '{"event":"heartbeat"}'
+
+
+class PriceEvent:
+    """一次发布 (预编码好的 SSE 帧与 WebSocket 消息)"""
+
+    __slots__ = ("event_id", "sse", "ws")
+
+    def __init__(self, snapshot: PriceSnapshot):
+        self.event_id = str(snapshot.record_id)
+        body = snapshot.body.decode("utf-8")
+        self.sse = f"id: {self.event_id}\nevent: price\ndata: {body}\n\n".encode("utf-8")
+        self.ws = f'{{"event":"price","id":{json.dumps(self.event_id)},"data":{body}}}'
+
+
+class PriceHub:
+
+    def __init__(self, max_subscribers: int = config.PRICE_STREAM_MAX_SUBSCRIBERS,
+                 heartbeat: float = config.PRICE_STREAM_HEARTBEAT_SECONDS):
+        self.max_subscribers = max_subscribers
+        self.heartbeat = heartbeat
+        self.latest: Optional[PriceEvent] = None
+        self.subscribers = 0
+        self.published = 0
+        self._next: Optional[asyncio.Future] = None
+
+    @property
+    def full(self) -> bool:
+        return self.subscribers >= self.max_subscribers
+
+    def _waiter(self) -> asyncio.Future:
+        if self._next is None or self._next.done():
+            self._next = asyncio.get_running_loop().create_future()
+        return self._next
+
+    def publish(self, snapshot: Optional[PriceSnapshot]) -> bool:
+        """发布新快照 (必须在事件循环线程调用)，同一记录重复发布时忽略"""
+        if snapshot is None or snapshot.record_id is None:
+            return False
+        if self.latest is not None and self.latest.event_id == str(snapshot.record_id):
+            return False
+        self.latest = PriceEvent(snapshot)
+        self.published += 1
+        waiter, self._next = self._next, None
+        if waiter is not None and not waiter.done():
+            waiter.set_result(self.latest)
+        return True
+
+    def subscribe(self, last_event_id: Optional[str] = None) -> Optional["Subscription"]:
+        """占用一个连接名额并返回订阅，已满时返回 None"""
+        if self.full:
+            return None
+        return Subscription(self, last_event_id)
+
+    async def _events(self, last_event_id: Optional[str]) -> AsyncIterator[Optional[PriceEvent]]:
+        sent = last_event_id
+        while True:
+            latest = self.latest
+            if latest is not None and latest.event_id != sent:
+                sent = latest.event_id
+                yield latest
+                continue
+            # 所有订阅者等同一个 Future；asyncio.wait 超时不会取消它
+            done, _ = await asyncio.wait((self._waiter(),), timeout=self.heartbeat)
+            if not done:
+                yield None
+
+    def stats(self) -> dict:
+        return {
+            "subscribers": self.subscribers,
+            "max_subscribers": self.max_subscribers,
+            "published": self.published,
+            "last_event_id": self.latest.event_id if self.latest else None,
+        }
+
+
+class Subscription:
+    """
+    一个订阅: 产出 PriceEvent，空闲满一个心跳周期时产出 None (由调用方编码成心跳)。
+    名额在创建时占用；响应还没开始发送连接就断开时生成器从未启动，所以不靠生成器的 finally 归还。
+    """
+
+    __slots__ = ("_hub", "_events", "_open")
+
+    def __init__(self, hub: PriceHub, last_event_id: Optional[str]):
+        self._hub = hub
+        self._events = hub._events(last_event_id)
+        self._open = True
+        hub.subscribers += 1
+
+    def __aiter__(self) -> "Subscription":
+        return self
+
+    async def __anext__(self) -> Optional[PriceEvent]:
+        return await self._events.__anext__()
+
+    def _release(self) -> None:
+        if self._open:
+            self._open = False
+            self._hub.subscribers -= 1
+
+    async def aclose(self) -> None:
+        self._release()
+        await self._events.aclose()
+
+    def __del__(self):
+        self._release()
+
+
+hub = PriceHub()
+
+
+async def sse_stream(events: Subscription) -> AsyncIterator[bytes]:
+    """把订阅编码成 text/event-stream (结束时关闭订阅)"""
+    try:
+        yield f"retry: {RECONNECT_MS}\n\n".encode("utf-8")
+        async for event in events:
+            yield SSE_HEARTBEAT if event is None else event.sse
+    finally:
+        await events.aclose()
@@ -0,0 +1,109 @@
+# backend/app/services/result_cache.py
+"""
+计算结果缓存 (有界 LRU + TTL)
+
+现场电工反复算的就是那几种组合，选型结果只取决于输入和规格目录，
+所以按“规范化后的输入 + 目录版本”做键缓存。规格目录重载时整体清空。
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable
+
+# 默认容量与过期时间
+SIZING_CACHE_SIZE = 4096
+CACHE_TTL_SECONDS = 3600.0
+
+
+class LRUCache:
+    """线程安全的 LRU 缓存，条目超过 ttl 秒视为过期"""
+
+    def __init__(self, name: str, maxsize: int, ttl: float = CACHE_TTL_SECONDS):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()  # key -> (过期时间, 值)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                if entry[0] > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                del self._data[key]
+                self.expirations += 1
+            self.misses += 1
+            return default
+
+    def put(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """命中直接返回；未命中则计算并写入 (计算在锁外进行)"""
+        missing = object()
+        value = self.get(key, missing)
+        if value is missing:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+
+# --- 全局缓存实例 ---
+sizing_cache = LRUCache("sizing", SIZING_CACHE_SIZE)
+
+_ALL_CACHES = (sizing_cache,)
+
+
+def clear_all(*_args) -> None:
+    """规格目录重载时调用: 清空所有依赖规格数据的缓存"""
+    for cache in _ALL_CACHES:
+        cache.clear()
+
+
+def all_stats() -> Dict[str, Dict[str, Any]]:
+    return {cache.name: cache.stats() for cache in _ALL_CACHES}
+
+
+def sizing_key(catalog_version: str, current: float, material: str, cable_type: str,
+               distance: float, voltage: str, max_drop: float, ambient_temp: float,
+               derating_factors: tuple = ()) -> tuple:
+    """
+    选型缓存键。用已换算的负载电流而不是 (功率, 单位) 做键，
+    这样 kW / HP / A 不同写法但电流相同的请求共享同一条缓存。
+    其余参数都会直接影响压降或提示文案，不能再分桶合并。
+    """
+    return (catalog_version, float(current), material, cable_type, float(distance), voltage,
+            float(max_drop), float(ambient_temp), tuple(derating_factors))
+
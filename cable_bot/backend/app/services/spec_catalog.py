@@ -0,0 +1,200 @@
+# backend/app/services/spec_catalog.py
+"""
+电缆规格目录 (进程内只读索引)
+
+cable_specs 只在 seed.py 运行时才会变化，没必要每次选型都查库 + 组装 ORM 对象。
+启动时一次性读入内存，按 (材质, 绝缘) 分组、按载流量排序，之后所有选型直接查这里。
+目录对象不可变，重新加载时整体替换模块级引用 (原子操作，读请求不会看到半成品)。
+"""
+import hashlib
+import math
+import os
+import re
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.models.tables import CableSpec, CatalogVersion
+
+
+def parse_size(size_str: str) -> float:
+    """规格字符串 -> 数值截面 (无法解析时返回 NaN)"""
+    try:
+        return float(size_str)
+    except (TypeError, ValueError):
+        return float("nan")
+
+
+_SIZE_PATTERN = re.compile(r"^\s*(\d+(?:\.\d*)?|\.\d+)\s*(?:mm²|mm2|mm\^2|平方|平方毫米)?\s*$", re.IGNORECASE)
+
+
+def normalize_size(size: Any) -> Optional[float]:
+    """规格 -> 索引键 (数值截面，保留 3 位小数，"4" / "4.0" / "4mm²" 相同)；无法识别返回 None"""
+    if isinstance(size, (int, float)):
+        value = float(size)
+    else:
+        match = _SIZE_PATTERN.match(str(size))
+        if not match:
+            return None
+        value = float(match.group(1))
+    if not math.isfinite(value) or value <= 0:
+        return None
+    return round(value, 3)
+
+
+class SpecTable:
+    """单一 (材质, 绝缘) 组合的规格数组，按载流量从小到大排序"""
+
+    __slots__ = ("material", "insulation", "sizes", "size_values", "ampacities", "weights", "monotone",
+                 "size_array", "ampacity_array")
+
+    def __init__(self, material: str, insulation: str, rows: list):
+        self.material = material
+        self.insulation = insulation
+        self.sizes = tuple(r[0] for r in rows)                 # 原始规格字符串 ("4.0")
+        self.size_values = tuple(parse_size(r[0]) for r in rows)  # 预解析的数值截面
+        self.ampacities = tuple(float(r[1]) for r in rows)
+        self.weights = tuple(r[2] for r in rows)               # kg/100m，可能为 None
+        # 载流量升序时截面也升序 (且都能解析)，压降才随下标单调递减，才能二分
+        self.monotone = all(
+            a <= b for a, b in zip(self.size_values, self.size_values[1:])
+        ) and not any(math.isnan(v) for v in self.size_values)
+        # 同一份数据的 NumPy 只读视图，供批量选型向量化使用
+        self.size_array = np.array(self.size_values, dtype=np.float64)
+        self.ampacity_array = np.array(self.ampacities, dtype=np.float64)
+        self.size_array.flags.writeable = False
+        self.ampacity_array.flags.writeable = False
+
+    def __len__(self) -> int:
+        return len(self.sizes)
+
+
+class SpecCatalog:
+    """全部规格表的只读快照"""
+
+    def __init__(self, tables: Dict[Tuple[str, str], SpecTable], version: str):
+        self.tables = tables
+        self.version = version            # 内容哈希，规格数据不变则版本不变
+        self.loaded_at = datetime.now()
+
+    def get(self, material: str, insulation: str) -> Optional[SpecTable]:
+        return self.tables.get((material, insulation))
+
+    @property
+    def row_count(self) -> int:
+        return sum(len(t) for t in self.tables.values())
+
+
+# --- 加载 ---
+def build_catalog(db: Session) -> SpecCatalog:
+    """从数据库读取全部规格，构建新的目录快照"""
+    # 与原选型查询保持一致: ORDER BY ampacity (载流量相同时按 id)
+    rows = db.query(
+        CableSpec.material, CableSpec.insulation, CableSpec.size,
+        CableSpec.ampacity, CableSpec.weight_per_100m
+    ).order_by(CableSpec.ampacity, CableSpec.id).all()
+
+    grouped: Dict[Tuple[str, str], list] = {}
+    digest = hashlib.sha1()
+    for material, insulation, size, ampacity, weight in rows:
+        if ampacity is None:
+            continue
+        grouped.setdefault((material, insulation), []).append((size, ampacity, weight))
+        digest.update(f"{material}|{insulation}|{size}|{ampacity}|{weight}\n".encode())
+
+    tables = {key: SpecTable(key[0], key[1], group) for key, group in grouped.items()}
+    return SpecCatalog(tables, digest.hexdigest()[:12])
+
+
+_catalog: Optional[SpecCatalog] = None
+_reload_lock = threading.Lock()
+_reload_listeners: List[Callable[[SpecCatalog], None]] = []
+_last_mtime = 0.0
+_last_mtime_check = 0.0
+_last_version_id = 0  # 已加载时 catalog_versions 的最新 id
+
+# 数据库文件 mtime 检查间隔 (秒)，避免每个请求都 stat 一次
+MTIME_CHECK_INTERVAL = 5.0
+
+
+def _db_file_path(db: Session) -> Optional[str]:
+    url = db.get_bind().url
+    if url.get_backend_name() != "sqlite" or not url.database or url.database == ":memory:":
+        return None
+    return os.path.abspath(url.database)
+
+
+def _db_mtime(db: Session) -> float:
+    """数据库文件最后修改时间 (WAL 模式下提交先写 -wal 文件，两个都要看)"""
+    path = _db_file_path(db)
+    if not path:
+        return 0.0
+    mtime = 0.0
+    for candidate in (path, path + "-wal"):
+        try:
+            mtime = max(mtime, os.path.getmtime(candidate))
+        except OSError:
+            pass
+    return mtime
+
+
+def add_reload_listener(callback: Callable[[SpecCatalog], None]) -> None:
+    """注册目录替换回调 (例如清空依赖规格数据的缓存)"""
+    if callback not in _reload_listeners:
+        _reload_listeners.append(callback)
+
+
+def load_catalog(db: Session) -> SpecCatalog:
+    """(重新) 加载目录并原子替换当前快照"""
+    global _catalog, _last_mtime, _last_version_id
+    with _reload_lock:
+        mtime = _db_mtime(db)
+        _last_version_id = _latest_version_id(db)
+        catalog = build_catalog(db)
+        # 内容没变 (例如只是铜价表写入导致 mtime 变化) 就沿用旧快照
+        swapped = _catalog is None or catalog.version != _catalog.version
+        if swapped:
+            _catalog = catalog
+        _last_mtime = mtime
+    if swapped:
+        for callback in _reload_listeners:
+            callback(catalog)
+    return _catalog
+
+
+def _latest_version_id(db: Session) -> int:
+    return db.query(func.max(CatalogVersion.id)).scalar() or 0
+
+
+def reload_if_new_version(db: Session) -> Optional[SpecCatalog]:
+    """spec_loader 写入了新的目录版本时重新加载 (定时任务调用，一次索引查询)"""
+    if _catalog is not None and _latest_version_id(db) == _last_version_id:
+        return None
+    return load_catalog(db)
+
+
+def get_catalog() -> SpecCatalog:
+    """获取当前目录快照 (必须先在启动时 load_catalog)"""
+    if _catalog is None:
+        raise RuntimeError("Spec catalog is not loaded")
+    return _catalog
+
+
+async def reload_if_changed(session_factory) -> SpecCatalog:
+    """数据库文件有变化时重新加载 (按 MTIME_CHECK_INTERVAL 节流，session_factory 为异步会话工厂)"""
+    global _last_mtime_check
+    now = time.monotonic()
+    if _catalog is not None and now - _last_mtime_check < MTIME_CHECK_INTERVAL:
+        return _catalog
+    _last_mtime_check = now
+
+    async with session_factory() as db:
+        changed = await db.run_sync(lambda s: _catalog is None or _db_mtime(s) != _last_mtime)
+        if changed:
+            await db.run_sync(load_catalog)
+    return _catalog
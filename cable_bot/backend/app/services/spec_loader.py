@@ -0,0 +1,228 @@
+# backend/app/services/spec_loader.py
+"""
+规格目录导入 (厂家 CSV / JSON 规格表 -> cable_specs)
+
+原来的 seed.py 先删光再逐条插入，期间 API 查到的是空目录 (选型全部 Out of Range)。
+现在整份文件在一个事务里批量 upsert，读者要么看到旧目录，要么看到新目录:
+- (材质, 绝缘, 规格) 唯一索引，已有的行原地更新，内容没变的行直接跳过 (重复导入无副作用)
+- 规格按数值截面匹配已有行 (文件里的 "4" 会更新库里的 "4.0"，不会多出一条)
+- prune=True 时删除文件涉及的 (材质, 绝缘) 表里文件中没有的规格
+- 目录内容有变化时在 catalog_versions 记一条，版本号与内存目录的内容哈希一致
+运行中的 API 由定时任务发现新记录后热替换内存目录；--notify 可让它立即重载 (需配置 ADMIN_TOKEN)。
+
+文件格式:
+- CSV: 表头 material,insulation,size,ampacity[,weight_per_100m]
+- JSON: [{同上字段}, ...] 或 {"version": "厂家样本版本", "specs": [...]}
+
+用法: python -m app.services.spec_loader specs.csv [--prune] [--dry-run] [--notify http://host:8000/api/v1/admin/catalog/reload]
+"""
+import csv
+import json
+import math
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import inspect, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.models.tables import CableSpec, CatalogVersion
+from app.services.spec_catalog import build_catalog, normalize_size
+
+UNIQUE_INDEX = "uq_cable_spec_key"
+
+# 支持 INSERT ... ON CONFLICT 的方言
+_INSERTS = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+
+
+class SpecFileError(ValueError):
+    """规格文件内容不合法 (信息里带出错位置)"""
+
+
+def _clean_row(raw: Dict[str, Any], where: str) -> Dict[str, Any]:
+    missing = [k for k in ("material", "insulation", "size", "ampacity") if raw.get(k) in (None, "")]
+    if missing:
+        raise SpecFileError(f"{where}: 缺少字段 {', '.join(missing)}")
+    size = str(raw["size"]).strip()
+    if normalize_size(size) is None:
+        raise SpecFileError(f"{where}: 无法识别的规格 {size!r}")
+    try:
+        ampacity = float(raw["ampacity"])
+        weight = raw.get("weight_per_100m")
+        weight = None if weight in (None, "") else float(weight)
+    except (TypeError, ValueError):
+        raise SpecFileError(f"{where}: ampacity / weight_per_100m 必须是数字")
+    if not (math.isfinite(ampacity) and ampacity > 0) or (weight is not None and not (math.isfinite(weight) and weight > 0)):
+        raise SpecFileError(f"{where}: ampacity / weight_per_100m 必须大于 0")
+    return {
+        "material": str(raw["material"]).strip().lower(),
+        "insulation": str(raw["insulation"]).strip().lower(),
+        "size": size,
+        "ampacity": ampacity,
+        "weight_per_100m": weight,
+    }
+
+
+def read_spec_file(path: str) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """读取规格文件，返回 (规格行, 文件自带的版本号)"""
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".csv":
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            reader = csv.DictReader(f)
+            return [_clean_row(row, f"第 {reader.line_num} 行") for row in reader], None
+    if ext == ".json":
+        with open(path, encoding="utf-8-sig") as f:
+            try:
+                data = json.load(f)
+            except json.JSONDecodeError as e:
+                raise SpecFileError(f"JSON 格式错误: {e}")
+        label = None
+        if isinstance(data, dict):
+            label = data.get("version")
+            data = data.get("specs")
+        if not isinstance(data, list) or not all(isinstance(r, dict) for r in data):
+            raise SpecFileError('JSON 须为规格对象列表或 {"specs": [...]}')
+        return [_clean_row(row, f"specs[{i}]") for i, row in enumerate(data)], (str(label) if label else None)
+    raise SpecFileError(f"不支持的文件类型: {ext or path} (仅支持 .csv / .json)")
+
+
+def ensure_unique_index(db: Session) -> int:
+    """
+    老库升级: 删除重复规格 (保留最新一条) 后补建唯一索引，返回删除的行数。
+    重复按数值截面判断 ("4" 与 "4.0" 算同一规格)，唯一索引只能比较原始字符串，
+    所以即使索引已存在也要检查一遍 (规格表只有几百行，一次全表扫描)。
+    """
+    conn = db.connection()
+    latest: Dict[tuple, int] = {}
+    stale: List[int] = []
+    for spec_id, material, insulation, size in db.execute(
+        select(CableSpec.id, CableSpec.material, CableSpec.insulation, CableSpec.size).order_by(CableSpec.id)
+    ):
+        normalized = normalize_size(size)
+        key = (material, insulation, normalized if normalized is not None else size)
+        if key in latest:
+            stale.append(latest[key])
+        latest[key] = spec_id
+    if stale:
+        db.query(CableSpec).filter(CableSpec.id.in_(stale)).delete(synchronize_session=False)
+    if not any(ix["name"] == UNIQUE_INDEX for ix in inspect(conn).get_indexes(CableSpec.__tablename__)):
+        next(ix for ix in CableSpec.__table__.indexes if ix.name == UNIQUE_INDEX).create(conn, checkfirst=True)
+    return len(stale)
+
+
+def load_specs(db: Session, rows: List[Dict[str, Any]], source: str, label: Optional[str] = None,
+               prune: bool = False, dry_run: bool = False) -> Dict[str, Any]:
+    """在一个事务里把规格行 upsert 进 cable_specs (dry_run 时最后回滚)"""
+    started = time.perf_counter()
+    insert = _INSERTS.get(db.get_bind().dialect.name)
+    if insert is None:
+        raise RuntimeError(f"不支持的数据库: {db.get_bind().dialect.name}")
+    deduped = ensure_unique_index(db)
+
+    # 库里现有规格: (材质, 绝缘, 数值截面) -> (id, 规格写法, 载流量, 重量)
+    existing: Dict[tuple, tuple] = {}
+    for spec_id, material, insulation, size, ampacity, weight in db.execute(select(
+        CableSpec.id, CableSpec.material, CableSpec.insulation, CableSpec.size,
+        CableSpec.ampacity, CableSpec.weight_per_100m
+    ).order_by(CableSpec.id)):
+        existing.setdefault((material, insulation, normalize_size(size)), (spec_id, size, ampacity, weight))
+
+    # 文件内同一规格出现多次时以最后一次为准；已有规格沿用库里的写法
+    incoming: Dict[tuple, Dict[str, Any]] = {}
+    for row in rows:
+        key = (row["material"], row["insulation"], normalize_size(row["size"]))
+        old = existing.get(key)
+        incoming[key] = {**row, "size": old[1]} if old else row
+
+    changed = [
+        row for key, row in incoming.items()
+        if key not in existing or existing[key][2:] != (row["ampacity"], row["weight_per_100m"])
+    ]
+    inserted = sum(1 for key in incoming if key not in existing)
+    if changed:
+        stmt = insert(CableSpec.__table__)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["material", "insulation", "size"],
+            set_={"ampacity": stmt.excluded.ampacity, "weight_per_100m": stmt.excluded.weight_per_100m},
+        )
+        db.execute(stmt, changed)
+
+    stale: List[int] = []
+    if prune:
+        tables = {key[:2] for key in incoming}
+        stale = [value[0] for key, value in existing.items() if key[:2] in tables and key not in incoming]
+        if stale:
+            db.query(CableSpec).filter(CableSpec.id.in_(stale)).delete(synchronize_session=False)
+
+    catalog = build_catalog(db)
+    previous = db.scalar(select(CatalogVersion.version).order_by(CatalogVersion.id.desc()).limit(1))
+    recorded = previous != catalog.version
+    if recorded:
+        db.add(CatalogVersion(
+            version=catalog.version, label=label, source=source, rows_inserted=inserted,
+            rows_updated=len(changed) - inserted, rows_deleted=len(stale) + deduped, row_count=catalog.row_count,
+        ))
+    if dry_run:
+        db.rollback()
+    else:
+        db.commit()
+    return {
+        "version": catalog.version,
+        "label": label,
+        "changed": recorded,
+        "inserted": inserted,
+        "updated": len(changed) - inserted,
+        "unchanged": len(incoming) - len(changed),
+        "deleted": len(stale) + deduped,
+        "rows": catalog.row_count,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+    }
+
+
+def notify(url: str) -> None:
+    """通知运行中的 API 立即重载目录 (带 ADMIN_TOKEN；不通知也会在 CATALOG_WATCH_SECONDS 内自动发现)"""
+    import httpx
+
+    from app.core import config
+    from app.core.admin import ADMIN_TOKEN_HEADER
+
+    try:
+        response = httpx.post(url, headers={ADMIN_TOKEN_HEADER: config.ADMIN_TOKEN}, timeout=10.0)
+        response.raise_for_status()
+        print(f"📣 已通知 API 重载目录: {response.json()}")
+    except httpx.HTTPError as e:
+        print(f"⚠️ 通知 API 失败 ({e})，API 会在下次定时检查时自动加载")
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+    from app.models.database import Base, SessionLocal, engine
+
+    parser = argparse.ArgumentParser(description="导入 CSV / JSON 规格表到 cable_specs")
+    parser.add_argument("path", help="规格文件 (.csv / .json)")
+    parser.add_argument("--label", help="版本号 (默认取 JSON 里的 version 字段)")
+    parser.add_argument("--prune", action="store_true", help="删除文件涉及的规格表中文件没有的规格")
+    parser.add_argument("--dry-run", action="store_true", help="只统计变化，不写入")
+    parser.add_argument("--notify", metavar="URL", help="导入后调用 API 的目录重载接口")
+    args = parser.parse_args()
+
+    try:
+        specs, file_label = read_spec_file(args.path)
+    except (OSError, SpecFileError) as e:
+        print(f"❌ 读取失败: {e}")
+        sys.exit(1)
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        summary = load_specs(db, specs, os.path.basename(args.path), args.label or file_label,
+                             prune=args.prune, dry_run=args.dry_run)
+    finally:
+        db.close()
+    print(f"{'🔍 (dry-run) ' if args.dry_run else '✅ '}目录版本 {summary['version']}: 新增 {summary['inserted']}，"
+          f"更新 {summary['updated']}，未变 {summary['unchanged']}，删除 {summary['deleted']}，"
+          f"共 {summary['rows']} 条 ({summary['elapsed_ms']} ms)")
+    if args.notify and summary["changed"] and not args.dry_run:
+        notify(args.notify)
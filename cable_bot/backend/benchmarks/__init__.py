@@ -0,0 +1,13 @@
+# backend/benchmarks/__init__.py
+"""
+性能基准套件
+
+    cd backend
+    python -m benchmarks                          # 跑全部 (micro / asgi / load)，结果写入 JSON
+    python -m benchmarks --suite micro asgi       # 只跑部分
+    python -m benchmarks --save-baseline base.json
+    python -m benchmarks --baseline base.json --threshold 0.2   # 比基线差 20% 以上即失败 (退出码 1)
+    python -m benchmarks --suite load --url http://127.0.0.1:8000   # 压测已部署的服务
+
+所有测试都跑在临时目录里新 seed 的数据库上，不会碰项目自带的 cable_expert.db。
+"""
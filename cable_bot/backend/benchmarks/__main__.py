@@ -0,0 +1,105 @@
+# backend/benchmarks/__main__.py
+"""命令行入口: 运行基准、写出 JSON、与基线比较"""
+import argparse
+import json
+import platform
+import sys
+from datetime import datetime
+from typing import Dict, List
+
+from benchmarks import asgi, load, micro
+
+SUITES = ("micro", "asgi", "load")
+
+# 参与回归比较的指标 (其余如 requests / errors 只做记录)
+LOWER_IS_BETTER = ("ns_per_op", "p50_ms", "p95_ms", "p99_ms")
+HIGHER_IS_BETTER = ("rps",)
+
+
+def flatten(suites: Dict[str, Dict[str, Dict[str, float]]]) -> Dict[str, float]:
+    """{"micro": {"smart_select_cable": {"ns_per_op": 1.0}}} -> {"micro.smart_select_cable.ns_per_op": 1.0}"""
+    flat = {}
+    for suite, cases in suites.items():
+        for case, metrics in cases.items():
+            for metric, value in metrics.items():
+                if metric in LOWER_IS_BETTER or metric in HIGHER_IS_BETTER:
+                    flat[f"{suite}.{case}.{metric}"] = value
+    return flat
+
+
+def compare(current: Dict[str, float], baseline: Dict[str, float], threshold: float) -> List[str]:
+    """返回超出阈值的回归项说明"""
+    regressions = []
+    for name, base in sorted(baseline.items()):
+        if name not in current or not base:
+            continue
+        value = current[name]
+        metric = name.rsplit(".", 1)[-1]
+        change = (value - base) / base
+        worse = change > threshold if metric in LOWER_IS_BETTER else -change > threshold
+        marker = "REGRESSION" if worse else "ok"
+        print(f"  {name:<48} {base:>12.3f} -> {value:>12.3f}  ({change:+.1%})  {marker}")
+        if worse:
+            regressions.append(f"{name}: {base} -> {value} ({change:+.1%})")
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="WebCable 性能基准")
+    parser.add_argument("--suite", nargs="+", choices=SUITES, default=list(SUITES))
+    parser.add_argument("--output", default="benchmark_results.json", help="结果 JSON 输出路径")
+    parser.add_argument("--baseline", help="与该基线 JSON 比较")
+    parser.add_argument("--save-baseline", help="把本次结果另存为基线")
+    parser.add_argument("--threshold", type=float, default=0.2, help="允许的退化比例 (默认 0.2 = 20%%)")
+    parser.add_argument("--requests", type=int, default=500, help="asgi: 每个接口的请求数")
+    parser.add_argument("--url", help="load: 压测已部署的服务而不是进程内应用 (进程内应用只能串行压测); "
+                                      "目标服务开启了准入控制 (ADMISSION_ENABLED=1) 时会记录到 429")
+    parser.add_argument("--concurrency", type=int, default=32, help="load: 并发数 (仅 --url 时生效)")
+    parser.add_argument("--total", type=int, default=2000, help="load: 每个场景的请求总数")
+    args = parser.parse_args(argv)
+
+    suites = {}
+    if "micro" in args.suite:
+        print("⏱️ micro ...")
+        suites["micro"] = micro.run()
+    if "asgi" in args.suite:
+        print("⏱️ asgi ...")
+        suites["asgi"] = asgi.run(args.requests)
+    if "load" in args.suite:
+        print("⏱️ load ...")
+        suites["load"] = load.run(args.url, args.concurrency, args.total)
+
+    result = {
+        "meta": {
+            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "args": vars(args),
+        },
+        "suites": suites,
+        "metrics": flatten(suites),
+    }
+    print(json.dumps(suites, indent=2, ensure_ascii=False))
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2, ensure_ascii=False)
+    print(f"💾 结果已写入 {args.output}")
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2, ensure_ascii=False)
+        print(f"💾 基线已写入 {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)["metrics"]
+        print(f"📊 与基线比较 (阈值 {args.threshold:.0%}):")
+        regressions = compare(result["metrics"], baseline, args.threshold)
+        if regressions:
+            print(f"❌ {len(regressions)} 项性能回归")
+            return 1
+        print("✅ 无性能回归")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,51 @@
+# backend/benchmarks/asgi.py
+"""进程内接口基准: 通过 httpx 的 ASGI transport 直接调用应用 (不经网络)，逐个顺序请求"""
+import asyncio
+import time
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+from benchmarks import env
+from benchmarks.stats import summarize
+
+# (名称, 方法, 路径, 请求体)
+ENDPOINTS: List[Tuple[str, str, str, Optional[dict]]] = [
+    ("sizing", "POST", "/api/v1/calculate/sizing",
+     {"power": 15, "power_unit": "kw", "voltage_type": "380v", "distance": 120, "cable_type": "yjv"}),
+    ("check_fake", "POST", "/api/v1/check/fake", {"nominal_size": "2.5", "measured_weight": 3.0}),
+    ("market_copper", "GET", "/api/v1/market/copper", None),
+]
+
+WARMUP_REQUESTS = 20
+
+
+async def _send(client: httpx.AsyncClient, method: str, path: str, body: Optional[dict]) -> float:
+    start = time.perf_counter()
+    resp = await client.request(method, path, json=body)
+    elapsed = time.perf_counter() - start
+    resp.raise_for_status()
+    return elapsed
+
+
+async def _run(requests_per_endpoint: int) -> Dict[str, Dict[str, float]]:
+    from app.main import app
+
+    results = {}
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for name, method, path, body in ENDPOINTS:
+                for _ in range(WARMUP_REQUESTS):
+                    await _send(client, method, path, body)
+                latencies = []
+                started = time.perf_counter()
+                for _ in range(requests_per_endpoint):
+                    latencies.append(await _send(client, method, path, body))
+                results[name] = summarize(latencies, time.perf_counter() - started)
+    return results
+
+
+def run(requests_per_endpoint: int = 500) -> Dict[str, Dict[str, float]]:
+    env.prepare()
+    return asyncio.run(_run(requests_per_endpoint))
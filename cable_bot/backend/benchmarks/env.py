@@ -0,0 +1,44 @@
+# backend/benchmarks/env.py
+"""基准环境: 临时数据库 + 禁用外网数据源，必须在导入 app 之前调用 prepare()"""
+import os
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_prepared = None
+
+
+def prepare() -> str:
+    """创建临时库、写入规格与一条铜价记录，返回数据库路径 (重复调用只做一次)"""
+    global _prepared
+    if _prepared:
+        return _prepared
+
+    workdir = tempfile.mkdtemp(prefix="webcable-bench-")
+    db_path = os.path.join(workdir, "bench.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    os.environ.pop("ASYNC_DATABASE_URL", None)
+    os.environ["RUNTIME_DIR"] = workdir
+    # 基准客户端单 IP 压测，准入控制会把它当爬虫限速 (429)，测的是接口本身
+    os.environ["ADMISSION_ENABLED"] = "0"
+    # 基准不应依赖外网: 数据源指向不可达地址 (库里已有价格，启动时也不会去抓)
+    for key in ("FX_RATE_URL", "YAHOO_COPPER_URL", "EASTMONEY_COPPER_URL"):
+        os.environ[key] = "http://127.0.0.1:9/unreachable"
+    if BACKEND_DIR not in sys.path:
+        sys.path.insert(0, BACKEND_DIR)
+
+    import seed
+    from app.models.database import SessionLocal
+    from app.models.tables import CopperPrice
+
+    seed.init_db()
+    db = SessionLocal()
+    try:
+        db.add(CopperPrice(price_cny=68000.0, price_usd=9400.0, exchange_rate=7.25, source="Benchmark"))
+        db.commit()
+    finally:
+        db.close()
+
+    _prepared = db_path
+    return db_path
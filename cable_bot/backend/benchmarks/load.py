@@ -0,0 +1,78 @@
+# backend/benchmarks/load.py
+"""
+压测: 若干 worker 共同发出固定数量的请求，统计 p50/p95/p99 与 RPS。
+传入 url 时压真实部署的服务，N 个并发 worker。
+不传 url 时压进程内应用: httpx.ASGITransport 在同一事件循环里逐个执行请求，
+并发 worker 并不能真正重叠，所以只跑一个 worker，结果标记为 serial，不记录并发数。
+"""
+import asyncio
+import itertools
+import time
+from typing import Dict, List, Optional
+
+import httpx
+
+from benchmarks import env
+from benchmarks.stats import summarize
+
+# 压测场景: 每个场景轮流使用多组请求体，避免全部命中同一条缓存
+SCENARIOS = {
+    "sizing": ("POST", "/api/v1/calculate/sizing", [
+        {"power": p, "power_unit": "kw", "voltage_type": v, "distance": d, "cable_type": "yjv"}
+        for p in (1.5, 3, 7.5, 15, 30) for v in ("220v", "380v") for d in (10, 35, 80, 150)
+    ]),
+    "market_copper": ("GET", "/api/v1/market/copper", [None]),
+}
+
+
+async def _scenario(client: httpx.AsyncClient, method: str, path: str, bodies: List[Optional[dict]],
+                    concurrency: int, total: int) -> Dict[str, float]:
+    latencies: List[float] = []
+    errors = 0
+    counter = itertools.count()
+    body_cycle = itertools.cycle(bodies)
+
+    async def worker():
+        nonlocal errors
+        while next(counter) < total:
+            body = next(body_cycle)
+            start = time.perf_counter()
+            try:
+                resp = await client.request(method, path, json=body)
+                if resp.status_code >= 400:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    summary = summarize(latencies, time.perf_counter() - started)
+    summary["errors"] = errors
+    return summary
+
+
+async def _run(url: Optional[str], concurrency: int, total: int) -> Dict[str, dict]:
+    results = {}
+    if url:
+        limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        async with httpx.AsyncClient(base_url=url, limits=limits, timeout=30) as client:
+            for name, (method, path, bodies) in SCENARIOS.items():
+                results[name] = await _scenario(client, method, path, bodies, concurrency, total)
+                results[name].update(mode="concurrent", concurrency=concurrency)
+        return results
+
+    from app.main import app
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for name, (method, path, bodies) in SCENARIOS.items():
+                results[name] = await _scenario(client, method, path, bodies, 1, total)
+                results[name]["mode"] = "serial"
+    return results
+
+
+def run(url: Optional[str] = None, concurrency: int = 32, total: int = 2000) -> Dict[str, dict]:
+    if not url:
+        env.prepare()
+    return asyncio.run(_run(url, concurrency, total))
@@ -0,0 +1,43 @@
+# backend/benchmarks/micro.py
+"""微基准: ElectricalCalculator 各核心函数的单次耗时 (纳秒)"""
+import timeit
+from typing import Callable, Dict
+
+from benchmarks import env
+
+
+def time_per_op(fn: Callable[[], object], repeat: int = 5) -> float:
+    """自动确定循环次数，取多轮中最快一轮的平均单次耗时 (纳秒)"""
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    best = min(timer.repeat(repeat=repeat, number=number))
+    return best / number * 1e9
+
+
+def run() -> Dict[str, Dict[str, float]]:
+    env.prepare()
+    from app.models.database import SessionLocal
+    from app.services import spec_catalog
+    from app.services.calc_logic import ElectricalCalculator as EC
+
+    db = SessionLocal()
+    try:
+        catalog = spec_catalog.load_catalog(db)
+    finally:
+        db.close()
+
+    cases = {
+        "calculate_current": lambda: EC.calculate_current(15.0, "kw", "380v"),
+        "get_temp_factor": lambda: EC.get_temp_factor("yjv", 42.0),
+        "calculate_voltage_drop_pure": lambda: EC.calculate_voltage_drop_pure(32.5, 120.0, "6.0", "cu", "380v"),
+        "smart_select_cable": lambda: EC.smart_select_cable(
+            catalog, current=32.5, material="cu", cable_type="yjv",
+            distance=120.0, voltage="380v", max_drop=5.0, ambient_temp=40.0
+        ),
+        # 长距离: 压降驱动多档升规
+        "smart_select_cable_long_run": lambda: EC.smart_select_cable(
+            catalog, current=12.0, material="cu", cable_type="yjv",
+            distance=900.0, voltage="220v", max_drop=5.0, ambient_temp=40.0
+        ),
+    }
+    return {name: {"ns_per_op": round(time_per_op(fn), 1)} for name, fn in cases.items()}
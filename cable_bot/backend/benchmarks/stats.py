@@ -0,0 +1,26 @@
+# backend/benchmarks/stats.py
+"""延迟统计工具"""
+from typing import Dict, List
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """线性插值百分位 (输入须已排序)"""
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * pct / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def summarize(latencies_s: List[float], elapsed_s: float) -> Dict[str, float]:
+    """把一组请求耗时 (秒) 汇总成 p50/p95/p99 (毫秒) 与 RPS"""
+    values = sorted(latencies_s)
+    return {
+        "requests": len(values),
+        "p50_ms": round(percentile(values, 50) * 1000, 3),
+        "p95_ms": round(percentile(values, 95) * 1000, 3),
+        "p99_ms": round(percentile(values, 99) * 1000, 3),
+        "max_ms": round(values[-1] * 1000, 3) if values else 0.0,
+        "rps": round(len(values) / elapsed_s, 1) if elapsed_s > 0 else 0.0,
+    }
@@ -5,7 +5,7 @@ import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from app.models.database import SessionLocal, engine, Base
-from app.models.tables import CableSpec
+from app.services import spec_loader
 
 # --- 原始数据 (来自 calc_logic.py) ---
 # 我们把数据直接复制过来，作为初始化的源数据
@@ -28,52 +28,35 @@ WEIGHT_STD_DB = {
     "6.0": 6.8
 }
 
+def seed_rows():
+    """把上面的原始数据展开成规格行 (格式同 spec_loader 的规格文件)"""
+    rows = []
+    # 遍历材质 (cu) -> 绝缘类型 (bv, yjv) -> 规格 (1.5, 2.5...)
+    for material, ins_types in AMPACITY_DB.items():
+        for insulation, sizes in ins_types.items():
+            for size, ampacity in sizes.items():
+                # 尝试匹配重量数据 (如果没有则为 None)
+                weight = WEIGHT_STD_DB.get(size)
+                rows.append({
+                    "material": material,
+                    "insulation": insulation,
+                    "size": size,
+                    "ampacity": float(ampacity),
+                    "weight_per_100m": float(weight) if weight else None
+                })
+    return rows
+
 def init_db():
     print("🔄 开始初始化数据库...")
     
     # 1. 确保表结构存在
     Base.metadata.create_all(bind=engine)
     
-    # 2. 获取数据库会话
+    # 2. 整批 upsert (不再先删光，API 运行中执行也不会出现空目录)
     db = SessionLocal()
-    
     try:
-        # 3. 清空现有数据 (防止重复)
-        print("🗑️ 清理旧数据...")
-        db.query(CableSpec).delete()
-        db.commit()
-        
-        # 4. 转换并写入新数据
-        print("💾 正在写入新数据...")
-        count = 0
-        
-        # 遍历材质 (cu)
-        for material, ins_types in AMPACITY_DB.items():
-            # 遍历绝缘类型 (bv, yjv)
-            for insulation, sizes in ins_types.items():
-                # 遍历规格 (1.5, 2.5...)
-                for size, ampacity in sizes.items():
-                    
-                    # 尝试匹配重量数据 (如果没有则为 None)
-                    weight = WEIGHT_STD_DB.get(size)
-                    
-                    # 创建数据库对象
-                    cable = CableSpec(
-                        material=material,
-                        insulation=insulation,
-                        size=size,
-                        ampacity=float(ampacity),
-                        weight_per_100m=float(weight) if weight else None
-                    )
-                    
-                    db.add(cable)
-                    count += 1
-        
-        # 5. 提交事务
-        db.commit()
-        print(f"✅ 成功! 已写入 {count} 条线缆规格数据。")
-        print("🚀 数据库 cable_expert.db 已准备就绪。")
-        
+        summary = spec_loader.load_specs(db, seed_rows(), source="seed.py", label="seed")
+        print(f"✅ 成功! 新增 {summary['inserted']} 条，更新 {summary['updated']} 条，未变 {summary['unchanged']} 条 (目录版本 {summary['version']})。")
     except Exception as e:
         print(f"❌ 发生错误: {e}")
         db.rollback()
@@ -81,4 +64,4 @@ def init_db():
         db.close()
 
 if __name__ == "__main__":
-    init_db()
\ No newline at end of file
+    init_db()
@@ -0,0 +1,44 @@
+# backend/serve.py
+"""
+生产环境启动入口: python serve.py
+
+按 WEB_CONCURRENCY (默认 CPU 核数) 启动多个 worker 进程，选型这类 CPU 密集接口随核数横向扩展。
+定时任务 (抓铜价、清理历史) 只在拿到文件锁的 leader worker 上运行，见 app/core/leader.py；
+其它 worker 定期从数据库同步铜价快照和规格目录。
+可用环境变量: HOST / PORT / WEB_CONCURRENCY / LOG_LEVEL / ACCESS_LOG / FORWARDED_ALLOW_IPS
+也可以交给 gunicorn 管理进程，行为相同:
+    gunicorn app.main:app -k uvicorn.workers.UvicornWorker -w 4 -b 0.0.0.0:8000
+"""
+import os
+import sys
+
+import uvicorn
+
+# 将当前目录加入 Python 路径，确保能导入 app 模块 (worker 进程会继承)
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.core import config
+from app.models import tables  # noqa: F401  (注册全部表)
+from app.models.database import Base, engine
+
+
+def main():
+    # 建表在主进程里做一次，避免多个 worker 同时 create_all 互相冲突
+    Base.metadata.create_all(bind=engine)
+    engine.dispose()
+
+    print(f"🚀 WebCable API 启动: {config.HOST}:{config.PORT}，{config.WEB_CONCURRENCY} 个 worker")
+    uvicorn.run(
+        "app.main:app",
+        host=config.HOST,
+        port=config.PORT,
+        workers=config.WEB_CONCURRENCY,
+        log_level=config.LOG_LEVEL,
+        access_log=config.ACCESS_LOG,
+        proxy_headers=True,
+        forwarded_allow_ips=config.FORWARDED_ALLOW_IPS,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,16 @@
+# backend/tests/conftest.py
+"""测试环境: 临时数据库 + 数据源指向不可达地址，必须在导入 app 之前设置 (同 benchmarks/env.py)"""
+import os
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_workdir = tempfile.mkdtemp(prefix="webcable-test-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_workdir, 'test.db')}"
+os.environ.pop("ASYNC_DATABASE_URL", None)
+os.environ["RUNTIME_DIR"] = _workdir
+for key in ("FX_RATE_URL", "YAHOO_COPPER_URL", "EASTMONEY_COPPER_URL"):
+    os.environ[key] = "http://127.0.0.1:9/unreachable"
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
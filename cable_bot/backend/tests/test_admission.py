@@ -0,0 +1,220 @@
+# backend/tests/test_admission.py
+"""准入控制: 令牌桶补充与淘汰、并发名额按序转交、取消不漏名额、拒绝与超时"""
+import asyncio
+
+import pytest
+
+from app.core import admission, config
+from app.core.admission import AdmissionController, AdmissionMiddleware, RouteClass, TokenBuckets, classify
+
+
+@pytest.mark.parametrize("method, path, expected", [
+    ("POST", "/api/v1/calculate/sizing", "sizing"),
+    ("POST", "/api/v1/calculate/sizing/batch", "heavy"),
+    ("POST", "/api/v1/calculate/sizing/import", "import"),
+    ("GET", "/api/v1/market/copper", "price"),
+    ("GET", "/api/v1/market/copper/history", "heavy"),
+    ("GET", "/api/v1/market/copper/stream", None),
+    ("POST", "/api/v1/feeder-trees", "heavy"),
+    ("PATCH", "/api/v1/feeder-trees/abc/loads", "sizing"),
+    ("GET", "/metrics", None),
+])
+def test_classify(method, path, expected):
+    assert classify(method, path) == expected
+
+
+# --- 令牌桶 ---
+def test_burst_then_throttle_then_refill():
+    buckets = TokenBuckets(rate=10, burst=40, idle_seconds=300, max_clients=100)
+    waits = [buckets.take("a", 1, 100.0) for _ in range(45)]
+    assert waits[:40] == [0.0] * 40
+    assert all(w == pytest.approx(0.1) for w in waits[40:])
+    # 0.25 秒补 2.5 个
+    assert buckets.take("a", 2, 100.25) == 0.0
+    assert buckets.take("a", 1, 100.25) == pytest.approx(0.05)
+    # 其它客户端不受影响
+    assert buckets.take("b", 1, 100.25) == 0.0
+
+
+def test_refill_is_capped_at_burst():
+    buckets = TokenBuckets(rate=10, burst=5, idle_seconds=300, max_clients=100)
+    buckets.take("a", 5, 0.0)
+    assert buckets.take("a", 5, 100.0) == 0.0
+    assert buckets.take("a", 1, 100.0) > 0
+
+
+def test_idle_clients_are_evicted_from_the_front():
+    buckets = TokenBuckets(rate=10, burst=40, idle_seconds=60, max_clients=100)
+    buckets.take("old", 1, 0.0)
+    buckets.take("recent", 1, 50.0)
+    buckets.take("new", 1, 70.0)
+    assert len(buckets) == 2 and buckets.evicted == 1
+
+
+def test_client_cap_is_exact():
+    buckets = TokenBuckets(rate=10, burst=40, idle_seconds=300, max_clients=3)
+    for k in range(5):
+        buckets.take(f"c{k}", 1, float(k))
+    assert len(buckets) == 3 and buckets.evicted == 2
+    # 最近访问过的不会被先淘汰
+    buckets.take("c2", 1, 10.0)
+    buckets.take("c5", 1, 11.0)
+    assert list(buckets._buckets) == ["c4", "c2", "c5"]
+
+
+# --- 并发名额 ---
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_slots_are_handed_over_in_fifo_order():
+    async def main():
+        rc = RouteClass("t", 1.0, limit=1, budget_ms=1000, initial_ms=1.0)
+        assert await rc.acquire() is None
+        order = []
+
+        async def waiter(k):
+            assert await rc.acquire() is None
+            order.append(k)
+            await asyncio.sleep(0)
+            rc.release()
+
+        tasks = [asyncio.create_task(waiter(k)) for k in range(3)]
+        await asyncio.sleep(0)
+        assert rc.waiting == 3 and rc.active == 1
+        rc.release()
+        await asyncio.gather(*tasks)
+        assert order == [0, 1, 2]
+        assert rc.active == 0 and rc.waiting == 0
+    run(main())
+
+
+def test_expected_wait_over_budget_is_shed():
+    async def main():
+        rc = RouteClass("t", 1.0, limit=2, budget_ms=10, initial_ms=50.0)
+        assert await rc.acquire() is None
+        assert await rc.acquire() is None
+        retry = await rc.acquire()
+        assert retry == pytest.approx(0.025)
+        assert rc.shed == 1 and rc.waiting == 0 and rc.active == 2
+    run(main())
+
+
+def test_queue_wait_beyond_budget_times_out():
+    async def main():
+        rc = RouteClass("t", 1.0, limit=1, budget_ms=30, initial_ms=1.0)
+        assert await rc.acquire() is None
+        retry = await rc.acquire()
+        assert retry is not None
+        assert rc.timed_out == 1 and rc.waiting == 0 and rc.active == 1
+        rc.release()
+        assert rc.active == 0
+    run(main())
+
+
+def test_cancelled_waiter_does_not_leak_a_slot():
+    async def main():
+        rc = RouteClass("t", 1.0, limit=1, budget_ms=1000, initial_ms=1.0)
+        assert await rc.acquire() is None
+        task = asyncio.create_task(rc.acquire())
+        await asyncio.sleep(0)
+        assert rc.waiting == 1
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert rc.waiting == 0
+        rc.release()
+        assert rc.active == 0
+    run(main())
+
+
+def test_cancel_right_after_handoff_returns_the_slot():
+    async def main():
+        rc = RouteClass("t", 1.0, limit=1, budget_ms=1000, initial_ms=1.0)
+        assert await rc.acquire() is None
+        task = asyncio.create_task(rc.acquire())
+        await asyncio.sleep(0)
+        rc.release()            # 名额转交给等待者 (active 不变)
+        task.cancel()           # 等待者还没醒来就被取消
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert rc.active == 0 and rc.waiting == 0
+    run(main())
+
+
+def test_streaming_class_does_not_move_average():
+    rc = RouteClass("import", 5.0, limit=2, budget_ms=0, initial_ms=60000.0)
+    rc.observe(600.0)
+    assert rc.avg == 60.0
+    heavy = RouteClass("heavy", 5.0, limit=4, budget_ms=2000, initial_ms=200.0)
+    heavy.observe(1.2)
+    assert heavy.avg == pytest.approx(0.3)
+
+
+def test_import_class_never_queues():
+    async def main():
+        rc = RouteClass("import", 5.0, limit=1, budget_ms=0, initial_ms=60000.0)
+        assert await rc.acquire() is None
+        assert await rc.acquire() == pytest.approx(60.0)
+        assert rc.shed == 1 and rc.waiting == 0
+    run(main())
+
+
+# --- 中间件 ---
+async def ok_app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+
+async def call(middleware, path="/api/v1/calculate/sizing", client="10.0.0.1"):
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": "POST", "path": path, "client": (client, 1234), "headers": []}
+    await middleware(scope, None, send)
+    start = sent[0]
+    return start["status"], dict(start["headers"])
+
+
+def test_middleware_admits_burst_then_429(monkeypatch):
+    monkeypatch.setattr(config, "ADMISSION_ENABLED", True)
+    controller = AdmissionController()
+    middleware = AdmissionMiddleware(ok_app, controller)
+
+    async def main():
+        return [await call(middleware) for _ in range(45)]
+    responses = run(main())
+    statuses = [status for status, _ in responses]
+    assert statuses.count(200) == 40 and statuses.count(429) == 5
+    assert all(headers[b"retry-after"] == b"1" for status, headers in responses if status == 429)
+    sizing = controller.classes["sizing"]
+    assert sizing.admitted == 40 and sizing.throttled == 5 and sizing.active == 0
+
+
+def test_middleware_passes_unclassified_and_disabled(monkeypatch):
+    controller = AdmissionController()
+    middleware = AdmissionMiddleware(ok_app, controller)
+    monkeypatch.setattr(config, "ADMISSION_ENABLED", True)
+    assert run(call(middleware, path="/metrics"))[0] == 200
+    monkeypatch.setattr(config, "ADMISSION_ENABLED", False)
+    assert run(call(middleware))[0] == 200
+    assert sum(rc.admitted for rc in controller.classes.values()) == 0
+
+
+def test_middleware_releases_slot_when_app_raises(monkeypatch):
+    monkeypatch.setattr(config, "ADMISSION_ENABLED", True)
+    controller = AdmissionController()
+
+    async def boom(scope, receive, send):
+        raise RuntimeError("boom")
+
+    middleware = AdmissionMiddleware(boom, controller)
+    with pytest.raises(RuntimeError):
+        run(call(middleware))
+    assert controller.classes["sizing"].active == 0
+
+
+def test_route_classes_cover_rules():
+    assert {name for _, _, name in admission.ROUTE_RULES if name} <= set(admission.ROUTE_CLASSES)
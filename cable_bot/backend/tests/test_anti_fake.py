@@ -0,0 +1,124 @@
+# backend/tests/test_anti_fake.py
+"""防伪检测: 规格归一、标准重量来源、风险分级与整批判定"""
+import math
+
+import pytest
+
+from app.core import config
+from app.models.schemas import AntiFakeRequest
+from app.services import anti_fake
+from app.services.anti_fake import AntiFakeIndex, conductor_weight
+
+from tests.test_selection import SEED_CATALOG, _catalog
+
+INDEX = AntiFakeIndex(SEED_CATALOG)
+
+# 只有 2.5 与 10 有重量: 4 / 6 落在中间 (插值)，16 超出范围 (拟合)
+GAPPED_INDEX = AntiFakeIndex(_catalog([
+    {"material": "cu", "insulation": "bv", "size": s, "ampacity": a, "weight_per_100m": w}
+    for s, a, w in (("2.5", 24, 3.1), ("4", 32, None), ("6", 40, None), ("10", 55, 10.6), ("16", 75, None))
+]))
+
+
+def check(index=INDEX, **kwargs):
+    return index.check(AntiFakeRequest(**kwargs))
+
+
+@pytest.mark.parametrize("size", ["4", "4.0", "4mm²", " 4.00 "])
+def test_size_spellings_hit_same_entry(size):
+    assert INDEX.lookup("cu", "bv", size) == ("4.0", 4.6, "catalog")
+
+
+@pytest.mark.parametrize("size", ["abc", "", "999"])
+def test_unknown_size_is_missing(size):
+    result = check(nominal_size=size, measured_weight=4.6)
+    assert result["message"] == anti_fake.MISSING_MESSAGE
+    assert not result["is_pass"]
+    assert result["matched_size"] is None
+
+
+def test_interpolated_weight_lies_between_neighbours():
+    insulation = {s: GAPPED_INDEX.lookup("cu", "bv", s)[1] - float(conductor_weight(float(s), "cu"))
+                  for s in ("2.5", "4", "6", "10")}
+    for size in ("4", "6"):
+        _, weight, source = GAPPED_INDEX.lookup("cu", "bv", size)
+        assert source == "interpolated"
+        assert min(insulation["2.5"], insulation["10"]) <= insulation[size] <= max(insulation["2.5"], insulation["10"])
+    # 按 √截面 线性插值
+    r25, r4, r10 = math.sqrt(2.5), math.sqrt(4.0), math.sqrt(10.0)
+    expected = insulation["2.5"] + (insulation["10"] - insulation["2.5"]) * (r4 - r25) / (r10 - r25)
+    assert insulation["4"] == pytest.approx(expected, abs=0.01)
+
+
+def test_modeled_weight_outside_known_range_and_for_aluminium():
+    _, weight16, source16 = GAPPED_INDEX.lookup("cu", "bv", "16")
+    assert source16 == "modeled"
+    assert weight16 > GAPPED_INDEX.lookup("cu", "bv", "10")[1]
+    _, weight_al, source_al = INDEX.lookup("al", "bv", "10")
+    _, weight_cu, _ = INDEX.lookup("cu", "bv", "10")
+    assert source_al == "modeled"
+    # 绝缘模型共用，差别只在导体质量
+    assert weight_cu - weight_al == pytest.approx(
+        float(conductor_weight(10, "cu") - conductor_weight(10, "al")), abs=0.02)
+
+
+def test_tolerance_grows_with_source_uncertainty():
+    catalog = check(nominal_size="4", measured_weight=4.6)
+    modeled = check(nominal_size="10", measured_weight=10.75)
+    assert catalog["weight_source"] == "catalog" and modeled["weight_source"] == "modeled"
+    assert catalog["tolerance_percent"] == round(config.ANTI_FAKE_TOLERANCE * 100, 2)
+    assert modeled["tolerance_percent"] == round(math.hypot(config.ANTI_FAKE_TOLERANCE, 0.05) * 100, 2)
+
+
+@pytest.mark.parametrize("diff, level", [
+    (+0.10, "safe"), (0.0, "safe"), (-0.03, "safe"), (-0.07, "warning"), (-0.10, "warning"), (-0.20, "danger"),
+])
+def test_risk_bands(diff, level):
+    result = check(nominal_size="4", measured_weight=4.6 * (1 + diff))
+    assert result["risk_level"] == level
+    assert result["message"] == anti_fake.MESSAGES[level]
+    assert result["is_pass"] == (level == "safe")
+
+
+def test_heavier_than_standard_is_full_confidence():
+    assert check(nominal_size="4", measured_weight=5.0)["confidence"] == 1.0
+
+
+def test_lot_shared_source_error_does_not_average_out():
+    """50 卷拟合规格各轻 5%: 每卷都合格，整批也不应仅因卷数多就判可疑"""
+    items = [{"nominal_size": "10", "measured_weight": 10.75 * 0.95}] * 50
+    lot = INDEX.check_lot(items)
+    assert lot["summary"]["passed"] == 50
+    assert lot["summary"]["lot_risk_level"] == "safe"
+    single = lot["results"][0]["result"]["confidence"]
+    assert lot["summary"]["lot_confidence"] <= single
+
+
+def test_lot_systematic_shortfall_on_catalog_sizes_is_flagged():
+    """规格库自带重量的规格每卷都只轻 5%: 单卷合格，整批判可疑"""
+    items = [{"reel_id": f"R{k}", "nominal_size": "4", "measured_weight": 4.6 * 0.95} for k in range(50)]
+    lot = INDEX.check_lot(items)
+    assert lot["summary"]["passed"] == 50
+    assert lot["summary"]["lot_risk_level"] in ("warning", "danger")
+    expected_sigma = math.sqrt(config.ANTI_FAKE_LOT_TOLERANCE ** 2 + config.ANTI_FAKE_TOLERANCE ** 2 / 50)
+    assert lot["summary"]["lot_confidence"] == round(math.erfc(0.05 / expected_sigma / math.sqrt(2)), 4)
+
+
+def test_lot_reports_invalid_and_missing_items_per_index():
+    lot = INDEX.check_lot([
+        {"reel_id": "A", "nominal_size": "4", "measured_weight": 4.6},
+        "not an object",
+        {"nominal_size": "4", "measured_weight": -1},
+        {"reel_id": "D", "nominal_size": "777", "measured_weight": 4.6},
+    ])
+    assert lot["total"] == 4 and lot["failed"] == 3
+    assert [r["ok"] for r in lot["results"]] == [True, False, False, False]
+    assert lot["results"][3]["reel_id"] == "D"
+    assert anti_fake.MISSING_MESSAGE in lot["results"][3]["error"]
+    assert lot["summary"]["checked"] == 1
+
+
+def test_empty_lot_is_not_safe():
+    lot = INDEX.check_lot([])
+    assert lot["summary"]["lot_risk_level"] == "warning"
+    assert lot["summary"]["lot_message"] == anti_fake.MISSING_MESSAGE
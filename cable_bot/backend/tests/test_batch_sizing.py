@@ -0,0 +1,116 @@
+# backend/tests/test_batch_sizing.py
+"""批量选型与单条选型的差分测试: 向量化 searchsorted + 闭式解微调 必须与逐条计算逐位一致"""
+import random
+
+import pytest
+from pydantic import ValidationError
+
+from app.models.schemas import CableCalcRequest
+from app.services import derating
+from app.services.batch_sizing import size_batch
+from app.services.calc_logic import ElectricalCalculator
+
+from tests.test_selection import IRREGULAR_CATALOG, SEED_CATALOG, UNPARSABLE_CATALOG
+
+
+def single(catalog, item):
+    """与 /api/v1/calculate/sizing 相同的逐条流程，返回 (结果, 错误)"""
+    try:
+        req = CableCalcRequest(**item)
+    except ValidationError:
+        return None, "validation"
+    amps = ElectricalCalculator.calculate_current(req.power, req.power_unit, req.voltage_type)
+    try:
+        factors = derating.derating_breakdown(
+            req.cable_type, req.temperature, req.derating_mode, req.installation, req.circuits_grouped,
+            req.soil_resistivity, req.harmonics_percent, three_phase=req.voltage_type == "380v",
+            soil_temperature=req.soil_temperature,
+        )
+    except derating.DeratingError as e:
+        return None, str(e)
+    selection = ElectricalCalculator.smart_select_cable(
+        catalog, current=amps, material=req.material, cable_type=req.cable_type, distance=req.distance,
+        voltage=req.voltage_type, max_drop=req.max_voltage_drop, ambient_temp=req.temperature,
+        derating_factors=factors,
+    )
+    return {
+        "current_amps": amps,
+        "recommended_size": selection["size"],
+        "voltage_drop_percent": selection["drop"],
+        "mcb_rating": ElectricalCalculator.recommend_mcb(amps, selection["safe_ampacity"]),
+        "selection_reason": selection["reason"],
+        "safe_ampacity": selection["safe_ampacity"],
+        "derating": selection["derating"],
+    }, None
+
+
+def random_item(rng, materials):
+    unit = rng.choice(["kw", "hp", "amps"])
+    item = {
+        "power": round(rng.choice([rng.uniform(0.1, 15), rng.uniform(0.1, 400)]), rng.choice([0, 1, 2, 3])),
+        "power_unit": unit,
+        "voltage_type": rng.choice(["220v", "380v"]),
+        "distance": round(rng.choice([rng.uniform(1, 80), rng.uniform(1, 1500)]), 1),
+        "material": rng.choice(materials),
+        "cable_type": rng.choice(["yjv", "bv"]),
+        "temperature": rng.choice([25, 30, 35, 40, 45, 50, round(rng.uniform(5, 85), 1)]),
+        "max_voltage_drop": rng.choice([1.0, 2.5, 3, 5, round(rng.uniform(0.5, 10), 2)]),
+        "derating_mode": rng.choice(["step", "interpolate"]),
+    }
+    if rng.random() < 0.4:
+        item.update(
+            installation=rng.choice(["conduit", "tray", "tray", "buried"]),
+            circuits_grouped=rng.choice([1, 2, 3, 6, 9, 20, 25]),
+            harmonics_percent=rng.choice([0, 10, 20, 40, 60]),
+        )
+    if rng.random() < 0.05:
+        # 逐条校验失败的回路
+        item[rng.choice(["power", "distance"])] = rng.choice([0, -5, "abc"])
+    return item
+
+
+@pytest.mark.parametrize("catalog, count", [
+    (SEED_CATALOG, 6000),
+    (IRREGULAR_CATALOG, 2000),
+    (UNPARSABLE_CATALOG, 2000),
+], ids=["seed", "irregular", "unparsable"])
+def test_batch_matches_single(catalog, count):
+    rng = random.Random(3003)
+    materials = sorted({m for m, _ in catalog.tables} | {"al"})
+    items = [random_item(rng, materials) for _ in range(count)]
+    batch = size_batch(catalog, items)
+    assert [r["index"] for r in batch] == list(range(count))
+    outcomes = {"ok": 0, "out_of_range": 0, "derating_error": 0, "validation": 0}
+    for item, got in zip(items, batch):
+        expected, error = single(catalog, item)
+        if error == "validation":
+            assert not got["ok"] and got["error"] and got["result"] is None, item
+            outcomes["validation"] += 1
+        elif error is not None:
+            assert (got["ok"], got["error"], got["result"]) == (False, error, None), item
+            outcomes["derating_error"] += 1
+        else:
+            assert got["ok"] and got["error"] is None, item
+            assert got["result"] == expected, item
+            outcomes["out_of_range" if expected["recommended_size"] == "Out of Range" else "ok"] += 1
+    # 各类结果都覆盖到
+    assert all(outcomes.values()), outcomes
+
+
+def test_non_object_items_are_reported_in_place():
+    batch = size_batch(SEED_CATALOG, [
+        {"power": 5, "power_unit": "kw", "voltage_type": "380v", "distance": 30},
+        "oops",
+        {"power": 5, "power_unit": "kw", "voltage_type": "380v", "distance": 30, "temperature": None},
+    ])
+    assert [r["ok"] for r in batch] == [True, False, False]
+    assert batch[1]["error"] == "item: 必须是 JSON 对象"
+    assert "temperature" in batch[2]["error"]
+
+
+def test_missing_material_table_is_out_of_range():
+    item = {"power": 5, "power_unit": "kw", "voltage_type": "380v", "distance": 30, "material": "al"}
+    got = size_batch(SEED_CATALOG, [item])[0]
+    expected, _ = single(SEED_CATALOG, item)
+    assert got["result"] == expected
+    assert expected["recommended_size"] == "Out of Range"
@@ -0,0 +1,39 @@
+# backend/tests/test_bulk_import.py
+"""流式导入的切行: 超长行无论客户端怎么分块都要被丢弃"""
+import asyncio
+
+import pytest
+
+from app.services.bulk_import import MAX_LINE_CHARS, iter_lines
+
+
+def _split(data: bytes, size: int):
+    async def chunks():
+        for i in range(0, len(data), size):
+            yield data[i:i + size]
+    return chunks()
+
+
+def _collect(data: bytes, size: int):
+    async def run():
+        return [item async for item in iter_lines(_split(data, size))]
+    return asyncio.run(run())
+
+
+LONG = "x" * (MAX_LINE_CHARS + 1)
+
+
+@pytest.mark.parametrize("size", [7, 4096, MAX_LINE_CHARS * 4], ids=["tiny", "small", "whole-body"])
+def test_oversized_line_rejected_regardless_of_chunking(size):
+    data = f"power,distance\r\n10,20\n{LONG}\n30,40\n{LONG}".encode()
+    assert _collect(data, size) == [(1, "power,distance"), (2, "10,20"), (3, None), (4, "30,40"), (5, None)]
+
+
+def test_line_at_limit_is_kept():
+    line = "y" * MAX_LINE_CHARS
+    assert _collect(f"{line}\nz\n".encode(), MAX_LINE_CHARS * 2) == [(1, line), (2, "z")]
+
+
+def test_multibyte_split_across_chunks():
+    data = "规格,长度\n4.0,10\n".encode()
+    assert _collect(data, 1) == [(1, "规格,长度"), (2, "4.0,10")]
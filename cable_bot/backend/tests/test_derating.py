@@ -0,0 +1,169 @@
+# backend/tests/test_derating.py
+"""降容系数: 温度表 (B.52.14 / B.52.15) 取值与边界、并列回路、土壤热阻、总系数取整方向"""
+import math
+
+import pytest
+
+from app.services import derating
+
+
+@pytest.mark.parametrize("installation, circuits, expected", [
+    ("buried", 1, 1.00), ("buried", 6, 0.50),
+    ("conduit", 7, 0.54), ("conduit", 20, 0.38),
+    ("tray", 10, 0.72),
+])
+def test_grouping_factor_from_table(installation, circuits, expected):
+    factors = derating.derate("yjv", "step", [30], [installation], [circuits], [2.5], [0], [False])
+    assert factors["grouping"][0] == expected
+
+
+@pytest.mark.parametrize("installation, circuits", [("buried", 7), ("buried", 20), ("conduit", 21), ("tray", 0)])
+def test_grouping_outside_table_is_nan(installation, circuits):
+    assert math.isnan(derating.grouping_factors([installation], [circuits])[0])
+
+
+@pytest.mark.parametrize("installation, circuits", [("conduit", 21), ("tray", 0)])
+def test_grouping_outside_table_is_rejected(installation, circuits):
+    with pytest.raises(derating.DeratingError, match="并列回路数"):
+        derating.derating_breakdown("yjv", 20, installation=installation, circuits=circuits)
+
+
+def test_buried_table_stops_at_six_circuits():
+    assert derating.MAX_GROUPED_CIRCUITS == {"conduit": 20, "tray": 20, "buried": 6}
+
+
+# --- 直埋 ---
+def test_buried_is_rejected_without_ground_ratings():
+    assert "ground" not in derating.RATED_LOCATIONS
+    with pytest.raises(derating.DeratingError, match="埋地"):
+        derating.derating_breakdown("yjv", 40, installation="buried")
+
+
+def test_buried_factors_use_soil_temperature_not_air_temperature():
+    arrays = derating.derate("yjv", "step", [40, 40], ["buried", "buried"], [1, 1], [2.5, 2.5], [0, 0],
+                             [False, False], [20, 30])
+    # 空气 40°C 对埋地无影响；土壤 20°C 为基准，30°C 按 B.52.15
+    assert arrays["temperature"].tolist() == [1.00, 0.93]
+    # 规格库没有埋地载流量，总系数为 NaN (由调用方报错)
+    assert all(t != t for t in arrays["total"])
+
+
+def test_soil_temperature_defaults_to_reference():
+    arrays = derating.derate("bv", "step", [55], ["buried"], [1], [2.5], [0], [False])
+    assert arrays["temperature"][0] == 1.00
+    assert derating.REFERENCE_SOIL_TEMPERATURE == 20.0
+
+
+def test_buried_error_is_reported_before_table_ranges():
+    factors = {"temperature": float("nan"), "grouping": float("nan"), "soil": float("nan"),
+               "harmonics": 1.0, "total": float("nan")}
+    error = derating.describe_error("bv", 40, "buried", 9, 9.0, factors, 90)
+    assert "埋地" in error
+
+
+def test_buried_sizing_request_is_422():
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    response = TestClient(app).post("/api/v1/calculate/sizing", json={
+        "power": 10, "power_unit": "kw", "voltage_type": "380v", "distance": 50, "installation": "buried",
+    })
+    assert response.status_code == 422
+    assert "埋地" in response.json()["detail"]
+
+
+# --- 环境温度 (B.52.14 空气 / B.52.15 土壤) ---
+@pytest.mark.parametrize("cable_type, location, temp, expected", [
+    ("bv", "air", 10, 1.22), ("bv", "air", 30, 1.00), ("bv", "air", 40, 0.87), ("bv", "air", 60, 0.50),
+    ("yjv", "air", 10, 1.15), ("yjv", "air", 30, 1.00), ("yjv", "air", 40, 0.91), ("yjv", "air", 80, 0.41),
+    ("bv", "ground", 20, 1.00), ("bv", "ground", 30, 0.89), ("bv", "ground", 60, 0.45),
+    ("yjv", "ground", 20, 1.00), ("yjv", "ground", 40, 0.85), ("yjv", "ground", 80, 0.38),
+])
+@pytest.mark.parametrize("mode", derating.MODES)
+def test_temperature_table_points(cable_type, location, temp, expected, mode):
+    assert derating.temperature_factor(cable_type, temp, mode, location) == expected
+
+
+@pytest.mark.parametrize("cable_type, location, temp, step, interpolate", [
+    ("bv", "air", 31, 0.94, 0.988),       # 1.00 → 0.94
+    ("bv", "air", 32.5, 0.94, 0.97),
+    ("yjv", "air", 41, 0.87, 0.902),      # 0.91 → 0.87
+    ("yjv", "ground", 21, 0.96, 0.992),   # 1.00 → 0.96
+    ("bv", "air", 11.5, 1.17, 1.205),
+])
+def test_step_rounds_up_and_interpolate_is_linear(cable_type, location, temp, step, interpolate):
+    assert derating.temperature_factor(cable_type, temp, "step", location) == step
+    assert derating.temperature_factor(cable_type, temp, "interpolate", location) == interpolate
+
+
+@pytest.mark.parametrize("cable_type, location, low, high", [
+    ("bv", "air", 10, 60), ("yjv", "air", 10, 80), ("bv", "ground", 10, 60), ("yjv", "ground", 10, 80),
+])
+def test_temperature_range_boundaries(cable_type, location, low, high):
+    assert derating.temperature_range(cable_type, location) == (low, high)
+    for mode in derating.MODES:
+        derating.temperature_factor(cable_type, low, mode, location)
+        derating.temperature_factor(cable_type, high, mode, location)
+        for temp in (low - 0.1, high + 0.1):
+            with pytest.raises(derating.DeratingError, match="超出"):
+                derating.temperature_factor(cable_type, temp, mode, location)
+
+
+def test_vectorized_lookup_marks_out_of_range_as_nan():
+    factors = derating.temperature_factors("bv", [5, 30, 61, float("nan")], "step")
+    assert factors[1] == 1.0
+    assert all(f != f for f in factors[[0, 2, 3]])
+
+
+@pytest.mark.parametrize("bad", [("bad-type", "step", "air"), ("bv", "nearest", "air"), ("bv", "step", "water")])
+def test_unsupported_parameters_are_rejected(bad):
+    cable_type, mode, location = bad
+    with pytest.raises(derating.DeratingError, match="不支持"):
+        derating.temperature_factor(cable_type, 30, mode, location)
+
+
+# --- 土壤热阻 ---
+@pytest.mark.parametrize("resistivity, step, interpolate", [
+    (0.5, 1.88, 1.88), (2.5, 1.00, 1.00), (3.0, 0.90, 0.90), (2.2, 1.00, 1.072), (0.6, 1.62, 1.75),
+])
+def test_soil_factors(resistivity, step, interpolate):
+    assert derating.soil_factors([resistivity], "step")[0] == step
+    assert derating.soil_factors([resistivity], "interpolate")[0] == interpolate
+
+
+def test_soil_outside_table_is_nan():
+    assert all(f != f for f in derating.soil_factors([0.4, 3.1]))
+
+
+# --- 总系数 ---
+def test_total_is_floored_not_rounded():
+    # 0.94 × 0.57 = 0.5358，四舍五入会得到偏大的 0.536
+    factors = derating.derating_breakdown("bv", 35, installation="conduit", circuits=6)
+    assert factors["total"] == 0.535
+
+
+def test_total_never_exceeds_product():
+    import itertools
+    for temp, circuits, mode in itertools.product((12, 27, 33, 41, 47, 58), (1, 2, 3, 5, 8, 14), derating.MODES):
+        f = derating.derating_breakdown("bv", temp, mode, installation="tray", circuits=circuits,
+                                        harmonics_percent=40, three_phase=True)
+        product = f["temperature"] * f["grouping"] * f["soil"] * f["harmonics"]
+        assert f["total"] <= product + 1e-12
+        assert product - f["total"] < 0.001
+
+
+def test_exact_products_are_not_pushed_down():
+    factors = derating.derating_breakdown("bv", 40, installation="conduit", circuits=2)
+    assert factors["total"] == 0.696       # 0.87 × 0.80
+
+
+def test_out_of_range_temperature_is_422():
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    response = TestClient(app).post("/api/v1/calculate/sizing", json={
+        "power": 10, "power_unit": "kw", "voltage_type": "380v", "distance": 50,
+        "cable_type": "bv", "temperature": 65,
+    })
+    assert response.status_code == 422
+    assert "超出 BV 降容表范围 (10~60°C)" in response.json()["detail"]
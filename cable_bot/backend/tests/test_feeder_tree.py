@@ -0,0 +1,139 @@
+# backend/tests/test_feeder_tree.py
+"""配电树: 压降预算再分配、可行性判定、增量更新与全量重建一致"""
+import random
+
+import numpy as np
+import pytest
+
+from app.models.schemas import FeederLoadUpdate, FeederNode
+from app.services.feeder_tree import FeederTree
+
+from tests.test_selection import SEED_CATALOG
+
+
+def build(nodes, voltage="380v", max_drop=5.0, power_factor=0.85, temperature=30.0, cable_type="yjv"):
+    return FeederTree(SEED_CATALOG, nodes, voltage, "cu", cable_type, max_drop, power_factor, temperature)
+
+
+def path_to_root(tree, i):
+    while i >= 0:
+        yield i
+        i = tree.parent[i]
+
+
+def largest_everywhere_feasible(tree):
+    """全部用最大规格 (压降最小) 时是否满足载流量与压降: 有可行分配当且仅当此时满足"""
+    cable = tree.length > 0
+    amp_ok = tree.ampacity[-1] >= tree.current / tree.factor
+    cum = np.zeros(len(tree.ids))
+    for i in range(len(tree.ids)):
+        p = tree.parent[i]
+        cum[i] = (cum[p] if p >= 0 else 0.0) + tree.drop_min[i]
+    return bool(np.all(amp_ok | ~cable)) and cum.max() <= tree.max_drop + 1e-9
+
+
+def random_tree(rng, n):
+    nodes = [FeederNode(id="n0", parent=None, length=rng.choice([0.0, rng.uniform(5, 60)]), load_kw=0)]
+    for k in range(1, n):
+        parent = f"n{rng.randrange(max(0, k - 50), k)}"
+        nodes.append(FeederNode(
+            id=f"n{k}", parent=parent, length=round(rng.uniform(1, 120), 1),
+            load_kw=round(rng.choice([0.0, rng.uniform(0.1, 5), rng.uniform(5, 60)]), 2),
+            power_factor=rng.choice([None, round(rng.uniform(0.7, 1.0), 2)]),
+        ))
+    return nodes
+
+
+def test_slack_from_light_leaf_goes_to_main_feeder():
+    nodes = [
+        FeederNode(id="main", parent=None, length=30, load_kw=150),
+        FeederNode(id="leaf", parent="main", length=270, load_kw=0.1),
+    ]
+    tree = build(nodes, power_factor=1.0)
+    result = tree.result()
+    main, leaf = result["nodes"]
+    assert main["size"] != "Out of Range"
+    assert main["budget_percent"] > 0.5
+    assert leaf["size"] != "Out of Range"
+    assert result["summary"]["ok"]
+    assert result["summary"]["worst_drop_percent"] <= 5.0
+
+
+def test_each_segment_still_picks_smallest_size_within_budget():
+    nodes = [FeederNode(id="root", parent=None, length=0, load_kw=0)] + [
+        FeederNode(id=f"leaf{k}", parent="root", length=200, load_kw=20) for k in range(3)
+    ]
+    tree = build(nodes)
+    for i in range(1, len(tree.ids)):
+        sel = int(tree.sel[i])
+        assert sel >= 0
+        if sel > 0:
+            _, drops, amp_ok = tree._segments(np.array([i]))
+            assert not (amp_ok[0, sel - 1] and drops[0, sel - 1] <= tree.budget[i])
+
+
+def test_out_of_range_only_when_no_allocation_exists():
+    rng = random.Random(19)
+    for _ in range(200):
+        nodes = random_tree(rng, rng.randint(2, 12))
+        tree = build(nodes, voltage=rng.choice(["380v", "220v"]), max_drop=rng.choice([1.0, 3.0, 5.0]))
+        summary = tree.summary()
+        feasible = largest_everywhere_feasible(tree)
+        assert summary["ok"] == feasible
+        assert (summary["out_of_range_segments"] == 0) == feasible
+        if feasible:
+            assert tree.cum.max() <= tree.max_drop + 1e-9
+
+
+def test_infeasible_path_marks_only_its_segments():
+    nodes = [
+        FeederNode(id="root", parent=None, length=0, load_kw=0),
+        FeederNode(id="far", parent="root", length=5000, load_kw=200),
+        FeederNode(id="near", parent="root", length=10, load_kw=5),
+    ]
+    tree = build(nodes)
+    by_id = {n["id"]: n for n in tree.result()["nodes"]}
+    assert by_id["far"]["size"] == "Out of Range"
+    assert by_id["near"]["size"] != "Out of Range"
+    assert not tree.summary()["ok"]
+
+
+def assert_same(a, b):
+    assert a.ids == b.ids
+    np.testing.assert_array_equal(a.sel, b.sel)
+    np.testing.assert_allclose(a.sub_p, b.sub_p, rtol=1e-9, atol=1e-6)
+    np.testing.assert_allclose(a.seg_drop, b.seg_drop, rtol=1e-9, atol=1e-12)
+    np.testing.assert_allclose(a.cum, b.cum, rtol=1e-9, atol=1e-12)
+    np.testing.assert_allclose(a.budget, b.budget, rtol=1e-9, atol=1e-12)
+
+
+@pytest.mark.parametrize("seed", [1, 2])
+def test_incremental_update_matches_rebuild(seed):
+    rng = random.Random(seed)
+    nodes = random_tree(rng, 2000)
+    tree = build(nodes)
+    for _ in range(200):
+        picks = rng.sample(range(len(nodes)), rng.randint(1, 5))
+        changes = [
+            FeederLoadUpdate(id=f"n{k}", load_kw=round(rng.choice([0.0, rng.uniform(0.1, 5), rng.uniform(5, 80)]), 2),
+                             power_factor=rng.choice([None, round(rng.uniform(0.7, 1.0), 2)]))
+            for k in picks
+        ]
+        tree.update_loads(changes)
+        for c in changes:
+            node = nodes[int(c.id[1:])]
+            nodes[int(c.id[1:])] = node.model_copy(update={
+                "load_kw": c.load_kw, "power_factor": c.power_factor or node.power_factor})
+    assert_same(tree, build(nodes))
+
+
+def test_update_reports_path_and_resized_segments():
+    nodes = [
+        FeederNode(id="main", parent=None, length=30, load_kw=0),
+        FeederNode(id="a", parent="main", length=50, load_kw=10),
+        FeederNode(id="b", parent="main", length=50, load_kw=10),
+    ]
+    tree = build(nodes)
+    changed = tree.update_loads([FeederLoadUpdate(id="a", load_kw=120)])
+    assert set(path_to_root(tree, tree.index["a"])) <= set(changed)
+    assert tree.updates == 1
@@ -0,0 +1,58 @@
+# backend/tests/test_price_history.py
+"""铜价历史查询: 超出 MAX_POINTS 时保留最近的桶"""
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models.database import Base
+from app.models.tables import CopperPriceRollup
+from app.services import price_history
+
+END = datetime(2026, 6, 1, 12, 0, 0)
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    for h in range(48):
+        ts = END - timedelta(hours=h)
+        price = 9000.0 + h
+        session.add(CopperPriceRollup(
+            interval="1h", bucket_start=ts, samples=1,
+            open_usd=price, high_usd=price, low_usd=price, close_usd=price,
+            open_cny=price * 7, high_cny=price * 7, low_cny=price * 7, close_cny=price * 7,
+        ))
+    session.commit()
+    yield session
+    session.close()
+
+
+def test_range_within_limit_is_complete(db):
+    result = price_history.query_history(db, "1h", END - timedelta(hours=47), END)
+    assert not result["truncated"]
+    assert len(result["points"]) == 48
+    stamps = [p["t"] for p in result["points"]]
+    assert stamps == sorted(stamps)
+
+
+def test_oversized_range_keeps_newest_points(db, monkeypatch):
+    monkeypatch.setattr(price_history, "MAX_POINTS", 10)
+    result = price_history.query_history(db, "1h", END - timedelta(hours=47), END)
+    assert result["truncated"]
+    points = result["points"]
+    assert len(points) == 10
+    assert points[-1]["t"] == END.strftime("%Y-%m-%d %H:%M:%S")
+    assert points[0]["t"] == (END - timedelta(hours=9)).strftime("%Y-%m-%d %H:%M:%S")
+    assert [p["t"] for p in points] == sorted(p["t"] for p in points)
+
+
+def test_exactly_max_points_is_not_truncated(db, monkeypatch):
+    monkeypatch.setattr(price_history, "MAX_POINTS", 48)
+    result = price_history.query_history(db, "1h", END - timedelta(hours=47), END, currency="cny")
+    assert not result["truncated"]
+    assert result["currency"] == "CNY"
+    assert result["points"][-1]["c"] == 9000.0 * 7
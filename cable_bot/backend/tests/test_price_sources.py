@@ -0,0 +1,178 @@
+# backend/tests/test_price_sources.py
+"""铜价数据源: 本地桩 (httpx.MockTransport) 上的竞速、兜底与熔断"""
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from app.core import config
+from app.services.price_sources import DEFAULT_EXCHANGE_RATE, LBS_PER_TON, CircuitBreaker, CopperPriceFetcher
+
+FX_URL = "http://fx.stub/latest"
+YAHOO_URL = "http://yahoo.stub/chart"
+EASTMONEY_URL = "http://eastmoney.stub/quote"
+
+
+@pytest.fixture(autouse=True)
+def stub_urls(monkeypatch):
+    monkeypatch.setattr(config, "FX_RATE_URL", FX_URL)
+    monkeypatch.setattr(config, "YAHOO_COPPER_URL", YAHOO_URL)
+    monkeypatch.setattr(config, "EASTMONEY_COPPER_URL", EASTMONEY_URL)
+
+
+def yahoo_ok(price_lbs=4.0):
+    return {"chart": {"result": [{"meta": {"regularMarketPrice": price_lbs}}]}}
+
+
+def eastmoney_ok(cny=70000.0):
+    return {"data": {"f43": cny}}
+
+
+class Stub:
+    """按主机名分发的桩服务: routes[host] = (延迟秒数, 状态码, JSON) 或异常实例"""
+
+    def __init__(self, **routes):
+        self.routes = {"fx": (0, 200, {"rates": {"CNY": 7.0}}), **routes}
+        self.calls = {"fx": 0, "yahoo": 0, "eastmoney": 0}
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        name = request.url.host.split(".")[0]
+        self.calls[name] += 1
+        route = self.routes[name]
+        if isinstance(route, Exception):
+            raise route
+        delay, status, body = route
+        if delay:
+            await asyncio.sleep(delay)
+        return httpx.Response(status, json=body)
+
+
+def make_fetcher(stub: Stub, threshold: int = 3, backoff: float = 60.0) -> CopperPriceFetcher:
+    fetcher = CopperPriceFetcher(transport=httpx.MockTransport(stub))
+    fetcher.breakers = {
+        name: CircuitBreaker(name, failure_threshold=threshold, base_backoff=backoff, max_backoff=backoff * 8)
+        for name in ("fx", "yahoo", "eastmoney")
+    }
+    return fetcher
+
+
+def fetch(fetcher: CopperPriceFetcher, times: int = 1):
+    async def run():
+        try:
+            return await asyncio.gather(*(fetcher.fetch() for _ in range(times)))
+        finally:
+            await fetcher.close()
+    results = asyncio.run(run())
+    return results[0] if times == 1 else results
+
+
+# --- 竞速 ---
+def test_fastest_valid_quote_wins_yahoo():
+    stub = Stub(yahoo=(0, 200, yahoo_ok(4.0)), eastmoney=(0.2, 200, eastmoney_ok()))
+    fetcher = make_fetcher(stub)
+    result = fetch(fetcher)
+    assert result["USD"]["source"] == "Yahoo Finance (Global)"
+    assert result["USD"]["price"] == round(4.0 * LBS_PER_TON, 2)
+    assert result["CNY"]["price"] == round(result["USD"]["price"] * 7.0, 2)
+    # 输掉的源被取消，不计失败
+    assert fetcher.breakers["eastmoney"].failures == 0
+
+
+def test_fastest_valid_quote_wins_eastmoney():
+    stub = Stub(yahoo=(0.2, 200, yahoo_ok()), eastmoney=(0, 200, eastmoney_ok(70000.0)))
+    result = fetch(make_fetcher(stub))
+    assert result["CNY"]["source"] == "东方财富 (EastMoney)"
+    assert result["CNY"]["price"] == 70000.0
+    assert result["USD"]["price"] == round(70000.0 / 7.0, 2)
+
+
+def test_fast_invalid_quote_does_not_win():
+    stub = Stub(yahoo=(0, 200, yahoo_ok(0)), eastmoney=(0.05, 200, eastmoney_ok(70000.0)))
+    fetcher = make_fetcher(stub)
+    result = fetch(fetcher)
+    assert result["CNY"]["source"] == "东方财富 (EastMoney)"
+    assert fetcher.breakers["yahoo"].failures == 1
+    assert fetcher.breakers["yahoo"].last_error == "invalid payload"
+
+
+# --- 兜底 ---
+def test_all_sources_failing_falls_back():
+    stub = Stub(fx=httpx.ConnectError("down"), yahoo=httpx.ReadTimeout("slow"), eastmoney=(0, 500, {}))
+    fetcher = make_fetcher(stub)
+    result = fetch(fetcher)
+    assert result["USD"]["source"] == "Simulated (Fallback)"
+    assert result["exchange_rate"] == DEFAULT_EXCHANGE_RATE
+    assert fetcher.last_result is result
+    assert {name: b.failures for name, b in fetcher.breakers.items()} == {"fx": 1, "yahoo": 1, "eastmoney": 1}
+    assert fetcher.breakers["yahoo"].last_error.startswith("ReadTimeout")
+
+
+def test_fx_failure_uses_default_rate():
+    stub = Stub(fx=(0, 200, {"rates": {}}), yahoo=(0, 200, yahoo_ok(4.0)), eastmoney=(0.2, 200, eastmoney_ok()))
+    result = fetch(make_fetcher(stub))
+    assert result["exchange_rate"] == DEFAULT_EXCHANGE_RATE
+    assert result["USD"]["source"] == "Yahoo Finance (Global)"
+
+
+def test_slow_source_is_not_awaited_after_a_winner():
+    stub = Stub(yahoo=(5.0, 200, yahoo_ok()), eastmoney=(0, 200, eastmoney_ok()))
+    started = time.monotonic()
+    fetch(make_fetcher(stub))
+    assert time.monotonic() - started < 2.0
+
+
+# --- 熔断 ---
+def test_breaker_opens_after_threshold_and_skips_source():
+    stub = Stub(yahoo=httpx.ConnectError("down"), eastmoney=(0, 200, eastmoney_ok()))
+    fetcher = make_fetcher(stub, threshold=2)
+    fetch(fetcher)
+    fetch(fetcher)
+    assert fetcher.breakers["yahoo"].state == "open"
+    fetch(fetcher)
+    assert stub.calls["yahoo"] == 2
+
+
+def test_breaker_half_open_admits_single_probe():
+    breaker = CircuitBreaker("t", failure_threshold=2, base_backoff=0.05, max_backoff=1.0)
+    breaker.record_failure("a")
+    assert breaker.allow()
+    breaker.record_failure("b")
+    assert breaker.state == "open" and not breaker.allow()
+
+    time.sleep(0.06)
+    assert breaker.state == "half_open"
+    assert breaker.allow()
+    assert not breaker.allow()          # 试探在途，其它调用跳过
+
+    breaker.record_failure("probe failed")
+    assert breaker.state == "open"
+    assert breaker.open_until - time.monotonic() > 0.05    # 退避翻倍
+
+    time.sleep(0.11)
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.allow() and breaker.allow()
+
+
+def test_half_open_probe_is_single_under_concurrent_fetches():
+    stub = Stub(yahoo=(0.05, 200, yahoo_ok()), eastmoney=(0.2, 200, eastmoney_ok()))
+    fetcher = make_fetcher(stub, threshold=1, backoff=0.01)
+    fetcher.breakers["yahoo"].record_failure("earlier outage")
+    time.sleep(0.02)
+    results = fetch(fetcher, times=5)
+    assert stub.calls["yahoo"] == 1
+    assert fetcher.breakers["yahoo"].state == "closed"
+    assert sum(r["USD"]["source"] == "Yahoo Finance (Global)" for r in results) == 1
+
+
+def test_cancelled_probe_releases_half_open_slot():
+    stub = Stub(yahoo=(0.5, 200, yahoo_ok()), eastmoney=(0, 200, eastmoney_ok()))
+    fetcher = make_fetcher(stub, threshold=1, backoff=0.01)
+    fetcher.breakers["yahoo"].record_failure("earlier outage")
+    time.sleep(0.02)
+    fetch(fetcher)
+    breaker = fetcher.breakers["yahoo"]
+    assert stub.calls["yahoo"] == 1
+    assert breaker.state == "half_open" and not breaker.probing
+    assert breaker.allow()
@@ -0,0 +1,140 @@
+# backend/tests/test_price_stream.py
+"""铜价推送: 发布去重、Last-Event-ID 跳过、连接上限与名额归还"""
+import asyncio
+import gc
+from datetime import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from app.services import price_stream
+from app.services.price_snapshot import PriceSnapshot
+from app.services.price_stream import PriceHub, sse_stream
+
+
+def snapshot(record_id, price=68000.0):
+    return PriceSnapshot({"status": "ok", "CNY": {"price": price}}, datetime(2026, 6, 1, 12), record_id)
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_publish_dedupes_same_record():
+    hub = PriceHub(max_subscribers=10, heartbeat=1.0)
+    assert hub.publish(snapshot(1))
+    assert not hub.publish(snapshot(1, price=1.0))
+    assert not hub.publish(None)
+    assert not hub.publish(snapshot(None))
+    assert hub.publish(snapshot(2))
+    assert hub.published == 2
+    assert hub.latest.event_id == "2"
+
+
+def test_new_subscriber_gets_latest_then_heartbeat():
+    async def main():
+        hub = PriceHub(max_subscribers=10, heartbeat=0.01)
+        hub.publish(snapshot(7))
+        sub = hub.subscribe()
+        try:
+            first = await sub.__anext__()
+            second = await sub.__anext__()
+        finally:
+            await sub.aclose()
+        return first, second
+    first, second = run(main())
+    assert first.event_id == "7"
+    assert b"id: 7\nevent: price\n" in first.sse
+    assert second is None
+
+
+def test_last_event_id_skips_already_seen_snapshot():
+    async def main():
+        hub = PriceHub(max_subscribers=10, heartbeat=0.01)
+        hub.publish(snapshot(7))
+        sub = hub.subscribe("7")
+        try:
+            first = await sub.__anext__()
+            hub.publish(snapshot(8))
+            second = await sub.__anext__()
+        finally:
+            await sub.aclose()
+        return first, second
+    first, second = run(main())
+    assert first is None
+    assert second.event_id == "8"
+
+
+def test_publish_wakes_all_waiting_subscribers():
+    async def main():
+        hub = PriceHub(max_subscribers=10, heartbeat=5.0)
+        subs = [hub.subscribe() for _ in range(3)]
+        pending = [asyncio.ensure_future(s.__anext__()) for s in subs]
+        await asyncio.sleep(0)
+        hub.publish(snapshot(3))
+        events = await asyncio.wait_for(asyncio.gather(*pending), timeout=1.0)
+        for s in subs:
+            await s.aclose()
+        return events, hub.subscribers
+    events, remaining = run(main())
+    assert [e.event_id for e in events] == ["3", "3", "3"]
+    assert remaining == 0
+
+
+def test_slot_is_reserved_before_iteration():
+    hub = PriceHub(max_subscribers=2, heartbeat=1.0)
+    a, b = hub.subscribe(), hub.subscribe()
+    # 两个订阅都还没开始迭代 (SSE 还没发出 retry 帧)，名额已经占满
+    assert hub.subscribers == 2 and hub.full
+    assert hub.subscribe() is None
+    run(a.aclose())
+    assert hub.subscribers == 1
+    c = hub.subscribe()
+    assert c is not None
+    run(b.aclose())
+    run(c.aclose())
+    run(c.aclose())     # 重复关闭不重复归还
+    assert hub.subscribers == 0
+
+
+def test_never_started_subscription_is_released_when_dropped():
+    hub = PriceHub(max_subscribers=2, heartbeat=1.0)
+    sub = hub.subscribe()
+    assert hub.subscribers == 1
+    del sub
+    gc.collect()
+    assert hub.subscribers == 0
+
+
+def test_sse_stream_closes_subscription():
+    async def main():
+        hub = PriceHub(max_subscribers=2, heartbeat=1.0)
+        hub.publish(snapshot(5))
+        stream = sse_stream(hub.subscribe())
+        frames = [await stream.__anext__(), await stream.__anext__()]
+        await stream.aclose()
+        return frames, hub.subscribers
+    frames, remaining = run(main())
+    assert frames[0].startswith(b"retry: ")
+    assert frames[1].startswith(b"id: 5\n")
+    assert remaining == 0
+
+
+def test_endpoints_reject_when_full(monkeypatch):
+    from app.main import COPPER_STREAM_PATH, COPPER_WS_PATH, app
+
+    hub = PriceHub(max_subscribers=1, heartbeat=1.0)
+    monkeypatch.setattr(price_stream, "hub", hub)
+    held = hub.subscribe()
+    client = TestClient(app)
+    response = client.get(COPPER_STREAM_PATH)
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == str(price_stream.RECONNECT_MS // 1000)
+    with pytest.raises(WebSocketDisconnect) as closed:
+        with client.websocket_connect(COPPER_WS_PATH):
+            pass
+    assert closed.value.code == 1013
+    assert hub.subscribers == 1
+    run(held.aclose())
+    assert hub.subscribers == 0
@@ -0,0 +1,115 @@
+# backend/tests/test_result_cache.py
+"""结果缓存: LRU 淘汰顺序、TTL 过期、计数，以及规格目录重载时清空"""
+import time
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import seed
+from app.models.database import Base
+from app.models.tables import CableSpec
+from app.services import result_cache, spec_catalog
+from app.services.result_cache import LRUCache
+
+
+def test_evicts_least_recently_used():
+    cache = LRUCache("t", maxsize=3)
+    for k in "abc":
+        cache.put(k, k.upper())
+    assert cache.get("a") == "A"          # a 变成最近使用
+    cache.put("d", "D")                   # 淘汰 b
+    assert cache.get("b") is None
+    assert [cache.get(k) for k in "acd"] == ["A", "C", "D"]
+    cache.put("e", "E")                   # 淘汰 a (c/d 在 a 之后访问过)
+    assert cache.get("a") is None
+    assert len(cache) == 3 and cache.evictions == 2
+
+
+def test_put_existing_key_refreshes_without_eviction():
+    cache = LRUCache("t", maxsize=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.put("a", 10)
+    cache.put("c", 3)                     # a 刚写过，淘汰 b
+    assert cache.get("a") == 10 and cache.get("b") is None
+    assert cache.evictions == 1
+
+
+def test_entries_expire_after_ttl():
+    cache = LRUCache("t", maxsize=10, ttl=0.05)
+    cache.put("a", 1)
+    assert cache.get("a") == 1
+    time.sleep(0.06)
+    assert cache.get("a", "gone") == "gone"
+    assert len(cache) == 0
+    assert cache.expirations == 1 and cache.hits == 1 and cache.misses == 1
+
+
+def test_counters_and_hit_rate():
+    cache = LRUCache("t", maxsize=1)
+    assert cache.stats()["hit_rate"] == 0.0
+    cache.get("x")
+    cache.put("x", 1)
+    cache.get("x")
+    cache.get("x")
+    cache.put("y", 2)
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"], stats["expirations"]) == (2, 1, 1, 0)
+    assert stats["hit_rate"] == round(2 / 3, 4)
+    assert stats["size"] == 1 and stats["maxsize"] == 1
+
+
+def test_get_or_compute_only_computes_on_miss():
+    cache = LRUCache("t", maxsize=4)
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return {"size": "4"}
+
+    first = cache.get_or_compute("k", compute)
+    second = cache.get_or_compute("k", compute)
+    assert first is second and len(calls) == 1
+    # None 也是合法结果，不会被当成未命中
+    assert cache.get_or_compute("none", lambda: None) is None
+    assert cache.get_or_compute("none", lambda: pytest.fail("recomputed")) is None
+
+
+def test_sizing_key_shares_equivalent_inputs():
+    a = result_cache.sizing_key("v1", 20, "cu", "yjv", 50, "380v", 5, 40, (0.91, 1.0))
+    b = result_cache.sizing_key("v1", 20.0, "cu", "yjv", 50.0, "380v", 5.0, 40.0, [0.91, 1.0])
+    assert a == b and hash(a) == hash(b)
+    assert a != result_cache.sizing_key("v2", 20, "cu", "yjv", 50, "380v", 5, 40, (0.91, 1.0))
+
+
+@pytest.fixture
+def catalog_db(monkeypatch):
+    monkeypatch.setattr(spec_catalog, "_catalog", None)
+    monkeypatch.setattr(spec_catalog, "_last_version_id", 0)
+    monkeypatch.setattr(spec_catalog, "_last_mtime", 0.0)
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    for row in seed.seed_rows():
+        session.add(CableSpec(**row))
+    session.commit()
+    yield session
+    session.close()
+
+
+def test_catalog_reload_clears_caches(catalog_db):
+    spec_catalog.add_reload_listener(result_cache.clear_all)
+    spec_catalog.load_catalog(catalog_db)
+    result_cache.sizing_cache.put(("stale",), "old result")
+
+    # 内容没变的重载沿用旧快照，不清缓存
+    spec_catalog.load_catalog(catalog_db)
+    assert result_cache.sizing_cache.get(("stale",)) == "old result"
+
+    spec = catalog_db.query(CableSpec).first()
+    spec.ampacity += 1
+    catalog_db.commit()
+    spec_catalog.load_catalog(catalog_db)
+    assert len(result_cache.sizing_cache) == 0
+    assert all(s["size"] == 0 for s in result_cache.all_stats().values())
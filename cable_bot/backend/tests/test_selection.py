@@ -0,0 +1,108 @@
+# backend/tests/test_selection.py
+"""二分选型与原逐条扫描的差分测试 (随机网格: 电流 / 距离 / 电压 / 压降上限 / 降容系数)"""
+import random
+
+import pytest
+
+import seed
+from app.services import derating
+from app.services.calc_logic import ElectricalCalculator
+from app.services.spec_catalog import SpecCatalog, SpecTable
+
+
+def linear_select(catalog, current, material, cable_type, distance, voltage, max_drop, ambient_temp, factors):
+    """user-002 之前的逐条扫描 (原样保留，作为对照)"""
+    derating_factor = factors["total"]
+    target_ampacity = current / derating_factor
+    table = catalog.get(material, cable_type)
+    specs = range(len(table)) if table else ()
+
+    selected_spec = None
+    final_drop = 0.0
+    upgrade_count = 0
+    for i in specs:
+        if table.ampacities[i] < target_ampacity:
+            continue
+        drop = ElectricalCalculator.calculate_voltage_drop_pure(current, distance, table.sizes[i], material, voltage)
+        if drop <= max_drop:
+            selected_spec = i
+            final_drop = drop
+            break
+        upgrade_count += 1
+
+    if selected_spec is None:
+        return {"size": "Out of Range", "drop": 0.0, "reason": "❌ 负载过大或距离过长，超出数据库范围",
+                "safe_ampacity": 0, "derating": factors}
+    reason = "✅ 规格合适"
+    if upgrade_count > 0:
+        reason = f"⚠️ 因长距离压降(>{max_drop}%)，已自动放大 {upgrade_count} 档规格"
+    elif derating_factor < 1.0:
+        reason = derating.reason_text(ambient_temp, factors)
+    return {"size": table.sizes[selected_spec], "drop": round(final_drop, 2), "reason": reason,
+            "safe_ampacity": round(table.ampacities[selected_spec] * derating_factor, 1), "derating": factors}
+
+
+def _catalog(rows):
+    grouped = {}
+    for r in sorted(rows, key=lambda r: r["ampacity"]):
+        grouped.setdefault((r["material"], r["insulation"]), []).append(
+            (r["size"], r["ampacity"], r["weight_per_100m"]))
+    return SpecCatalog({key: SpecTable(key[0], key[1], group) for key, group in grouped.items()}, "test")
+
+
+SEED_CATALOG = _catalog(seed.seed_rows())
+
+# 截面不随载流量单调 (走逐条回退)
+IRREGULAR_CATALOG = _catalog([
+    {"material": "cu", "insulation": "yjv", "size": s, "ampacity": a, "weight_per_100m": None}
+    for s, a in (("2.5", 30), ("6", 45), ("4", 50), ("16", 80), ("10", 90), ("35", 140), ("25", 150), ("70", 230))
+])
+
+# 含无法解析的规格 (压降按 999 处理)
+UNPARSABLE_CATALOG = _catalog([
+    {"material": "cu", "insulation": "yjv", "size": s, "ampacity": a, "weight_per_100m": None}
+    for s, a in (("1.5", 20), ("2.5", 28), ("abc", 40), ("6", 50), ("10mm²", 70), ("16", 95), ("25", 125))
+])
+
+
+def _random_cases(rng, keys, count):
+    for _ in range(count):
+        material, cable_type = rng.choice(keys)
+        factor = rng.choice([1.0, round(rng.uniform(0.3, 1.0), 2)])
+        yield (
+            material, cable_type,
+            round(rng.choice([rng.uniform(0.5, 30), rng.uniform(0.5, 600)]), 2),   # 电流
+            round(rng.choice([rng.uniform(1, 100), rng.uniform(1, 2000)]), 1),     # 距离
+            rng.choice(["380v", "220v"]),
+            rng.choice([1.0, 2.5, 3.0, 5.0, round(rng.uniform(0.5, 10), 2)]),      # 压降上限
+            rng.choice([25.0, 30.0, 40.0, 50.0]),
+            derating.temperature_only(factor),
+        )
+
+
+@pytest.mark.parametrize("catalog, count", [
+    (SEED_CATALOG, 20000),
+    (IRREGULAR_CATALOG, 5000),
+    (UNPARSABLE_CATALOG, 5000),
+], ids=["seed", "irregular", "unparsable"])
+def test_bisection_matches_linear_scan(catalog, count):
+    rng = random.Random(20240501)
+    for material, cable_type, current, distance, voltage, max_drop, temp, factors in _random_cases(
+            rng, list(catalog.tables), count):
+        expected = linear_select(catalog, current, material, cable_type, distance, voltage, max_drop, temp, factors)
+        actual = ElectricalCalculator.smart_select_cable(
+            catalog, current, material, cable_type, distance, voltage,
+            max_drop=max_drop, ambient_temp=temp, derating_factors=factors,
+        )
+        assert actual == expected, (material, cable_type, current, distance, voltage, max_drop, factors)
+
+
+def test_fallback_tables_are_not_monotone():
+    assert SEED_CATALOG.get("cu", "yjv").monotone
+    assert not IRREGULAR_CATALOG.get("cu", "yjv").monotone
+    assert not UNPARSABLE_CATALOG.get("cu", "yjv").monotone
+
+
+def test_missing_table_is_out_of_range():
+    result = ElectricalCalculator.smart_select_cable(SEED_CATALOG, 10, "xx", "yjv", 10, "380v")
+    assert result["size"] == "Out of Range"
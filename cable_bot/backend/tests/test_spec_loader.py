@@ -0,0 +1,83 @@
+# backend/tests/test_spec_loader.py
+"""规格导入: 按数值截面去重 + 管理接口鉴权"""
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+from app.core import config
+from app.models.database import Base
+from app.models.tables import CableSpec
+from app.services.spec_loader import UNIQUE_INDEX, ensure_unique_index, load_specs
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    # 模拟老库: 还没有唯一索引
+    index = next(ix for ix in CableSpec.__table__.indexes if ix.name == UNIQUE_INDEX)
+    CableSpec.__table__.indexes.discard(index)
+    try:
+        Base.metadata.create_all(engine)
+    finally:
+        CableSpec.__table__.indexes.add(index)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+def _add(db, size, ampacity, material="cu", insulation="bv"):
+    db.add(CableSpec(material=material, insulation=insulation, size=size, ampacity=ampacity))
+    db.commit()
+
+
+def _specs(db):
+    return db.execute(select(CableSpec.size, CableSpec.ampacity).order_by(CableSpec.id)).all()
+
+
+def test_duplicates_removed_by_normalized_size(db):
+    _add(db, "4", 30)
+    _add(db, "4.0", 32)
+    _add(db, "4mm²", 34)
+    _add(db, "6", 40)
+    _add(db, "4", 99, insulation="yjv")
+    assert ensure_unique_index(db) == 2
+    db.commit()
+    # 每个 (材质, 绝缘, 数值截面) 只保留最新一条
+    assert _specs(db) == [("4mm²", 34), ("6", 40), ("4", 99)]
+
+
+def test_duplicates_removed_even_when_index_exists(db):
+    ensure_unique_index(db)
+    _add(db, "10", 60)
+    _add(db, "10.0", 61)
+    assert ensure_unique_index(db) == 1
+    assert ensure_unique_index(db) == 0
+
+
+def test_load_after_dedupe_updates_single_row(db):
+    _add(db, "2.5", 20)
+    _add(db, "2.50", 21)
+    summary = load_specs(db, [{"material": "cu", "insulation": "bv", "size": "2.5", "ampacity": 25.0,
+                               "weight_per_100m": None}], "test")
+    assert summary["deleted"] == 1 and summary["updated"] == 1 and summary["inserted"] == 0
+    assert _specs(db) == [("2.50", 25.0)]
+
+
+@pytest.mark.parametrize("path, method", [
+    ("/api/v1/admin/catalog/reload", "post"),
+    ("/api/v1/admin/catalog/versions", "get"),
+])
+def test_admin_endpoints_require_token(monkeypatch, path, method):
+    from app.main import app
+
+    client = TestClient(app)
+    monkeypatch.setattr(config, "ADMIN_TOKEN", "")
+    assert getattr(client, method)(path).status_code == 404
+    monkeypatch.setattr(config, "ADMIN_TOKEN", "s3cret")
+    assert getattr(client, method)(path).status_code == 401
+    assert getattr(client, method)(path, headers={"X-Admin-Token": "wrong"}).status_code == 401
+
+    from app.models.database import engine
+    Base.metadata.create_all(bind=engine)
+    assert getattr(client, method)(path, headers={"X-Admin-Token": "s3cret"}).status_code == 200
@@ -24,7 +24,8 @@ const AntiFakeCheck = ({ onBack }) => {
       const data = await checkFakeCable({
         nominal_size: formData.nominal_size,
         measured_weight: parseFloat(formData.measured_weight),
-        cable_type: 'bv' // 默认为单芯线检测
+        cable_type: 'bv', // 默认为单芯线检测
+        material: 'cu'
       });
       setResult(data);
       setStep(3); // 显示结果
@@ -181,6 +182,12 @@ const AntiFakeCheck = ({ onBack }) => {
               <div className={`text-2xl font-black ${result.diff_percent >= -5 ? 'text-green-600' : 'text-red-600'}`}>
                 {result.diff_percent > 0 ? '+' : ''}{result.diff_percent}%
               </div>
+              {result.matched_size && (
+                <p className="text-xs text-slate-400 mt-2">
+                  正品置信度 / Confidence: {(result.confidence * 100).toFixed(1)}%
+                  {result.weight_source !== 'catalog' && ' (标准重量为推算值)'}
+                </p>
+              )}
             </div>
           </div>
 
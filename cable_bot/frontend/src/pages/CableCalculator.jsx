@@ -1,7 +1,8 @@
-import React, { useState } from 'react';
+import React, { useEffect, useState } from 'react';
 import { useTranslation } from 'react-i18next';
-import { ArrowLeft, Zap, AlertTriangle, CheckCircle, RotateCcw, Thermometer, Settings2, Info } from 'lucide-react';
+import { ArrowLeft, Zap, AlertTriangle, CheckCircle, RotateCcw, Thermometer, Settings2, Info, WifiOff } from 'lucide-react';
 import { calculateCable } from '../services/api'; //
+import { syncSizingTable, loadSizingTable, sizeOffline } from '../services/offlineSizing';
 
 const CableCalculator = ({ onBack }) => {
   const { t } = useTranslation();
@@ -21,6 +22,11 @@ const CableCalculator = ({ onBack }) => {
     max_voltage_drop: 5
   });
 
+  // 联网时后台同步离线查找表 (版本没变不会重新下载)
+  useEffect(() => {
+    syncSizingTable().catch(() => {});
+  }, []);
+
   const handleCalculate = async () => {
     if (!formData.power) return;
     setLoading(true);
@@ -45,8 +51,27 @@ const CableCalculator = ({ onBack }) => {
       setTimeout(() => {
         document.getElementById('result-card')?.scrollIntoView({ behavior: 'smooth', block: 'end' });
       }, 100);
-    } catch (error) {
-      alert("Error: Cannot connect to server. Please ensure backend is running.");
+    } catch {
+      // 连不上服务器: 用本地查找表回答
+      const table = await loadSizingTable().catch(() => null);
+      const offlineResult = table && sizeOffline(table, {
+        power: parseFloat(formData.power),
+        power_unit: formData.power_unit,
+        voltage_type: formData.voltage_type,
+        distance: parseFloat(formData.distance),
+        material: formData.material,
+        cable_type: formData.cable_type,
+        temperature: parseFloat(formData.temperature),
+        max_voltage_drop: parseFloat(formData.max_voltage_drop)
+      });
+      if (offlineResult) {
+        setResult(offlineResult);
+        setTimeout(() => {
+          document.getElementById('result-card')?.scrollIntoView({ behavior: 'smooth', block: 'end' });
+        }, 100);
+      } else {
+        alert("Error: Cannot connect to server. Please ensure backend is running.");
+      }
     } finally {
       setLoading(false);
     }
@@ -258,6 +283,12 @@ const CableCalculator = ({ onBack }) => {
                 <div className="flex justify-between items-start mb-6">
                     <div>
                         <span className="text-xs font-bold text-slate-400 uppercase tracking-wider">Result Report</span>
+                        {result.offline && (
+                            <span className="ml-2 inline-flex items-center space-x-1 text-[10px] font-bold text-amber-700 bg-amber-50 border border-amber-100 px-2 py-0.5 rounded-md">
+                                <WifiOff size={10} />
+                                <span>Offline Table</span>
+                            </span>
+                        )}
                         <h3 className={`text-lg font-bold mt-1 ${result.voltage_drop_percent > formData.max_voltage_drop ? 'text-red-600' : 'text-slate-800'}`}>
                             {result.voltage_drop_percent > formData.max_voltage_drop ? '⚠️ Drop Limit Exceeded' : '✅ Standard Compliant'}
                         </h3>
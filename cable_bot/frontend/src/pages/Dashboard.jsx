@@ -11,10 +11,37 @@ const Dashboard = ({ onNavigate }) => {
   useEffect(() => {
     // 获取铜价
     const apiUrl = import.meta.env.VITE_API_BASE_URL || 'http://127.0.0.1:8000'; // 兼容本地开发
-    fetch(`${apiUrl}/api/v1/market/copper`)
-      .then(res => res.json())
-      .then(data => setCopperPrice(data))
+
+    let timer = null;
+    const load = () => fetch(`${apiUrl}/api/v1/market/copper`)
+      .then(res => {
+        // 服务刚启动、首次抓价还没完成时返回 pending，按 Retry-After 稍后重取
+        const retry = Number(res.headers.get('Retry-After')) || 3;
+        return res.json().then(data => ({ data, retry }));
+      })
+      .then(({ data, retry }) => {
+        setCopperPrice(data);
+        if (data.status === 'pending') timer = setTimeout(load, retry * 1000);
+      })
       .catch(err => console.error("Failed to fetch price", err));
+
+    // 不支持 EventSource 时直接请求一次
+    if (typeof EventSource === 'undefined') {
+      load();
+      return () => clearTimeout(timer);
+    }
+
+    // 实时推送: 连接后立即收到当前价格，之后每次更新推一次；断线由浏览器按 Last-Event-ID 自动重连
+    const source = new EventSource(`${apiUrl}/api/v1/market/copper/stream`);
+    source.addEventListener('price', e => setCopperPrice(JSON.parse(e.data)));
+    source.onerror = () => {
+      // 服务端拒绝连接 (如连接数已满返回 503) 时浏览器不会再重连，改为普通请求
+      if (source.readyState === EventSource.CLOSED) load();
+    };
+    return () => {
+      source.close();
+      clearTimeout(timer);
+    };
   }, []);
 
   return (
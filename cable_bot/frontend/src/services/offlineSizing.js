@@ -0,0 +1,164 @@
+// src/services/offlineSizing.js
+// 离线选型查找表: 联网时按规格目录版本同步到本地，现场无信号时直接查表
+// 表结构见后端 app/services/offline_table.py (结果与服务器 /sizing/offline 一致，只会选大不会选小)
+import { API_BASE_URL } from './api';
+
+const STORAGE_KEY = 'sizing_table';
+const MAGIC = 'WCST';
+const FORMAT_VERSION = 1;
+
+// 与后端 ElectricalCalculator 保持一致
+const STANDARD_MCB = [6, 10, 16, 20, 25, 32, 40, 50, 63, 80, 100, 125, 160, 200, 250, 400];
+const PF = 0.85;
+
+let memoryTable = null; // 已解析的表 (内存)
+
+const toBase64 = (bytes) => {
+  let binary = '';
+  for (let i = 0; i < bytes.length; i += 0x8000) {
+    binary += String.fromCharCode(...bytes.subarray(i, i + 0x8000));
+  }
+  return btoa(binary);
+};
+
+const fromBase64 = (text) => Uint8Array.from(atob(text), (c) => c.charCodeAt(0));
+
+// zlib 格式 -> 浏览器原生 DecompressionStream('deflate')
+const inflate = async (bytes) => {
+  const stream = new Blob([bytes]).stream().pipeThrough(new DecompressionStream('deflate'));
+  return new Uint8Array(await new Response(stream).arrayBuffer());
+};
+
+export const parseSizingTable = async (bytes) => {
+  if (new TextDecoder().decode(bytes.subarray(0, 4)) !== MAGIC || bytes[4] !== FORMAT_VERSION) {
+    throw new Error('Unsupported sizing table');
+  }
+  const headerLength = new DataView(bytes.buffer, bytes.byteOffset).getUint32(5, true);
+  const header = JSON.parse(new TextDecoder().decode(bytes.subarray(9, 9 + headerLength)));
+  const raw = await inflate(bytes.subarray(9 + headerLength));
+  return {
+    header,
+    ampacity: raw.subarray(0, header.ampacity_bytes),
+    drop: raw.subarray(header.ampacity_bytes, header.ampacity_bytes + header.drop_bytes),
+  };
+};
+
+// 联网时调用: 版本没变不重新下载
+export const syncSizingTable = async () => {
+  const response = await fetch(`${API_BASE_URL}/api/v1/sizing-table`);
+  if (!response.ok) throw new Error('Sizing table manifest failed');
+  const manifest = await response.json();
+
+  const stored = JSON.parse(localStorage.getItem(STORAGE_KEY) || 'null');
+  if (stored && stored.version === manifest.version) return manifest.version;
+
+  const binary = await fetch(`${API_BASE_URL}${manifest.url}`);
+  if (!binary.ok) throw new Error('Sizing table download failed');
+  const bytes = new Uint8Array(await binary.arrayBuffer());
+  memoryTable = await parseSizingTable(bytes);
+  try {
+    localStorage.setItem(STORAGE_KEY, JSON.stringify({ version: manifest.version, data: toBase64(bytes) }));
+  } catch {
+    // 存储空间不足时只保留在内存里
+  }
+  return manifest.version;
+};
+
+export const loadSizingTable = async () => {
+  if (memoryTable) return memoryTable;
+  const stored = JSON.parse(localStorage.getItem(STORAGE_KEY) || 'null');
+  if (!stored) return null;
+  memoryTable = await parseSizingTable(fromBase64(stored.data));
+  return memoryTable;
+};
+
+// 与 Python round 一致: 按浮点数的精确值舍入，恰好 .5 时取偶数
+const round = (value, digits) => {
+  const exact = Math.abs(value).toFixed(100);
+  const cut = exact.indexOf('.') + 1 + digits;
+  if (/^50*$/.test(exact.slice(cut)) && Number(exact[cut - 1 === exact.indexOf('.') ? cut - 2 : cut - 1]) % 2 === 0) {
+    return Math.sign(value) * Number(exact.slice(0, cut));
+  }
+  return Number(value.toFixed(digits));
+};
+// 与 Python 的浮点数格式一致 (17 -> "17.0")
+const pyFloat = (value) => (Number.isInteger(value) ? value.toFixed(1) : String(value));
+
+const calculateCurrent = (power, unit, voltage) => {
+  if (unit === 'amps') return power;
+  const kw = unit === 'hp' ? power * 0.746 : power;
+  return voltage === '380v'
+    ? round((kw * 1000) / (380 * 1.732 * PF), 2)
+    : round((kw * 1000) / (220 * PF), 2);
+};
+
+const voltageDrop = (current, distance, size, material, voltage) => {
+  const rho = material === 'cu' ? 0.0175 : 0.028;
+  const factor = voltage === '380v' ? 1.732 : 2.0;
+  const base = voltage === '380v' ? 380 : 220;
+  return (((factor * current * distance * rho) / size) / base) * 100;
+};
+
+const recommendMcb = (amps, safeAmpacity) => {
+  const needed = Math.ceil(amps * 1.2);
+  const mcb = STANDARD_MCB.find((x) => x >= needed) ?? needed;
+  return safeAmpacity > 0 && mcb > safeAmpacity ? `${mcb}A (⚠️注意: 接近电缆极限 ${pyFloat(safeAmpacity)}A)` : `${mcb}A`;
+};
+
+// 值 -> 不小于它的网格点下标 (超出网格返回 -1)
+const gridIndex = (value, grid, ratio) => {
+  if (value <= grid.min) return 0;
+  const k = Math.ceil(Math.log(value / grid.min) / Math.log(ratio) - 1e-9);
+  return k < grid.count ? k : -1;
+};
+
+// 本地查表选型，参数超出表覆盖范围时返回 null
+export const sizeOffline = (table, req) => {
+  const { header, ampacity, drop } = table;
+  const t = header.tables.findIndex((x) => x.material === req.material && x.insulation === req.cable_type);
+  const temps = header.temperatures;
+  const maxDrop = req.max_voltage_drop ?? 5;
+  const temperature = req.temperature ?? 40;
+  const dropBand = header.max_drops.filter((d) => d <= maxDrop).length - 1;
+  if (t < 0 || dropBand < 0 || temperature < temps[0] || temperature > temps[temps.length - 1]) return null;
+
+  const spec = header.tables[t];
+  const band = temps.findIndex((x) => x >= temperature);
+  const factor = spec.temp_factors[band];
+  const current = calculateCurrent(req.power, req.power_unit, req.voltage_type);
+  const ci = gridIndex(current, header.current_grid, header.grid_ratio);
+  const mi = gridIndex(current * req.distance, header.moment_grid, header.grid_ratio);
+  if (factor == null || current <= 0 || ci < 0 || mi < 0) return null;
+
+  const currentCount = header.current_grid.count;
+  const momentCount = header.moment_grid.count;
+  const v = header.voltages.indexOf(req.voltage_type);
+  const iAmp = ampacity[(t * temps.length + band) * currentCount + ci];
+  const iDrop = drop[((t * header.voltages.length + v) * header.max_drops.length + dropBand) * momentCount + mi];
+  const j = Math.max(iAmp, iDrop);
+  const derating = { temperature: factor, grouping: 1, soil: 1, harmonics: 1, total: factor };
+
+  if (j >= spec.sizes.length) {
+    return {
+      current_amps: current, recommended_size: 'Out of Range', voltage_drop_percent: 0,
+      mcb_rating: recommendMcb(current, 0), selection_reason: '❌ 负载过大或距离过长，超出数据库范围',
+      safe_ampacity: 0, derating, offline: true,
+    };
+  }
+
+  const safeAmpacity = round(spec.ampacities[j] * factor, 1);
+  let reason = '✅ 规格合适';
+  if (j > iAmp) reason = `⚠️ 因长距离压降(>${pyFloat(maxDrop)}%)，已自动放大 ${j - iAmp} 档规格`;
+  else if (factor < 1) reason = `🌡️ 已包含高温修正 (${pyFloat(temperature)}°C, 系数${factor})`;
+
+  return {
+    current_amps: current,
+    recommended_size: spec.sizes[j],
+    voltage_drop_percent: round(voltageDrop(current, req.distance, spec.size_values[j], req.material, req.voltage_type), 2),
+    mcb_rating: recommendMcb(current, safeAmpacity),
+    selection_reason: reason,
+    safe_ampacity: safeAmpacity,
+    derating,
+    offline: true,
+  };
+};